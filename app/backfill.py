@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.schema import ROW_SCHEMA
+from app.scripts.data_collectors import get_klines
+from app.storage.base import row_timestamp
+
+INTERVAL_MS = {
+    "1m": 60 * 1000,
+    "3m": 3 * 60 * 1000,
+    "5m": 5 * 60 * 1000,
+    "15m": 15 * 60 * 1000,
+    "30m": 30 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "2h": 2 * 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "6h": 6 * 60 * 60 * 1000,
+    "8h": 8 * 60 * 60 * 1000,
+    "12h": 12 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+    "3d": 3 * 24 * 60 * 60 * 1000,
+    "1w": 7 * 24 * 60 * 60 * 1000,
+}
+# Largest page the kline endpoints return
+PAGE_LIMIT = 1000
+# Job states that still have bars to fetch
+UNFINISHED = ("pending", "running", "failed")
+
+
+def job_key(symbol: str, interval: str) -> str:
+    return f"{symbol}:{interval}"
+
+
+def merge_klines(spot_rows: List[dict], future_rows: List[dict]) -> List[dict]:
+    """Join spot and futures klines of the same bar into one row of ``ROW_SCHEMA``.
+
+    Only the kline and calendar groups are filled; every other column (and a
+    market missing the bar, e.g. before its listing) stays NaN, so backfilled
+    rows have the same width and column order as live ones.
+    """
+    spot = {row_timestamp(row): row for row in spot_rows}
+    future = {row_timestamp(row): row for row in future_rows}
+
+    rows = []
+    for timestamp in sorted(spot.keys() | future.keys()):
+        spot_row, future_row = spot.get(timestamp), future.get(timestamp)
+        row = ROW_SCHEMA.new_row()
+        row.fill("spot_klines", spot_row)
+        row.fill("calendar", spot_row or future_row)
+        row.fill("future_klines", future_row)
+        rows.append(row.as_dict())
+    return rows
+
+
+class BackfillEngine:
+    """Seeds history by paging through spot and futures klines.
+
+    Each symbol/interval job is cut into ``PAGE_LIMIT``-bar windows that are
+    fetched concurrently (bounded by ``concurrency`` and paced to
+    ``requests_per_second``) and bulk-written through the storage backend. The
+    contiguous progress of every job is checkpointed to ``state_path`` so an
+    interrupted backfill resumes where it stopped.
+    """
+
+    def __init__(self, app, state_path: str, concurrency: int = 8, requests_per_second: float = 10) -> None:
+        self.app = app
+        self.state_path = state_path
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_gap = 1 / requests_per_second if requests_per_second > 0 else 0
+        self.next_slot = 0.0
+        self.pace_lock = asyncio.Lock()
+        self.jobs: Dict[str, dict] = self.load_state()
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def load_state(self) -> Dict[str, dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print("Could not read backfill state:", repr(e))
+            return {}
+
+    def save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so a crash never leaves a truncated checkpoint
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.jobs, file, indent=2)
+        os.replace(temporary_path, self.state_path)
+
+    async def pace(self):
+        # Spread requests out to stay within the request budget
+        async with self.pace_lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.min_gap
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def fetch_page(self, symbol: str, interval: str, start: int, end: int) -> Optional[List[dict]]:
+        http = self.app.state.binance_http
+
+        async def fetch(trade):
+            await self.pace()
+            return await get_klines(http, symbol, trade, interval, PAGE_LIMIT, start, end - 1)
+
+        async with self.semaphore:
+            spot_rows, future_rows = await asyncio.gather(fetch("spot"), fetch("future"))
+        if spot_rows is None or future_rows is None:
+            return None
+        rows = merge_klines(spot_rows, future_rows)
+        # Endpoints may ignore endTime; never write past the window
+        return [row for row in rows if start <= row_timestamp(row) < end]
+
+    def start(self, symbols: List[str], start: int, end: int, interval: str = "1m") -> Tuple[List[str], List[str]]:
+        """Start a job per symbol; returns the keys started and those refused because their job is running.
+
+        An unfinished (pending or failed) job of the same key is merged with the
+        new range rather than replaced, keeping its checkpoint where it still applies.
+        """
+        started, busy = [], []
+        for symbol in symbols:
+            key = job_key(symbol, interval)
+            if key in self.tasks:
+                # One job per key at a time; the caller decides whether to retry later
+                busy.append(key)
+                continue
+            job = self.jobs.get(key)
+            if job is not None and job["status"] in UNFINISHED:
+                # Pages before the checkpoint are done unless the new range starts earlier
+                next_start = start if start < job["start"] else job["next"]
+                job.update({"start": min(start, job["start"]), "end": max(end, job["end"]), "next": next_start,
+                            "status": "pending", "error": None})
+            else:
+                self.jobs[key] = {"symbol": symbol, "interval": interval, "start": start, "end": end,
+                                  "next": start, "rows": 0, "status": "pending", "error": None}
+            self.tasks[key] = asyncio.create_task(self.run_job(key))
+            started.append(key)
+        self.save_state()
+        return started, busy
+
+    def resume(self):
+        # Pick up jobs left unfinished by a previous process; failed ones continue from their checkpoint
+        for key, job in self.jobs.items():
+            if job["status"] in UNFINISHED and key not in self.tasks:
+                self.tasks[key] = asyncio.create_task(self.run_job(key))
+
+    async def run_job(self, key: str):
+        job = self.jobs[key]
+        symbol, interval = job["symbol"], job["interval"]
+        page_span = INTERVAL_MS[interval] * PAGE_LIMIT
+        windows = [(window_start, min(window_start + page_span, job["end"]))
+                   for window_start in range(job["next"], job["end"], page_span)]
+        completed = set()
+        job["status"], job["error"] = "running", None
+
+        async def run_window(window_start: int, window_end: int):
+            rows = await self.fetch_page(symbol, interval, window_start, window_end)
+            if rows is None:
+                raise RuntimeError(f"Kline request failed for {symbol} at {window_start}")
+            if rows:
+                await self.app.state.storage.write_rows(symbol, rows)
+            job["rows"] += len(rows)
+            # The checkpoint only moves over windows finished without a gap before them
+            completed.add(window_start)
+            while job["next"] in completed:
+                completed.discard(job["next"])
+                job["next"] = min(job["next"] + page_span, job["end"])
+            self.save_state()
+
+        try:
+            results = await asyncio.gather(*[run_window(*window) for window in windows],
+                                           return_exceptions=True)
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if errors:
+                job["status"], job["error"] = "failed", str(errors[0])
+            else:
+                job["status"] = "done"
+            await self.app.state.storage.maybe_flush()
+        except asyncio.CancelledError:
+            # Keep it resumable on shutdown
+            job["status"] = "pending"
+            raise
+        finally:
+            self.save_state()
+            self.tasks.pop(key, None)
+
+    def status(self) -> Dict[str, dict]:
+        return self.jobs
+
+    async def stop(self):
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
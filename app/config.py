@@ -1,3 +1,5 @@
+import os
+
 TAGS_METADATA = [
     {
         "name": "Affecters",
@@ -6,5 +8,86 @@ TAGS_METADATA = [
     {
         "name": "Getters",
         "description": "Handling data access.",
+    },
+    {
+        "name": "Monitoring",
+        "description": "Service metrics.",
     }
 ]
+
+# Maintain order books locally from the depth diff streams instead of
+# downloading a full REST snapshot on every tick
+LOCAL_ORDER_BOOK = os.getenv("LOCAL_ORDER_BOOK", "true").lower() == "true"
+
+# Sheets appends are buffered and flushed once this many rows are pending or
+# the oldest pending row has waited this many seconds
+SHEETS_FLUSH_ROWS = int(os.getenv("SHEETS_FLUSH_ROWS", "1000"))
+SHEETS_FLUSH_SECONDS = float(os.getenv("SHEETS_FLUSH_SECONDS", "300"))
+# A tab whose append fails is retried with a doubling delay; after this many
+# failed appends its rows are set aside as JSON lines in SHEETS_REJECTED_PATH
+SHEETS_MAX_ATTEMPTS = int(os.getenv("SHEETS_MAX_ATTEMPTS", "5"))
+SHEETS_RETRY_SECONDS = float(os.getenv("SHEETS_RETRY_SECONDS", "30"))
+SHEETS_REJECTED_PATH = os.getenv("SHEETS_REJECTED_PATH", "data/sheets_rejected.jsonl")
+
+# Primary storage backend ("sqlite" or "sheets"); with "sqlite", Google Sheets
+# can still be kept as a write-only mirror
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/crypto_data.db")
+SHEETS_MIRROR = os.getenv("SHEETS_MIRROR", "true").lower() == "true"
+
+# Memory budget (bytes) of the month read cache in front of /query; 0 disables it
+READ_CACHE_BYTES = int(os.getenv("READ_CACHE_BYTES", str(128 * 1024 * 1024)))
+
+# Historical backfill: checkpoint file, concurrent kline pages and request pacing
+BACKFILL_STATE_PATH = os.getenv("BACKFILL_STATE_PATH", "data/backfill_state.json")
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "8"))
+BACKFILL_REQUESTS_PER_SECOND = float(os.getenv("BACKFILL_REQUESTS_PER_SECOND", "10"))
+
+# Binance request budgets shared by all collectors: request weight per minute
+# for the spot and futures APIs, and requests per 5 minutes for /futures/data.
+# Lower them to leave headroom for other clients on the same IP.
+BINANCE_SPOT_WEIGHT_LIMIT = int(os.getenv("BINANCE_SPOT_WEIGHT_LIMIT", "6000"))
+BINANCE_FUTURES_WEIGHT_LIMIT = int(os.getenv("BINANCE_FUTURES_WEIGHT_LIMIT", "2400"))
+BINANCE_FUTURES_DATA_LIMIT = int(os.getenv("BINANCE_FUTURES_DATA_LIMIT", "1000"))
+
+# Re-send a Binance request still unanswered after its endpoint's recent p95
+# latency and use whichever copy answers first (costs request weight per copy)
+BINANCE_HEDGE_REQUESTS = os.getenv("BINANCE_HEDGE_REQUESTS", "true").lower() == "true"
+
+# Latency budget (seconds) of each collector group per tick; a group still running
+# is written as nulls with its staleness flag set. 0 waits for every collector.
+# COLLECTOR_DEADLINES overrides single groups, e.g. "spot_klines=8,capital_flow=3"
+COLLECTOR_DEADLINE_SECONDS = float(os.getenv("COLLECTOR_DEADLINE_SECONDS", "5"))
+COLLECTOR_DEADLINES = {group.strip(): float(seconds) for group, seconds in
+                       (item.split("=") for item in os.getenv("COLLECTOR_DEADLINES", "").split(",") if item.strip())}
+
+# Worker processes computing the depth and kline features, and how many
+# pending calls flush at once (split across the workers); 0 workers computes
+# them on the event loop
+FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", "0"))
+FEATURE_BATCH_SIZE = int(os.getenv("FEATURE_BATCH_SIZE", "16"))
+
+# Live WebSocket feed: rows queued per client, and what happens to a client whose
+# queue is full ("drop_oldest" discards its oldest pending row, "disconnect" closes it)
+WEBSOCKET_QUEUE_SIZE = int(os.getenv("WEBSOCKET_QUEUE_SIZE", "100"))
+WEBSOCKET_SLOW_CONSUMER_POLICY = os.getenv("WEBSOCKET_SLOW_CONSUMER_POLICY", "drop_oldest").lower()
+
+# Follow trades incrementally (aggTrades from the last seen ID) and report rolling
+# statistics over this window, instead of re-reading the last 1000 trades each tick
+TRADE_TRACKER = os.getenv("TRADE_TRACKER", "true").lower() == "true"
+TRADE_WINDOW_SECONDS = float(os.getenv("TRADE_WINDOW_SECONDS", "60"))
+TRADE_MAX_PAGES = int(os.getenv("TRADE_MAX_PAGES", "10"))
+
+# Persisted Drive folder/spreadsheet IDs, re-checked against Drive in the background
+DRIVE_REGISTRY_PATH = os.getenv("DRIVE_REGISTRY_PATH", "data/drive_registry.json")
+DRIVE_REGISTRY_REFRESH_SECONDS = float(os.getenv("DRIVE_REGISTRY_REFRESH_SECONDS", str(6 * 60 * 60)))
+
+# Google Drive/Sheets requests in flight at once, and retries of quota (429) and
+# server errors (with jittered exponential backoff, honouring Retry-After)
+GOOGLE_MAX_CONCURRENCY = int(os.getenv("GOOGLE_MAX_CONCURRENCY", "10"))
+GOOGLE_MAX_RETRIES = int(os.getenv("GOOGLE_MAX_RETRIES", "5"))
+
+# Collect in process just after every kline close instead of on the external
+# /__space/v0/actions trigger; the offset gives the exchange time to close the bar
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_OFFSET_SECONDS = float(os.getenv("SCHEDULER_OFFSET_SECONDS", "1"))
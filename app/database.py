@@ -45,3 +45,15 @@ def get_data_collector(request: Request):
 
 def get_google_service(request: Request):
     return request.app.state.google_accessor
+
+
+def get_storage(request: Request):
+    return request.app.state.storage
+
+
+def get_backfill(request: Request):
+    return request.app.state.backfill
+
+
+def get_scheduler(request: Request):
+    return request.app.state.scheduler
@@ -1,13 +1,38 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
-from app.config import TAGS_METADATA
+from app.config import (TAGS_METADATA, LOCAL_ORDER_BOOK, STORAGE_BACKEND, SQLITE_PATH, SHEETS_MIRROR,
+                        SHEETS_FLUSH_ROWS, SHEETS_FLUSH_SECONDS, SHEETS_MAX_ATTEMPTS, SHEETS_RETRY_SECONDS,
+                        SHEETS_REJECTED_PATH, READ_CACHE_BYTES,
+                        BACKFILL_STATE_PATH, BACKFILL_CONCURRENCY, BACKFILL_REQUESTS_PER_SECOND,
+                        BINANCE_SPOT_WEIGHT_LIMIT, BINANCE_FUTURES_WEIGHT_LIMIT, BINANCE_FUTURES_DATA_LIMIT,
+                        BINANCE_HEDGE_REQUESTS, COLLECTOR_DEADLINE_SECONDS, COLLECTOR_DEADLINES,
+                        FEATURE_WORKERS, FEATURE_BATCH_SIZE, WEBSOCKET_QUEUE_SIZE, WEBSOCKET_SLOW_CONSUMER_POLICY,
+                        TRADE_TRACKER, TRADE_WINDOW_SECONDS, TRADE_MAX_PAGES,
+                        DRIVE_REGISTRY_PATH, DRIVE_REGISTRY_REFRESH_SECONDS, GOOGLE_MAX_CONCURRENCY, GOOGLE_MAX_RETRIES,
+                        SCHEDULER_ENABLED, SCHEDULER_OFFSET_SECONDS)
+from app.backfill import INTERVAL_MS, BackfillEngine
+from app.metrics import BINANCE_USED_WEIGHT, HTTP_SECONDS, SCHEDULER_LAG
 from app.pipeline import DataCollectorPipeline
-from app.scripts.google_http import GoogleAccessor
+from app.scheduler import TickScheduler
+from app.scripts.binance_http import BinanceHTTP
+from app.scripts.feature_pool import FeaturePool
+from app.scripts.order_book import OrderBookManager
+from app.scripts.rate_limiter import RateLimiter
+from app.scripts.trade_tracker import TradeTracker
+from app.scripts.google_async import AsyncGoogleAccessor
+from app.storage.base import MirroredStore
+from app.storage.cache import CachedStore
+from app.storage.drive_registry import DriveRegistry
+from app.storage.sheets import SheetsStore
+from app.storage.sqlite import SQLiteStore
+from app.webhook import WebSocketManager
 
 # Import routers
 from .routes import (
-    affecters, getters
+    affecters, getters, monitoring
 )
 
 # Declaring Server Lifespan
@@ -20,22 +45,99 @@ async def lifespan(app: FastAPI):
     # deta_collection = DetaCollection(PROJECT_KEY, BASE_NAME, DRIVE_NAME)
     # # making deta_collection available for all routes
     # app.state.deta_collection = deta_collection
-    # Google Service
-    google_accessor = GoogleAccessor()
+    symbols = ["BNBUSDT", "LINKUSDT"]
+    # Storage: local SQLite store, with Google Sheets as primary or optional mirror
+    use_sheets = STORAGE_BACKEND == "sheets" or SHEETS_MIRROR
+    # Pooled async Google client with retries, so Sheets calls never block the event loop
+    google_accessor = AsyncGoogleAccessor(max_concurrency=GOOGLE_MAX_CONCURRENCY,
+                                          max_retries=GOOGLE_MAX_RETRIES) if use_sheets else None
     app.state.google_accessor = google_accessor
+    # Drive IDs come from the persisted registry, so startup makes no Google requests
+    drive_registry = DriveRegistry(
+        google_accessor, DRIVE_REGISTRY_PATH) if use_sheets else None
+    registry_refresh = asyncio.create_task(drive_registry.refresh_forever(
+        DRIVE_REGISTRY_REFRESH_SECONDS)) if use_sheets else None
+    sheets_store = SheetsStore(google_accessor, drive_registry, SHEETS_FLUSH_ROWS,
+                               SHEETS_FLUSH_SECONDS, SHEETS_MAX_ATTEMPTS, SHEETS_RETRY_SECONDS,
+                               SHEETS_REJECTED_PATH) if use_sheets else None
+    if STORAGE_BACKEND == "sheets":
+        storage = sheets_store
+    else:
+        storage = SQLiteStore(SQLITE_PATH)
+        if sheets_store is not None:
+            storage = MirroredStore(storage, [sheets_store])
+    # Memory-budgeted read cache in front of the getters
+    if READ_CACHE_BYTES > 0:
+        storage = CachedStore(storage, READ_CACHE_BYTES)
+    app.state.storage = storage
+    # Pooled Binance HTTP clients shared by all collectors, within one request-weight budget
+    binance_http = BinanceHTTP(limiter=RateLimiter(BINANCE_SPOT_WEIGHT_LIMIT, BINANCE_FUTURES_WEIGHT_LIMIT,
+                                                   BINANCE_FUTURES_DATA_LIMIT),
+                               hedge=BINANCE_HEDGE_REQUESTS)
+    app.state.binance_http = binance_http
+    BINANCE_USED_WEIGHT.collect = lambda: {(name,): usage["used"]
+                                           for name, usage in binance_http.limiter.usage().items()}
+    # Local order books fed by the depth diff streams
+    order_books = OrderBookManager(
+        binance_http, symbols) if LOCAL_ORDER_BOOK else None
+    if order_books is not None:
+        order_books.start()
+    app.state.order_books = order_books
+    # Incremental trade ingestion with rolling statistics
+    app.state.trade_tracker = TradeTracker(binance_http, int(TRADE_WINDOW_SECONDS * 1000),
+                                           TRADE_MAX_PAGES) if TRADE_TRACKER else None
+    # Worker processes for the depth and kline features (0 keeps them on the event loop)
+    feature_pool = FeaturePool(
+        FEATURE_WORKERS, FEATURE_BATCH_SIZE) if FEATURE_WORKERS > 0 else None
+    if feature_pool is not None:
+        await feature_pool.warm_up()
+    app.state.feature_pool = feature_pool
+    # Live row broadcast to WebSocket subscribers
+    websocket_manager = WebSocketManager(
+        WEBSOCKET_QUEUE_SIZE, WEBSOCKET_SLOW_CONSUMER_POLICY)
+    app.state.websocket_manager = websocket_manager
     # Pipeline
-    data_collector = DataCollectorPipeline(
-        app, ["BNBUSDT", "LINKUSDT"])
+    data_collector = DataCollectorPipeline(app, symbols, deadline=COLLECTOR_DEADLINE_SECONDS,
+                                           deadlines=COLLECTOR_DEADLINES)
     # data_collector = DataCollectorPipeline(
     #     app, ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "SOLUSDT", "LINKUSDT", "DOGEUSDT"])
     # making data_collector available for all routes
     app.state.data_collector = data_collector
+    # Historical backfill; jobs interrupted by the last shutdown carry on
+    backfill = BackfillEngine(app, BACKFILL_STATE_PATH,
+                              BACKFILL_CONCURRENCY, BACKFILL_REQUESTS_PER_SECOND)
+    backfill.resume()
+    app.state.backfill = backfill
+    # Built-in collection clock, just after each kline close (replaces the external trigger)
+    scheduler = TickScheduler(data_collector, backfill, INTERVAL_MS[data_collector.interval],
+                              SCHEDULER_OFFSET_SECONDS) if SCHEDULER_ENABLED else None
+    if scheduler is not None:
+        scheduler.start()
+    app.state.scheduler = scheduler
+    if scheduler is not None:
+        SCHEDULER_LAG.collect = lambda: {(stage,): lag for stage, lag in
+                                         (("start", scheduler.last_start_lag), ("end", scheduler.last_end_lag))
+                                         if lag is not None}
     # # Start scraping exchange data
     # asyncio.create_task(data_collector.run())
     # print(">>> Data Collector API Started Successfully")
     yield
     # Tasks to execute when the application shuts down.
-    # Disconnect from Database Connection
+    if scheduler is not None:
+        await scheduler.stop()
+    await backfill.stop()
+    if registry_refresh is not None:
+        registry_refresh.cancel()
+    await websocket_manager.close()
+    # Write out buffered rows and disconnect from the storage backends
+    await storage.close()
+    if order_books is not None:
+        await order_books.stop()
+    await binance_http.close()
+    if google_accessor is not None:
+        await google_accessor.close()
+    if feature_pool is not None:
+        feature_pool.close()
     # print(">>> Data Collector API ShutDown Successfully")
 
 
@@ -45,3 +147,15 @@ app = FastAPI(lifespan=lifespan, openapi_tags=TAGS_METADATA)
 # Include routers
 app.include_router(affecters.router)
 app.include_router(getters.router)
+app.include_router(monitoring.router)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Labelled by route template, so path parameters don't multiply the series
+    route = request.scope.get("route")
+    HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                         path=route.path if route is not None else "unmatched")
+    return response
@@ -0,0 +1,191 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds, from a single cached read to a slow Sheets call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        # Safe to record from worker threads as well as the event loop
+        self.lock = threading.Lock()
+
+    def key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Gauge read at scrape time from ``collect``, which returns ``{label values: value}``."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        values = self.collect() if self.collect is not None else {}
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.values[key] = [counts, total + value]
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="' + format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline
+COLLECTOR_SECONDS = REGISTRY.register(Histogram(
+    "collector_duration_seconds", "Duration of each collector call in a tick.", ("collector", "trade")))
+COLLECTOR_ERRORS = REGISTRY.register(Counter(
+    "collector_errors_total", "Collector calls that raised or returned no data.", ("collector", "trade")))
+COLLECTOR_DEADLINE_MISSES = REGISTRY.register(Counter(
+    "collector_deadline_misses_total", "Collector calls cut off at their deadline.", ("collector", "trade")))
+SCHEMA_MISMATCHES = REGISTRY.register(Counter(
+    "row_schema_mismatches_total", "Collector results whose fields differ from the row schema's columns.", ("group",)))
+TICK_SECONDS = REGISTRY.register(Histogram(
+    "tick_duration_seconds", "Duration of a symbol's whole tick: collection and storage.", ("symbol",)))
+TICK_ERRORS = REGISTRY.register(Counter(
+    "tick_errors_total", "Symbol ticks that failed.", ("symbol",)))
+SCHEDULER_LAG = REGISTRY.register(Gauge(
+    "scheduler_lag_seconds", "Seconds from the kline close to the start and end of the last scheduled run.",
+    ("stage",)))
+
+# Binance
+BINANCE_SECONDS = REGISTRY.register(Histogram(
+    "binance_request_duration_seconds", "Binance REST request latency, excluding rate-limit waits.", ("endpoint",)))
+BINANCE_RESPONSES = REGISTRY.register(Counter(
+    "binance_responses_total", "Binance REST responses by status (\"error\" for transport failures).",
+    ("endpoint", "status")))
+BINANCE_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "binance_response_bytes", "Binance REST response payload size.", ("endpoint",), SIZE_BUCKETS))
+BINANCE_WEIGHT = REGISTRY.register(Counter(
+    "binance_request_weight_total", "Request weight spent, per rate-limit bucket.", ("bucket",)))
+BINANCE_LIMITER_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "binance_rate_limit_wait_seconds", "Time requests waited for request weight.", ("bucket",)))
+BINANCE_HEDGES = REGISTRY.register(Counter(
+    "binance_hedged_requests_total", "Requests re-sent after outlasting their endpoint's recent p95.", ("endpoint",)))
+BINANCE_USED_WEIGHT = REGISTRY.register(Gauge(
+    "binance_used_weight", "Request weight used in the current rate-limit window.", ("bucket",)))
+
+# Google
+GOOGLE_SECONDS = REGISTRY.register(Histogram(
+    "google_request_duration_seconds", "Google Drive/Sheets request latency, including retries.", ("operation",)))
+GOOGLE_RESPONSES = REGISTRY.register(Counter(
+    "google_responses_total", "Google Drive/Sheets responses by status (\"error\" for transport failures).",
+    ("operation", "status")))
+GOOGLE_PAYLOAD_BYTES = REGISTRY.register(Histogram(
+    "google_payload_bytes", "Google request plus response body size.", ("operation",), SIZE_BUCKETS))
+
+# API
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "API request latency up to the response start.", ("method", "path")))
+
+
+@asynccontextmanager
+async def timed(histogram: Histogram, errors: Optional[Counter] = None, **labels):
+    """Observe the block's duration; count it in ``errors`` if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
@@ -1,82 +1,146 @@
 import asyncio
+import time
 from collections import OrderedDict
-from typing import Literal, List
+from typing import Any, Dict, Literal, List, Optional, Tuple
 
-from app.scripts.data_collectors import get_klines, get_cfd, get_mdd, get_recent_trades, get_traders_stat
+import numpy as np
+
+from app.backfill import INTERVAL_MS
+from app.metrics import (COLLECTOR_DEADLINE_MISSES, COLLECTOR_ERRORS, COLLECTOR_SECONDS, TICK_ERRORS, TICK_SECONDS,
+                         timed)
+from app.schema import COLLECTED_GROUPS, ROW_SCHEMA, stale_column
+from app.scripts.data_collectors import (CALENDAR_FIELDS, calendar_columns, get_klines, get_cfd, get_mdd,
+                                         get_recent_trades, get_traders_stat)
+from app.storage.base import SHEET_NAMES
+
+
+class CollectionError(RuntimeError):
+    """Some symbols of a run failed; the rows of the others were written."""
+
+    def __init__(self, symbols: List[str], total: int) -> None:
+        super().__init__(f"{len(symbols)} of {total} symbols failed")
+        self.symbols = symbols
 
 
 class DataCollectorPipeline:
-    SHEET_NAMES = ["January", "February", "March", "April", "May", "June",
-                   "July", "August", "September", "October", "November", "December"]
+    SHEET_NAMES = SHEET_NAMES
 
     def __init__(self, app, symbols: List[str], interval: Literal["1m", "3m", "5m", "15m", "30m", "1h", "2h",
-                                                                  "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"] = "1m") -> None:
+                                                                  "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"] = "1m",
+                 deadline: Optional[float] = None, deadlines: Optional[Dict[str, float]] = None) -> None:
         self.app = app
         self.symbols = symbols
         self.interval = interval
-        self.symbol_folder_ids = {}
-
-        # Initialization
-        # Create main folder (Crypto Exchange, only binance for now)
-        binance_folder_id = app.state.google_accessor.create_or_get_folder(
-            "Binance")
-        # Create all the folders for the symbols
-        for symbol in symbols:
-            self.symbol_folder_ids[symbol] = app.state.google_accessor.create_or_get_folder(
-                symbol, binance_folder_id)
-
-    async def tasks(self, symbol) -> dict:
-        # 1. Extracting Klines
-        spot_klines = get_klines(symbol, interval=self.interval)
-        future_klines = get_klines(symbol, "future", interval=self.interval)
-        klines = {**spot_klines[0], **future_klines[0]}
-
-        # 2. Extracting Capital Flow Data
-        capital_flow = get_cfd(symbol)
-
-        # 3. Extracting Market Depth
-        spot_market_depth = get_mdd(symbol)
-        future_market_depth = get_mdd(symbol, "future")
-        market_depth = {**spot_market_depth, **future_market_depth}
-
-        # 4. Traders Statistics
-        top_accounts = get_traders_stat(symbol, "topAccounts")
-        top_positions = get_traders_stat(symbol, "topPositions")
-        global_accounts = get_traders_stat(symbol, "globalAccounts")
-        traders_stat = {**top_accounts, **top_positions, **global_accounts}
-
-        # 5. Recent Trades
-        spot_recent_trades = get_recent_trades(symbol)
-        future_recent_trades = get_recent_trades(symbol, "future")
-        recent_trades = {**spot_recent_trades, **future_recent_trades}
-
-        # Combining all data
-        data = {**klines, **capital_flow, **market_depth,
-                **traders_stat, **recent_trades}
-
-        return data
+        # Latency budget (seconds) of each collected group; None or 0 waits for the collector
+        deadlines = deadlines or {}
+        unknown = set(deadlines) - set(COLLECTED_GROUPS)
+        if unknown:
+            raise ValueError(f"Unknown collector groups: {', '.join(sorted(unknown))}")
+        self.deadlines = {group: deadlines.get(group, deadline) or None for group in COLLECTED_GROUPS}
+
+    async def measure(self, collector: str, trade: str, call, deadline: Optional[float] = None,
+                      symbol: str = "") -> Tuple[Any, bool]:
+        # Latency and failures (None results included) of one collector call;
+        # a call still running at its deadline is cancelled and reported stale
+        try:
+            async with timed(COLLECTOR_SECONDS, COLLECTOR_ERRORS, collector=collector, trade=trade):
+                result = await asyncio.wait_for(call, deadline)
+        except asyncio.TimeoutError:
+            COLLECTOR_DEADLINE_MISSES.inc(collector=collector, trade=trade)
+            return None, True
+        except Exception as e:
+            # Already counted in COLLECTOR_ERRORS by timed(); an unexpected payload only
+            # empties this collector's columns instead of failing the symbol's row
+            print(f"{collector} ({trade}) collector for {symbol} failed:", repr(e))
+            return None, False
+        if result is None:
+            COLLECTOR_ERRORS.inc(collector=collector, trade=trade)
+        return result, False
+
+    async def tasks(self, symbol, bar_close: Optional[int] = None) -> dict:
+        http = self.app.state.binance_http
+        order_books = self.app.state.order_books
+        # Feature computation runs on the worker processes when a pool is configured
+        pool = self.app.state.feature_pool
+        trade_tracker = self.app.state.trade_tracker
+        # With a bar close time (epoch ms), the klines are those of the bar that just closed
+        end_time = bar_close - 1 if bar_close is not None else None
+        # Row group, collector and market of each call
+        calls = [
+            # 1. Extracting Klines
+            ("spot_klines", "klines", "spot",
+             get_klines(http, symbol, interval=self.interval, end_time=end_time, pool=pool)),
+            ("future_klines", "klines", "future",
+             get_klines(http, symbol, "future", interval=self.interval, end_time=end_time, pool=pool)),
+            # 2. Extracting Capital Flow Data
+            ("capital_flow", "capital_flow", "spot", get_cfd(http, symbol)),
+            # 3. Extracting Market Depth
+            ("spot_market_depth", "market_depth", "spot",
+             get_mdd(http, symbol, order_books=order_books, pool=pool)),
+            ("future_market_depth", "market_depth", "future",
+             get_mdd(http, symbol, "future", order_books=order_books, pool=pool)),
+            # 4. Traders Statistics
+            ("top_accounts", "top_accounts", "future", get_traders_stat(http, symbol, "topAccounts")),
+            ("top_positions", "top_positions", "future", get_traders_stat(http, symbol, "topPositions")),
+            ("global_accounts", "global_accounts", "future", get_traders_stat(http, symbol, "globalAccounts")),
+            # 5. Recent Trades
+            ("spot_recent_trades", "recent_trades", "spot",
+             get_recent_trades(http, symbol, trade_tracker=trade_tracker)),
+            ("future_recent_trades", "recent_trades", "future",
+             get_recent_trades(http, symbol, "future", trade_tracker=trade_tracker)),
+        ]
+        # All collector requests for the symbol go out concurrently over the pooled clients,
+        # each bounded by its group's deadline, so one slow endpoint can't hold up the row
+        results = await asyncio.gather(*[self.measure(collector, trade, call, self.deadlines[group], symbol)
+                                         for group, collector, trade, call in calls])
+        values = {group: result for (group, *_), (result, _) in zip(calls, results)}
+        stale = {group: missed for (group, *_), (_, missed) in zip(calls, results)}
+        # Live ticks collect a single kline per market
+        for group in ("spot_klines", "future_klines"):
+            values[group] = values[group][0] if values[group] else None
+
+        # Each collector fills its own slots; a collector that failed or missed its deadline leaves NaN
+        row = ROW_SCHEMA.new_row()
+        # The bar's calendar is known even when neither market's klines came back
+        row.fill("calendar", values["spot_klines"] or values["future_klines"] or self.calendar(bar_close))
+        for group in COLLECTED_GROUPS:
+            row.fill(group, values[group])
+        row.fill("staleness", {stale_column(group): int(missed) for group, missed in stale.items()})
+
+        return row.as_dict()
+
+    def calendar(self, bar_close: Optional[int] = None) -> dict:
+        interval_ms = INTERVAL_MS[self.interval]
+        # Open time of the collected bar: the one closing at bar_close, else the current one
+        if bar_close is not None:
+            open_time = bar_close - interval_ms
+        else:
+            open_time = int(time.time() * 1000) // interval_ms * interval_ms
+        columns = calendar_columns(np.array([open_time]))
+        return {field: column[0].item() for field, column in zip(CALENDAR_FIELDS, columns)}
 
     async def insert_to_db(self, symbol, data):
-        # Create or Get Reference of spreadsheet (by year)
-        spreadsheet_id = self.app.state.google_accessor.create_or_get_spreadsheet_in_folder(data['year'],
-                                                                                            self.symbol_folder_ids[symbol],
-                                                                                            tuple(
-                                                                                                DataCollectorPipeline.SHEET_NAMES),
-                                                                                            tuple(data.keys()))
-        # Call append data on the spreadsheet
-        self.app.state.google_accessor.add_row_data(
-            spreadsheet_id,
-            DataCollectorPipeline.SHEET_NAMES[data['month'] - 1],
-            [list(data.values())])
-
-    async def handle_symbol(self, symbol):
-        data = await self.tasks(symbol)
-        await self.insert_to_db(symbol, data)
-
-    async def run(self):
+        await self.app.state.storage.write_row(symbol, data)
+
+    async def handle_symbol(self, symbol, bar_close: Optional[int] = None):
+        async with timed(TICK_SECONDS, TICK_ERRORS, symbol=symbol):
+            data = await self.tasks(symbol, bar_close)
+            await self.insert_to_db(symbol, data)
+        # Push the row to the live WebSocket subscribers
+        self.app.state.websocket_manager.publish(symbol, data)
+
+    async def run(self, bar_close: Optional[int] = None):
         try:
-            tasks = [self.handle_symbol(symbol) for symbol in self.symbols]
-            await asyncio.gather(*tasks)
+            tasks = [self.handle_symbol(symbol, bar_close) for symbol in self.symbols]
+            # One failing symbol must not end the run while the others are still collecting
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            failures = [(symbol, result) for symbol, result in zip(self.symbols, results)
+                        if isinstance(result, Exception)]
+            for symbol, error in failures:
+                print(f"Collecting {symbol} failed:", repr(error))
+            await self.app.state.storage.maybe_flush()
+            if failures:
+                raise CollectionError([symbol for symbol, _ in failures], len(self.symbols))
         except KeyboardInterrupt:
             print("Task Interrupted\nStopping Data Collection ...")
             exit(0)
@@ -1,16 +1,57 @@
 import asyncio
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from app.database import get_data_collector
+from fastapi import APIRouter, Depends, Query
+from app.database import get_backfill, get_data_collector, get_scheduler
+from app.routes.utils import epoch_ms
 
 router = APIRouter(tags=["Affecters"])
 
 
 @router.post("/__space/v0/actions")
-async def collect_data(event: dict, data_collector=Depends(get_data_collector)):
+async def collect_data(event: dict, data_collector=Depends(get_data_collector), scheduler=Depends(get_scheduler)):
     try:
         print(event)
+        if scheduler is not None:
+            # The built-in scheduler already collects every interval
+            return {"message": "Data Collected by Scheduler"}
         asyncio.create_task(data_collector.run())
         return {"message": "Data Collected Successfully"}
     except Exception as e:
         return {"message": "Failed to Collect Data", "error": str(e)}
+
+
+@router.post("/backfill")
+async def start_backfill(start: datetime, end: Optional[datetime] = None, symbols: Optional[List[str]] = Query(None),
+                         backfill=Depends(get_backfill), data_collector=Depends(get_data_collector)):
+    try:
+        # Defaults to every collected symbol up to now
+        symbols = symbols or data_collector.symbols
+        unknown = [symbol for symbol in symbols if symbol not in data_collector.symbols]
+        if unknown:
+            raise ValueError(f"Unknown symbols: {', '.join(unknown)}")
+        start_ts = epoch_ms(start)
+        end_ts = epoch_ms(end or datetime.utcnow())
+        if end_ts <= start_ts:
+            raise ValueError("end must be after start")
+
+        jobs, busy = backfill.start(symbols, start_ts, end_ts, data_collector.interval)
+        if not jobs:
+            return {"message": "Backfill Already Running", "busy": busy}
+        # Symbols whose job is still running are left out; retry them once it finishes
+        return {"message": "Backfill Started", "jobs": jobs, "busy": busy}
+    except Exception as e:
+        return {"message": "Failed to Start Backfill", "error": str(e)}
+
+
+@router.get("/backfill")
+async def get_backfill_status(backfill=Depends(get_backfill)):
+    return {"message": "success", "jobs": backfill.status()}
+
+
+@router.get("/scheduler")
+async def get_scheduler_status(scheduler=Depends(get_scheduler)):
+    if scheduler is None:
+        return {"message": "failed", "error": "Scheduler is disabled"}
+    return {"message": "success", "scheduler": scheduler.status()}
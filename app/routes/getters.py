@@ -1,43 +1,110 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from importlib.util import find_spec
+from typing import List, Literal, Optional
 
-from app.database import get_google_service, get_data_collector
-from app.pipeline import DataCollectorPipeline
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.database import get_storage, get_data_collector
+from app.routes.utils import STREAM_ENCODERS, STREAM_MEDIA_TYPES, epoch_ms, prefetch
+from app.serialization import FastJSONResponse
+from app.webhook import get_websocket
 
 router = APIRouter(tags=["Getters"], prefix="/query")
 
+ResponseFormat = Literal["json", "ndjson", "csv", "arrow"]
+Granularity = Literal["1m", "5m", "1h", "1d", "1w"]
+
+
+def stream_response(chunks, response_format: str, filename: str):
+    return StreamingResponse(STREAM_ENCODERS[response_format](chunks),
+                             media_type=STREAM_MEDIA_TYPES[response_format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{response_format}"'})
+
 
 @router.post("/month")
-async def get_month_data(year: int, month: int, symbol: str, google_accessor=Depends(get_google_service), data_collector=Depends(get_data_collector)):
+async def get_month_data(year: int, month: int, symbol: str, granularity: Granularity = "1m",
+                         response_format: ResponseFormat = Query("json", alias="format"),
+                         storage=Depends(get_storage), data_collector=Depends(get_data_collector)):
     try:
-        if symbol in data_collector.symbol_folder_ids.keys():
-            # Retrieve spreadsheet_id
-            spreadsheet_id = google_accessor.create_or_get_spreadsheet_in_folder(year,
-                                                                                 data_collector.symbol_folder_ids[symbol],
-                                                                                 tuple(
-                                                                                     []),
-                                                                                 tuple([]))
-            data = google_accessor.retrieve_sheet_data(
-                spreadsheet_id, DataCollectorPipeline.SHEET_NAMES[month - 1])
-
-            return {"message": "success", "data": data}
+        if symbol in data_collector.symbols:
+            if response_format == "arrow" and find_spec("pyarrow") is None:
+                raise RuntimeError("Arrow output requires pyarrow to be installed.")
+            if response_format != "json":
+                # Streamed chunk by chunk from storage
+                chunks = await prefetch(storage.stream_month(symbol, year, month, granularity=granularity))
+                return stream_response(chunks, response_format, f"{symbol}_{year}_{month:02d}_{granularity}")
+
+            data = await storage.read_month(symbol, year, month, granularity)
+
+            return FastJSONResponse({"message": "success", "data": data})
 
     except Exception as e:
         return {'message': 'failed', 'error': str(e)}
 
 
 @router.post("/year")
-async def get_year_data(year: int, symbol: str, google_accessor=Depends(get_google_service), data_collector=Depends(get_data_collector)):
+async def get_year_data(year: int, symbol: str, granularity: Granularity = "1m",
+                        response_format: ResponseFormat = Query("json", alias="format"),
+                        storage=Depends(get_storage), data_collector=Depends(get_data_collector)):
     try:
-        if symbol in data_collector.symbol_folder_ids.keys():
-            # Retrieve spreadsheet_id
-            spreadsheet_id = google_accessor.create_or_get_spreadsheet_in_folder(year,
-                                                                                 data_collector.symbol_folder_ids[symbol],
-                                                                                 tuple(
-                                                                                     []),
-                                                                                 tuple([]))
-            data = google_accessor.retrieve_spreadsheet_data(spreadsheet_id)
+        if symbol in data_collector.symbols:
+            if response_format == "arrow" and find_spec("pyarrow") is None:
+                raise RuntimeError("Arrow output requires pyarrow to be installed.")
+            if response_format != "json":
+                # Streamed chunk by chunk from storage
+                chunks = await prefetch(storage.stream_year(symbol, year, granularity=granularity))
+                return stream_response(chunks, response_format, f"{symbol}_{year}_{granularity}")
+
+            data = await storage.read_year(symbol, year, granularity)
 
-            return {"message": "success", "data": data}
+            return FastJSONResponse({"message": "success", "data": data})
 
     except Exception as e:
         return {'message': 'failed', 'error': str(e)}
+
+
+@router.post("/range")
+async def get_range_data(symbol: str, start: datetime, end: datetime, columns: Optional[List[str]] = Query(None),
+                         granularity: Granularity = "1m",
+                         response_format: ResponseFormat = Query("json", alias="format"),
+                         storage=Depends(get_storage), data_collector=Depends(get_data_collector)):
+    try:
+        if symbol in data_collector.symbols:
+            if response_format == "arrow" and find_spec("pyarrow") is None:
+                raise RuntimeError("Arrow output requires pyarrow to be installed.")
+            start_ts, end_ts = epoch_ms(start), epoch_ms(end)
+            if end_ts <= start_ts:
+                raise ValueError("end must be after start.")
+            chunks = storage.stream_range(symbol, start_ts, end_ts, columns, granularity=granularity)
+            if response_format != "json":
+                return stream_response(await prefetch(chunks), response_format,
+                                       f"{symbol}_{start_ts}_{end_ts}_{granularity}")
+
+            data = [row async for chunk in chunks for row in chunk]
+
+            return FastJSONResponse({"message": "success", "data": data})
+
+    except Exception as e:
+        return {'message': 'failed', 'error': str(e)}
+
+
+@router.websocket("/live")
+async def live_rows(websocket: WebSocket, symbols: Optional[List[str]] = Query(None),
+                    columns: Optional[List[str]] = Query(None), websocket_manager=Depends(get_websocket)):
+    # Rows are pushed as {"symbol": ..., "data": {...}} as soon as they are collected
+    data_collector = websocket.app.state.data_collector
+    unknown = [symbol for symbol in symbols or [] if symbol not in data_collector.symbols]
+    if unknown:
+        await websocket.close(code=1008, reason=f"Unknown symbols: {', '.join(unknown)}")
+        return
+
+    subscriber = await websocket_manager.connect(websocket, symbols, columns)
+    try:
+        # Nothing is expected from the client; this only waits for it to go away
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await websocket_manager.disconnect(subscriber)
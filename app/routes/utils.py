@@ -1,4 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import AsyncIterator
+import csv
+import io
+
+from app.serialization import dumps
 # from requests import exceptions
 # from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
@@ -15,3 +20,103 @@ def get_time_formatted():
     time = datetime.utcnow()
 
     return {"year": time.year, "month": time.month, "day": time.day, "hour": time.hour, "min": time.minute}
+
+
+def epoch_ms(value: datetime) -> int:
+    # Naive datetimes are taken as UTC, like the stored rows
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+async def prefetch(chunks: AsyncIterator[list]) -> AsyncIterator[list]:
+    # Pull the first chunk now, so errors like unknown columns are raised before
+    # the response (and its 200 status) has started; the chunks are replayed unchanged
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def replay():
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return replay()
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+async def encode_ndjson(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    header = None
+    async for chunk in chunks:
+        if header is None:
+            header, chunk = chunk[0], chunk[1:]
+        if chunk:
+            yield b"".join(dumps(dict(zip(header, row))) + b"\n" for row in chunk)
+
+
+async def encode_csv(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    async for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def arrow_type(values):
+    import pyarrow as pa
+
+    for value in values:
+        if isinstance(value, bool):
+            return pa.bool_()
+        if isinstance(value, (int, float)):
+            return pa.float64()
+        if value is not None:
+            return pa.string()
+    return pa.float64()
+
+
+async def encode_arrow(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    header = schema = writer = None
+    async for chunk in chunks:
+        if header is None:
+            header, chunk = chunk[0], chunk[1:]
+        if not chunk:
+            continue
+        # Sheets trims trailing empty cells, so rows can be shorter than the header
+        columns = list(zip(*[row + [None] * (len(header) - len(row)) for row in chunk]))
+        if schema is None:
+            # Column types are fixed by the first chunk; numbers are widened to float64
+            schema = pa.schema([(name, arrow_type(column)) for name, column in zip(header, columns)])
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_batch(pa.record_batch(
+            [pa.array(column, type=field.type, from_pandas=True) for column, field in zip(columns, schema)],
+            schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+
+    if writer is None:
+        schema = pa.schema([(name, pa.float64()) for name in header or []])
+        writer = pa.ipc.new_stream(sink, schema)
+    writer.close()
+    yield sink.getvalue()
+
+
+STREAM_ENCODERS = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+    "arrow": encode_arrow,
+}
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from app.backfill import job_key
+from app.pipeline import CollectionError
+
+
+class TickScheduler:
+    """Runs the collector just after every interval boundary, in process.
+
+    Each wait is computed from the wall clock, so ticks don't drift. A tick
+    that comes due while the previous one is still running is skipped, and
+    bars that no tick covered (skips, failures, a stalled loop) are handed
+    to the backfill engine to fill their klines; while a symbol's backfill job
+    is still running its gap is kept and offered again. Progress is kept per symbol,
+    so a tick in which a few symbols failed only catches those up. Lag is
+    measured from the boundary to the start and the end of each run.
+    """
+
+    def __init__(self, data_collector, backfill, interval_ms: int, offset: float = 1.0) -> None:
+        self.data_collector = data_collector
+        self.backfill = backfill
+        self.interval_ms = interval_ms
+        self.offset = offset
+        self.task: Optional[asyncio.Task] = None
+        self.current: Optional[asyncio.Task] = None
+        # Open time of the last bar collected successfully, per symbol
+        self.last_bars: Dict[str, int] = {}
+        self.ticks = 0
+        self.skipped = 0
+        self.failed = 0
+        self.caught_up_bars = 0
+        self.last_start_lag: Optional[float] = None
+        self.last_end_lag: Optional[float] = None
+        self.max_end_lag = 0.0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        tasks = [task for task in (self.task, self.current) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_forever(self):
+        while True:
+            now = time.time() * 1000
+            boundary = int(now // self.interval_ms + 1) * self.interval_ms
+            # Exchanges need a moment after the boundary to close the bar
+            await asyncio.sleep((boundary - now) / 1000 + self.offset)
+            self.tick(boundary)
+
+    def tick(self, boundary: int):
+        if self.current is not None and not self.current.done():
+            # Overlapping runs would race on the same rows; the bar is caught up later
+            self.skipped += 1
+            print(f"Tick at {boundary} skipped: previous run still in progress")
+            return
+        self.catch_up(boundary - self.interval_ms)
+        self.current = asyncio.create_task(self.run_tick(boundary))
+
+    def catch_up(self, bar: int):
+        if self.backfill is None:
+            return
+        # Symbols behind by the same bars share one backfill range
+        gaps: Dict[int, List[str]] = {}
+        for symbol in self.data_collector.symbols:
+            last_bar = self.last_bars.get(symbol)
+            if last_bar is not None and bar - last_bar > self.interval_ms:
+                gaps.setdefault(last_bar + self.interval_ms, []).append(symbol)
+        interval = self.data_collector.interval
+        for start, symbols in gaps.items():
+            bars = (bar - start) // self.interval_ms
+            started, _ = self.backfill.start(symbols, start, bar, interval)
+            started = set(started)
+            # Counted as covered once a job took them (a failed backfill shows up in its own job
+            # status); symbols whose backfill is still busy keep their gap for a later tick
+            caught_up = [symbol for symbol in symbols if job_key(symbol, interval) in started]
+            if len(caught_up) < len(symbols):
+                print(f"Backfill busy for {len(symbols) - len(caught_up)} symbols; catching up later")
+            if caught_up:
+                print(f"Catching up {bars} missed bars from {start} for {len(caught_up)} symbols")
+            self.caught_up_bars += bars * len(caught_up)
+            for symbol in caught_up:
+                self.last_bars[symbol] = bar - self.interval_ms
+
+    async def run_tick(self, boundary: int):
+        self.ticks += 1
+        self.last_start_lag = time.time() - boundary / 1000
+        symbols = list(self.data_collector.symbols)
+        failed = set()
+        try:
+            # Collect the bar that just closed at the boundary
+            await self.data_collector.run(boundary)
+        except CollectionError as e:
+            # The other symbols' rows were written
+            self.failed += 1
+            failed = set(e.symbols)
+            print(f"Tick at {boundary} failed for {len(failed)} symbols:", repr(e))
+        except Exception as e:
+            self.failed += 1
+            failed = set(symbols)
+            print(f"Tick at {boundary} failed:", repr(e))
+        bar = boundary - self.interval_ms
+        for symbol in symbols:
+            last_bar = self.last_bars.get(symbol)
+            # A symbol with an uncovered gap before this bar stays put, so the gap is retried
+            if symbol not in failed and (last_bar is None or self.backfill is None
+                                         or last_bar >= bar - self.interval_ms):
+                self.last_bars[symbol] = bar
+        self.last_end_lag = time.time() - boundary / 1000
+        self.max_end_lag = max(self.max_end_lag, self.last_end_lag)
+
+    def status(self) -> dict:
+        return {"running": self.task is not None and not self.task.done(),
+                "interval_ms": self.interval_ms,
+                # Oldest per-symbol progress: every symbol is collected up to here
+                "last_bar": min(self.last_bars.values()) if self.last_bars else None, "ticks": self.ticks,
+                "skipped": self.skipped, "failed": self.failed, "caught_up_bars": self.caught_up_bars,
+                "last_start_lag": self.last_start_lag, "last_end_lag": self.last_end_lag,
+                "max_end_lag": self.max_end_lag}
@@ -0,0 +1,108 @@
+import math
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.metrics import SCHEMA_MISMATCHES
+from app.scripts.data_collectors import (CALENDAR_FIELDS, CAPITAL_FLOW_FIELDS, KLINE_FIELDS,
+                                         TRADERS_STAT_FIELDS)
+from app.scripts.order_book_features import DEPTH_FEATURE_FIELDS
+from app.scripts.trade_features import TRADE_FEATURE_FIELDS
+
+MISSING = math.nan
+
+
+class RowSchema:
+    """Declared, versioned layout of a collected row: named column groups in a fixed order.
+
+    Each group is filled from one collector's output into its own slots of a
+    preallocated row, so the column order never depends on which collectors
+    answered; a group that returned nothing stays ``NaN``.
+    """
+
+    def __init__(self, version: int, groups: Sequence[Tuple[str, Sequence[str]]]) -> None:
+        self.version = version
+        self.groups: Dict[str, Tuple[str, ...]] = {}
+        self.slots: Dict[str, slice] = {}
+        columns: List[str] = []
+        for name, group_columns in groups:
+            self.groups[name] = tuple(group_columns)
+            self.slots[name] = slice(len(columns), len(columns) + len(group_columns))
+            columns.extend(group_columns)
+        self.columns = tuple(columns)
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError(f"Row schema v{version} declares a column twice")
+        self.column_set = set(self.columns)
+        # Undeclared keys already reported, so each is only printed once
+        self.undeclared: Set[str] = set()
+
+    def mismatch(self, group: str, data: dict) -> Tuple[Set[str], List[str]]:
+        """Keys of ``data`` outside the schema, and the columns of ``group`` it lacks."""
+        return data.keys() - self.column_set, [column for column in self.groups[group] if column not in data]
+
+    def new_row(self) -> "Row":
+        return Row(self)
+
+
+class Row:
+    """One row of a ``RowSchema``, backed by a flat list of slot values."""
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema: RowSchema) -> None:
+        self.schema = schema
+        self.values = [MISSING] * len(schema.columns)
+
+    def fill(self, group: str, data: Optional[dict]):
+        if not data:
+            return
+        schema = self.schema
+        columns = schema.groups[group]
+        if tuple(data) == columns:
+            self.values[schema.slots[group]] = data.values()
+        else:
+            self.values[schema.slots[group]] = [data.get(column, MISSING) for column in columns]
+            undeclared, missing = schema.mismatch(group, data)
+            if undeclared or missing:
+                # Renamed or new upstream fields; counted every time so it can be alerted on
+                SCHEMA_MISMATCHES.inc(group=group)
+            for key in undeclared - schema.undeclared:
+                schema.undeclared.add(key)
+                print(f"Column {key} from {group} is not in row schema v{schema.version}; dropped")
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.schema.columns, self.values))
+
+
+def market_columns(trade: str, fields: Sequence[str]) -> List[str]:
+    return [f"{trade}{field}" for field in fields]
+
+
+def stale_column(group: str) -> str:
+    # spot_klines -> spotKlinesStale
+    head, *rest = group.split("_")
+    return head + "".join(word.capitalize() for word in rest) + "Stale"
+
+
+V1_GROUPS = [
+    ("spot_klines", market_columns("spot", KLINE_FIELDS)),
+    ("calendar", CALENDAR_FIELDS),
+    ("future_klines", market_columns("future", KLINE_FIELDS)),
+    ("capital_flow", CAPITAL_FLOW_FIELDS),
+    ("spot_market_depth", market_columns("spot", DEPTH_FEATURE_FIELDS)),
+    ("future_market_depth", market_columns("future", DEPTH_FEATURE_FIELDS)),
+    ("top_accounts", market_columns("topAccounts", TRADERS_STAT_FIELDS)),
+    ("top_positions", market_columns("topPositions", TRADERS_STAT_FIELDS)),
+    ("global_accounts", market_columns("globalAccounts", TRADERS_STAT_FIELDS)),
+    ("spot_recent_trades", market_columns("spot", TRADE_FEATURE_FIELDS)),
+    ("future_recent_trades", market_columns("future", TRADE_FEATURE_FIELDS)),
+]
+# Groups filled by a collector call, each of which can miss its deadline
+COLLECTED_GROUPS = [name for name, _ in V1_GROUPS if name != "calendar"]
+
+ROW_SCHEMAS = {
+    1: RowSchema(1, V1_GROUPS),
+    # v2: a 0/1 flag per collected group, set when the group missed its deadline;
+    # appended last so the v1 columns keep their positions
+    2: RowSchema(2, V1_GROUPS + [("staleness", [stale_column(group) for group in COLLECTED_GROUPS])]),
+}
+SCHEMA_VERSION = max(ROW_SCHEMAS)
+ROW_SCHEMA = ROW_SCHEMAS[SCHEMA_VERSION]
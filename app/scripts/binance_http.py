@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import httpx
+
+from app.metrics import (BINANCE_HEDGES, BINANCE_LIMITER_WAIT_SECONDS, BINANCE_RESPONSE_BYTES, BINANCE_RESPONSES,
+                         BINANCE_SECONDS, BINANCE_WEIGHT)
+from app.scripts.rate_limiter import RateLimiter
+
+SPOT_HOST = "https://www.binance.com"
+FUTURES_HOST = "https://fapi.binance.com"
+
+
+class RecentLatencies:
+    """The last ``size`` successful request latencies of one endpoint."""
+
+    def __init__(self, size: int = 100) -> None:
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[int(q * (len(ordered) - 1))]
+
+
+def latency_key(path: str, params: Optional[dict] = None) -> str:
+    # The limit sets the response size (and weight), so it gets its own latencies
+    limit = (params or {}).get("limit")
+    return path if limit is None else f"{path}?limit={limit}"
+
+
+class BinanceHTTP:
+    """Pooled keep-alive HTTP clients for the Binance hosts used by the collectors.
+
+    One ``httpx.AsyncClient`` is created lazily per host and reused for every
+    request, so concurrent collector calls share warm TLS connections instead of
+    opening a new one each time. Every request first takes its weight from the
+    shared ``RateLimiter``, so all collectors together stay inside Binance's
+    per-minute budgets. Requests beyond ``max_connections`` per host queue on a
+    semaphore rather than in the connection pool, whose wait counts against the
+    timeout and gets slow with thousands of waiters. ``hosts`` redirects a
+    Binance host to another base URL (e.g. a local stand-in for load tests).
+
+    With ``hedge``, a request still unanswered after its endpoint's recent p95
+    latency (counted from when it got its weight and a connection slot, and kept
+    per ``limit`` since that sets the response size) is sent a second time and whichever answers first is used; the
+    duplicate costs request weight like any other request. Each request earns
+    ``hedge_ratio`` of a hedge token and each hedge spends one, so when
+    everything is slow (an overloaded event loop, a degraded exchange) at most
+    that share of extra requests goes out instead of doubling the load.
+    """
+
+    def __init__(self, timeout: float = 10, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 limiter: Optional[RateLimiter] = None, hosts: Optional[Dict[str, str]] = None,
+                 hedge: bool = False, hedge_ratio: float = 0.1, hedge_min_samples: int = 20) -> None:
+        self.timeout = httpx.Timeout(timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.max_connections = max_connections
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.limiter = limiter or RateLimiter()
+        self.hosts = hosts or {}
+        self.hedge = hedge
+        self.hedge_ratio = hedge_ratio
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_tokens = 0.0
+        self.latencies: Dict[str, RecentLatencies] = {}
+
+    def get_client(self, host: str) -> httpx.AsyncClient:
+        client = self.clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.hosts.get(host, host), timeout=self.timeout, limits=self.limits)
+            self.clients[host] = client
+        return client
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        latencies = self.latencies.get(key)
+        if not self.hedge or latencies is None or len(latencies.samples) < self.hedge_min_samples:
+            return None
+        return latencies.quantile(0.95)
+
+    async def send(self, host: str, path: str, params: Optional[dict] = None,
+                   admitted: Optional[asyncio.Event] = None) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        bucket, weight = await self.limiter.acquire(path, params)
+        if bucket is not None:
+            BINANCE_LIMITER_WAIT_SECONDS.observe(time.perf_counter() - start, bucket=bucket)
+            BINANCE_WEIGHT.inc(weight, bucket=bucket)
+        semaphore = self.semaphores.setdefault(host, asyncio.Semaphore(self.max_connections))
+        async with semaphore:
+            if admitted is not None:
+                admitted.set()
+            start = time.perf_counter()
+            try:
+                response = await self.get_client(host).get(path, params=params)
+            except httpx.HTTPError as e:
+                print(f"Request to {host}{path} failed:", repr(e))
+                BINANCE_RESPONSES.inc(endpoint=path, status="error")
+                return None
+            finally:
+                BINANCE_SECONDS.observe(time.perf_counter() - start, endpoint=path)
+        if response.status_code == 200:
+            self.latencies.setdefault(latency_key(path, params), RecentLatencies()).add(time.perf_counter() - start)
+        BINANCE_RESPONSES.inc(endpoint=path, status=response.status_code)
+        BINANCE_RESPONSE_BYTES.observe(len(response.content), endpoint=path)
+        self.limiter.observe(path, response.status_code, response.headers)
+        return response
+
+    async def send_hedged(self, host: str, path: str, params: Optional[dict], delay: float) -> Optional[httpx.Response]:
+        admitted = asyncio.Event()
+        pending = {asyncio.ensure_future(self.send(host, path, params, admitted))}
+        try:
+            # The hedge delay runs from when the request actually goes out, not while it
+            # waits for request weight or a connection slot
+            waiter = asyncio.ensure_future(admitted.wait())
+            try:
+                await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self.hedge_tokens >= 1:
+                self.hedge_tokens -= 1
+                BINANCE_HEDGES.inc(endpoint=path)
+                pending.add(asyncio.ensure_future(self.send(host, path, params)))
+            response = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    if response is not None and response.status_code == 200:
+                        return response
+            # Neither succeeded: the last answer decides
+            return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(self, host: str, path: str, params: Optional[dict] = None):
+        delay = self.hedge_delay(latency_key(path, params))
+        # Capped, so a long quiet spell can't fund a burst of hedges
+        self.hedge_tokens = min(self.hedge_tokens + self.hedge_ratio, 10.0)
+        response = await self.send(host, path, params) if delay is None \
+            else await self.send_hedged(host, path, params, delay)
+
+        if response is not None and response.status_code == 200:
+            return response.json()
+        else:
+            return None
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
@@ -0,0 +1,89 @@
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+
+def run_batch(calls: List[Tuple[Callable, tuple]]) -> list:
+    # Runs in a worker; one failing call must not lose the rest of the batch
+    results = []
+    for function, args in calls:
+        try:
+            results.append(function(*args))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class FeaturePool:
+    """Worker processes for the CPU-bound feature computations of the collectors.
+
+    Calls submitted within ``batch_delay`` seconds of each other (typically the
+    same tick across all symbols) are flushed together and split evenly across
+    the workers, one batch and round trip per worker, so a tick spreads over
+    every core; calls only share a batch once there are more than workers. Callers pass NumPy arrays, which pickle as raw
+    buffers, rather than DataFrames.
+    """
+
+    def __init__(self, workers: int, max_batch: int = 16, batch_delay: float = 0.002) -> None:
+        self.workers = workers
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        # Spawned workers don't inherit the event loop, sockets or threads of the app
+        self.executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        self.pending: List[Tuple[Callable, tuple, asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, function: Callable, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((function, args, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.batch_delay, self.flush)
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+        calls, self.pending = self.pending, []
+        size = math.ceil(len(calls) / self.workers)
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(calls), size):
+            batch = calls[start:start + size]
+            futures = [future for _, _, future in batch]
+            task = loop.run_in_executor(self.executor, run_batch, [(function, args) for function, args, _ in batch])
+            task.add_done_callback(lambda done, futures=futures: self._resolve(futures, done))
+
+    @staticmethod
+    def _resolve(futures: List[asyncio.Future], done: asyncio.Future):
+        error = done.exception()
+        results = done.result() if error is None else [error] * len(futures)
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def warm_up(self):
+        # Start every worker (and its imports) now rather than on the first tick
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, run_batch, [])
+                               for _ in range(self.workers)])
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def compute(pool: Optional[FeaturePool], function: Callable, *args):
+    """Run ``function(*args)`` on the feature pool when there is one, inline otherwise."""
+    if pool is None:
+        return function(*args)
+    return await pool.submit(function, *args)
@@ -0,0 +1,318 @@
+import asyncio
+import datetime
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from google.oauth2 import service_account
+import google.auth.transport.requests
+
+from app.metrics import GOOGLE_PAYLOAD_BYTES, GOOGLE_RESPONSES, GOOGLE_SECONDS
+from app.scripts.google_http import SCOPES, SERVICE_ACCOUNT_FILE, sheet_range
+from app.serialization import dumps
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+SHEETS_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+SPREADSHEET_MIME_TYPE = "application/vnd.google-apps.spreadsheet"
+# Quota and transient server errors worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Requests safe to repeat after the server may already have applied them
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Failures before the request left the client: safe to retry for any method
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def google_operation(method: str, url: str) -> str:
+    # Bounded metric label for a Drive/Sheets call
+    if url.startswith(DRIVE_FILES_URL):
+        return f"drive.files.{method.lower()}"
+    for suffix in (":append", ":batchGet", ":batchUpdate"):
+        if suffix in url:
+            return f"sheets{suffix.replace(':', '.')}"
+    return "sheets.values.get" if "/values/" in url else "sheets.metadata"
+
+
+class AsyncGoogleAccessor:
+    """Async counterpart of ``GoogleAccessor`` for the Drive and Sheets calls made by the app.
+
+    All requests share one keep-alive ``httpx.AsyncClient``, at most
+    ``max_concurrency`` are in flight, and quota (429) or server errors are
+    retried with jittered exponential backoff, waiting ``Retry-After`` (at most
+    ``backoff_cap`` seconds) when the API sends it. Non-idempotent calls (the
+    POSTs that append rows or create files) are only retried when they were
+    certainly not applied: on a 429 or when the connection could not be made;
+    after a 5xx or a timeout mid-request a retry could duplicate rows or files.
+    Methods return what their ``GoogleAccessor`` namesakes return.
+    """
+
+    def __init__(self, service_account_file=SERVICE_ACCOUNT_FILE, scopes=SCOPES, max_concurrency: int = 10,
+                 max_retries: int = 5, backoff_base: float = 1, backoff_cap: float = 64, timeout: float = 30) -> None:
+        # Load the service account credentials
+        self.creds = service_account.Credentials.from_service_account_file(
+            service_account_file, scopes=scopes)
+        self.access_token = None
+        self.token_expiry = None
+        self.token_lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.client = httpx.AsyncClient(timeout=timeout,
+                                        limits=httpx.Limits(max_connections=max_concurrency,
+                                                            max_keepalive_connections=max_concurrency))
+        # Header width of each spreadsheet seen by this process, used to size read ranges
+        self.column_counts: Dict[str, int] = {}
+        self.retries = 0
+
+    async def get_access_token(self, force: bool = False):
+        async with self.token_lock:
+            # Check if the current token is expired or will expire within 5 minutes
+            if force or not self.access_token or \
+                    self.token_expiry <= datetime.datetime.utcnow() + datetime.timedelta(minutes=5):
+                # google-auth refreshes synchronously; keep it off the event loop
+                await asyncio.to_thread(self.creds.refresh, google.auth.transport.requests.Request())
+                self.access_token = self.creds.token
+                self.token_expiry = self.creds.expiry
+            return self.access_token
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_cap)
+            except ValueError:
+                pass
+        # Full jitter keeps clients that failed together from retrying together
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Authorized request with retries; the last response (or None if it never got one)."""
+        operation = google_operation(method, url)
+        start = time.perf_counter()
+        response = await self._request(method, url, **kwargs)
+        GOOGLE_SECONDS.observe(time.perf_counter() - start, operation=operation)
+        GOOGLE_RESPONSES.inc(operation=operation, status=response.status_code if response is not None else "error")
+        if response is not None:
+            GOOGLE_PAYLOAD_BYTES.observe(len(response.request.content) + len(response.content), operation=operation)
+        return response
+
+    async def _request(self, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        response = None
+        token_refreshed = False
+        extra_headers = kwargs.pop("headers", {})
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            headers = {"Authorization": f"Bearer {await self.get_access_token()}", **extra_headers}
+            try:
+                # Only the request itself holds a slot, not the backoff
+                async with self.semaphore:
+                    response = await self.client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError as e:
+                print(f"Google request {method} {url} failed:", repr(e))
+                response = None
+                if not idempotent and not isinstance(e, CONNECT_ERRORS):
+                    return None
+            else:
+                if response.status_code == 401 and not token_refreshed:
+                    # Token revoked or expired early
+                    token_refreshed = True
+                    await self.get_access_token(force=True)
+                    continue
+                if response.status_code not in RETRY_STATUSES or (not idempotent and response.status_code != 429):
+                    return response
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt, response))
+        return response
+
+    async def find_file(self, name, mime_type, parent_id=None):
+        # Drive search only, never creates; None when missing
+        query = f"name='{name}' and mimeType='{mime_type}' and trashed=false"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        response = await self.request("GET", DRIVE_FILES_URL, params={'q': query})
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Drive search for {name} failed: {response.text if response is not None else ''}")
+        files = response.json().get('files', [])
+        return files[0]['id'] if files else None
+
+    async def create_or_get_folder(self, name, parent_id=None):
+        folder_id = await self.find_file(name, FOLDER_MIME_TYPE, parent_id)
+        if folder_id:
+            # Folder already exists
+            return folder_id
+
+        # Create the folder
+        folder_metadata = {
+            'name': name,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [parent_id] if parent_id else []
+        }
+        response = await self.request("POST", DRIVE_FILES_URL, json=folder_metadata)
+        if response is not None and response.status_code == 200:
+            return response.json().get('id')
+        return None
+
+    async def create_or_get_spreadsheet_in_folder(self, name, folder_id: str, sheets: tuple, column_headers: tuple):
+        spreadsheet_id = await self.find_file(name, SPREADSHEET_MIME_TYPE, folder_id)
+        if spreadsheet_id:
+            # Spreadsheet already exists
+            if column_headers:
+                self.column_counts[spreadsheet_id] = len(column_headers)
+            return spreadsheet_id
+
+        if len(sheets) < 1 or len(column_headers) < 1:
+            raise ValueError("Invalid Sheets Names and Column Headers Provided.")
+        # Create the spreadsheet
+        spreadsheet_metadata = {
+            'name': str(name),
+            'mimeType': SPREADSHEET_MIME_TYPE,
+            'parents': [folder_id]
+        }
+        response = await self.request("POST", DRIVE_FILES_URL, json=spreadsheet_metadata)
+        if response is None or response.status_code != 200:
+            print("Error in creating spreadsheet:", response.text if response is not None else None)
+            return None
+
+        spreadsheet_id = response.json().get('id')
+        if not spreadsheet_id:
+            raise RuntimeError("Failed to create spreadsheet")
+
+        # Rename the first sheet, add one per remaining name, then write the headers to each
+        header_row = [{'values': [{'userEnteredValue': {'stringValue': header}} for header in column_headers]}]
+        grid_properties = {'columnCount': len(column_headers)}
+        batch_requests_sheets = [{
+            'updateSheetProperties': {
+                'properties': {'sheetId': 0, 'title': sheets[0], 'gridProperties': grid_properties},
+                'fields': 'title,gridProperties.columnCount'
+            }
+        }]
+        batch_requests_sheets += [{"addSheet": {"properties": {"title": sheet, "sheetId": i,
+                                                               'gridProperties': grid_properties}}}
+                                  for i, sheet in enumerate(sheets[1:], start=1)]
+        batch_requests_headers = [{
+            'updateCells': {
+                'rows': header_row,
+                'fields': 'userEnteredValue',
+                'start': {'sheetId': i, 'rowIndex': 0, 'columnIndex': 0}
+            }
+        } for i in range(len(sheets))]
+
+        for batch_requests in (batch_requests_sheets, batch_requests_headers):
+            response = await self.request("POST", f"{SHEETS_URL}/{spreadsheet_id}:batchUpdate",
+                                          json={"requests": batch_requests})
+            if response is None or response.status_code != 200:
+                print("Error in UPDATING Spreaadsheet:", response.text if response is not None else None)
+                return None
+
+        self.column_counts[spreadsheet_id] = len(column_headers)
+        return spreadsheet_id
+
+    async def add_row_data(self, spreadsheet_id, sheet_name, data):
+        if data:
+            self.column_counts[spreadsheet_id] = max(
+                self.column_counts.get(spreadsheet_id, 0), max(len(row) for row in data))
+        response = await self.request(
+            "POST", f"{SHEETS_URL}/{spreadsheet_id}/values/{sheet_name}!A1:append",
+            params={"valueInputOption": "USER_ENTERED"},
+            headers={'Content-Type': 'application/json'},
+            content=dumps({'values': data}))
+
+        if response is not None and response.status_code == 200:
+            return response.json()
+        return None
+
+    async def retrieve_sheet_data(self, spreadsheet_id, sheet_name):
+        response = await self.request(
+            "GET", f"{SHEETS_URL}/{spreadsheet_id}/values/"
+                   f"{sheet_range(sheet_name, self.column_counts.get(spreadsheet_id))}")
+
+        if response is not None and response.status_code == 200:
+            return response.json().get('values', [])
+        return None
+
+    async def retrieve_header(self, spreadsheet_id, sheet_name) -> Optional[list]:
+        # First row of the tab; [] for a tab without a header
+        response = await self.request("GET", f"{SHEETS_URL}/{spreadsheet_id}/values/'{sheet_name}'!1:1")
+
+        if response is not None and response.status_code == 200:
+            values = response.json().get('values', [])
+            return values[0] if values else []
+        return None
+
+    async def extend_header(self, spreadsheet_id, sheet_name, start: int, column_headers: list) -> bool:
+        """Write ``column_headers`` into the tab's header from column ``start``, widening the grid to fit."""
+        response = await self.request("GET", f"{SHEETS_URL}/{spreadsheet_id}",
+                                      params={'fields': 'sheets.properties(sheetId,title,gridProperties.columnCount)'})
+        if response is None or response.status_code != 200:
+            return False
+        properties = next((sheet['properties'] for sheet in response.json().get('sheets', [])
+                           if sheet.get('properties', {}).get('title') == sheet_name), None)
+        if properties is None:
+            return False
+
+        sheet_id = properties.get('sheetId', 0)
+        width = start + len(column_headers)
+        column_count = properties.get('gridProperties', {}).get('columnCount', 0)
+        batch_requests = []
+        if column_count < width:
+            batch_requests.append({'appendDimension': {'sheetId': sheet_id, 'dimension': 'COLUMNS',
+                                                       'length': width - column_count}})
+        batch_requests.append({
+            'updateCells': {
+                'rows': [{'values': [{'userEnteredValue': {'stringValue': header}} for header in column_headers]}],
+                'fields': 'userEnteredValue',
+                'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': start}
+            }
+        })
+        response = await self.request("POST", f"{SHEETS_URL}/{spreadsheet_id}:batchUpdate",
+                                      json={"requests": batch_requests})
+        if response is None or response.status_code != 200:
+            print("Error in extending the header:", response.text if response is not None else None)
+            return False
+        self.column_counts[spreadsheet_id] = max(self.column_counts.get(spreadsheet_id, 0), width)
+        return True
+
+    async def retrieve_sheet_names(self, spreadsheet_id):
+        response = await self.request("GET", f"{SHEETS_URL}/{spreadsheet_id}",
+                                      params={'fields': 'sheets.properties.title'})
+
+        if response is None or response.status_code != 200:
+            return None
+        return [sheet.get('properties', {}).get('title', '') for sheet in response.json().get('sheets', [])]
+
+    async def retrieve_spreadsheet_data(self, spreadsheet_id, sheet_names: Optional[Iterable[str]] = None):
+        # Tab names are only looked up when the caller does not know them
+        sheet_names = list(sheet_names) if sheet_names is not None \
+            else await self.retrieve_sheet_names(spreadsheet_id)
+        if sheet_names is None:
+            return None
+
+        # One batchGet for every tab
+        column_count = self.column_counts.get(spreadsheet_id)
+        response = await self.request(
+            "GET", f"{SHEETS_URL}/{spreadsheet_id}/values:batchGet",
+            params=[('ranges', sheet_range(sheet_name, column_count)) for sheet_name in sheet_names])
+
+        if response is None or response.status_code != 200:
+            return None
+
+        value_ranges = response.json().get('valueRanges', [])
+        return [{sheet_name: value_range.get('values', [])}
+                for sheet_name, value_range in zip(sheet_names, value_ranges)]
+
+    async def retrieve_spreadsheets_data(self, spreadsheet_ids: List[str], sheet_names: Optional[Iterable[str]] = None):
+        # Several spreadsheets (e.g. years) fetched concurrently, one batchGet each
+        sheet_names = list(sheet_names) if sheet_names is not None else None
+        return list(await asyncio.gather(*[self.retrieve_spreadsheet_data(spreadsheet_id, sheet_names)
+                                           for spreadsheet_id in spreadsheet_ids]))
+
+    async def delete_file(self, file_id):
+        response = await self.request("DELETE", f"{DRIVE_FILES_URL}/{file_id}")
+        return response is not None and response.status_code == 204
+
+    async def close(self):
+        await self.client.aclose()
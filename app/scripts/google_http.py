@@ -1,5 +1,7 @@
 from os import path
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
 import datetime
 import json
 
@@ -7,20 +9,28 @@ import requests
 from google.oauth2 import service_account
 import google.auth.transport.requests
 
+from app.serialization import dumps
+
 SERVICE_ACCOUNT_FILE = path.abspath(path.join(path.abspath(
     __file__), '../../env/google_credentials.json'))
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets',
           'https://www.googleapis.com/auth/drive']
 
 
-class CustomJsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        try:
-            return float(obj)
-        except (TypeError, ValueError):
-            # If conversion fails, raise the original TypeError
-            raise TypeError(
-                f'Object of type {obj.__class__.__name__} is not JSON serializable. Custom Handling Failed.')
+def column_letter(index: int) -> str:
+    """A1-notation letter(s) of a 1-based column index (1 -> A, 27 -> AA)."""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def sheet_range(sheet_name: str, column_count: Optional[int] = None) -> str:
+    # Without a known width the bare tab name covers every used column
+    if column_count:
+        return f"'{sheet_name}'!A:{column_letter(column_count)}"
+    return f"'{sheet_name}'"
 
 
 class GoogleAccessor:
@@ -30,6 +40,8 @@ class GoogleAccessor:
             service_account_file, scopes=scopes)
         self.access_token = None
         self.token_expiry = None
+        # Header width of each spreadsheet seen by this process, used to size read ranges
+        self.column_counts: Dict[str, int] = {}
 
     def get_access_token(self):
         # Check if the current token is expired or will expire within 5 minutes
@@ -41,6 +53,22 @@ class GoogleAccessor:
 
         return self.access_token
 
+    def find_file(self, name, mime_type, parent_id=None):
+        # Drive search only, never creates; None when missing
+        query = f"name='{name}' and mimeType='{mime_type}' and trashed=false"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        response = requests.get(
+            "https://www.googleapis.com/drive/v3/files",
+            headers={'Authorization': f'Bearer {self.get_access_token()}'},
+            params={'q': query},
+            timeout=10
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Drive search for {name} failed: {response.text}")
+        files = response.json().get('files', [])
+        return files[0]['id'] if files else None
+
     @lru_cache(maxsize=None)
     def create_or_get_folder(self, name, parent_id=None):
         # Assuming get_access_token() is a method to obtain an access token
@@ -107,6 +135,8 @@ class GoogleAccessor:
 
         if files:
             # Spreadsheet already exists
+            if column_headers:
+                self.column_counts[files[0]['id']] = len(column_headers)
             return files[0]['id']
         else:
             if len(sheets) < 1 or len(column_headers) < 1:
@@ -202,6 +232,7 @@ class GoogleAccessor:
                 print("Error in UPDATING Spreaadsheet:", response.text)
                 return None
 
+            self.column_counts[spreadsheet_id] = len(column_headers)
             return spreadsheet_id
 
     def add_row_data(self, spreadsheet_id, sheet_name, data):
@@ -215,11 +246,14 @@ class GoogleAccessor:
 
         # Body for appending data
         body = {'values': data}
+        if data:
+            self.column_counts[spreadsheet_id] = max(
+                self.column_counts.get(spreadsheet_id, 0), max(len(row) for row in data))
         response = requests.post(
             f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}/values/{sheet_name}!A1:append",
             params={"valueInputOption": "USER_ENTERED"},
             headers=headers,
-            data=json.dumps(body, cls=CustomJsonEncoder),
+            data=dumps(body),
             timeout=10
         )
 
@@ -238,7 +272,8 @@ class GoogleAccessor:
 
         # GET request to retrieve data
         response = requests.get(
-            f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}/values/{sheet_name}!A:Z",
+            f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}/values/"
+            f"{sheet_range(sheet_name, self.column_counts.get(spreadsheet_id))}",
             headers=headers,
             timeout=10
         )
@@ -248,33 +283,61 @@ class GoogleAccessor:
         else:
             return None
 
-    def retrieve_spreadsheet_data(self, spreadsheet_id):
+    def retrieve_sheet_names(self, spreadsheet_id):
         access_token = self.get_access_token()
 
-        # Headers for HTTP request
-        headers = {
-            'Authorization': f'Bearer {access_token}'
-        }
-
         # GET request to get sheet names
         sheet_response = requests.get(
             f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}",
-            headers=headers,
+            headers={'Authorization': f'Bearer {access_token}'},
+            params={'fields': 'sheets.properties.title'},
             timeout=10
         )
 
         if sheet_response.status_code != 200:
             return None
 
-        sheets = sheet_response.json().get('sheets', [])
-        data = []
+        return [sheet.get('properties', {}).get('title', '') for sheet in sheet_response.json().get('sheets', [])]
+
+    def retrieve_spreadsheet_data(self, spreadsheet_id, sheet_names: Optional[Iterable[str]] = None):
+        # Tab names are only looked up when the caller does not know them
+        sheet_names = list(sheet_names) if sheet_names is not None \
+            else self.retrieve_sheet_names(spreadsheet_id)
+        if sheet_names is None:
+            return None
+
+        access_token = self.get_access_token()
+
+        # Headers for HTTP request
+        headers = {
+            'Authorization': f'Bearer {access_token}'
+        }
+
+        # One batchGet for every tab
+        column_count = self.column_counts.get(spreadsheet_id)
+        response = requests.get(
+            f"https://sheets.googleapis.com/v4/spreadsheets/{spreadsheet_id}/values:batchGet",
+            headers=headers,
+            params=[('ranges', sheet_range(sheet_name, column_count))
+                    for sheet_name in sheet_names],
+            timeout=30
+        )
 
-        for sheet in sheets:
-            sheet_name = sheet.get('properties', {}).get('title', '')
-            sheet_data = self.retrieve_sheet_data(spreadsheet_id, sheet_name)
-            data.append({sheet_name: sheet_data})
+        if response.status_code != 200:
+            return None
 
-        return data
+        value_ranges = response.json().get('valueRanges', [])
+        return [{sheet_name: value_range.get('values', [])}
+                for sheet_name, value_range in zip(sheet_names, value_ranges)]
+
+    def retrieve_spreadsheets_data(self, spreadsheet_ids: List[str], sheet_names: Optional[Iterable[str]] = None):
+        # Several spreadsheets (e.g. years) fetched concurrently, one batchGet each
+        if not spreadsheet_ids:
+            return []
+        sheet_names = list(sheet_names) if sheet_names is not None else None
+        with ThreadPoolExecutor(max_workers=len(spreadsheet_ids)) as executor:
+            return list(executor.map(lambda spreadsheet_id: self.retrieve_spreadsheet_data(spreadsheet_id, sheet_names),
+                                     spreadsheet_ids))
 
     def delete_file(self, file_id):
         access_token = self.get_access_token()
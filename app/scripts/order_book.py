@@ -0,0 +1,304 @@
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+from app.scripts.binance_http import BinanceHTTP
+from app.scripts.data_collectors import get_depth_snapshot
+
+SPOT_STREAM_URL = "wss://stream.binance.com:9443/stream"
+FUTURES_STREAM_URL = "wss://fstream.binance.com/stream"
+
+
+class OrderBookDesync(Exception):
+    pass
+
+
+class LocalOrderBook:
+    """In-memory order book for one symbol, kept current from depth diff events.
+
+    Follows Binance's "manage a local order book" procedure: load a REST snapshot,
+    drop events older than it, then apply diffs while checking that update IDs
+    are contiguous. Any gap raises ``OrderBookDesync`` so the caller can resync.
+    """
+
+    def __init__(self, symbol: str, trade: Literal["spot", "future"] = "spot", max_levels: int = 1000) -> None:
+        self.symbol = symbol
+        self.trade = trade
+        self.max_levels = max_levels
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.last_update_id: Optional[int] = None
+        self.synced = False
+        self._awaiting_first_event = False
+
+    def load_snapshot(self, snapshot: dict):
+        self.bids = {float(price): float(qty) for price, qty in snapshot["bids"]}
+        self.asks = {float(price): float(qty) for price, qty in snapshot["asks"]}
+        self.last_update_id = snapshot["lastUpdateId"]
+        self.synced = True
+        self._awaiting_first_event = True
+
+    def invalidate(self):
+        self.synced = False
+        self.last_update_id = None
+
+    def apply_diff(self, event: dict) -> bool:
+        """Apply one depth update. Returns False when the event predates the book."""
+        if not self.synced:
+            raise OrderBookDesync(f"{self.trade} book for {self.symbol} is not synced")
+
+        first_id, final_id = event["U"], event["u"]
+        if self._awaiting_first_event:
+            # Spot: drop u <= lastUpdateId, first event must straddle lastUpdateId + 1
+            # Futures: drop u < lastUpdateId, first event must straddle lastUpdateId
+            target = self.last_update_id + 1 if self.trade == "spot" else self.last_update_id
+            if final_id < target:
+                return False
+            if first_id > target:
+                snapshot_id = self.last_update_id
+                self.invalidate()
+                raise OrderBookDesync(
+                    f"Gap between snapshot {snapshot_id} and first event {first_id} for {self.symbol} ({self.trade})")
+            self._awaiting_first_event = False
+        else:
+            contiguous = event["pu"] == self.last_update_id if self.trade == "future" \
+                else first_id == self.last_update_id + 1
+            if not contiguous:
+                expected = self.last_update_id
+                self.invalidate()
+                raise OrderBookDesync(
+                    f"Sequence gap for {self.symbol} ({self.trade}): expected after {expected}, got {first_id}")
+
+        self._apply_levels(self.bids, event["b"])
+        self._apply_levels(self.asks, event["a"])
+        self.last_update_id = final_id
+        return True
+
+    @staticmethod
+    def _apply_levels(side: Dict[float, float], levels):
+        for price, qty in levels:
+            price, qty = float(price), float(qty)
+            if qty == 0:
+                side.pop(price, None)
+            else:
+                side[price] = qty
+
+    def _side_array(self, side: Dict[float, float], descending: bool, limit: int) -> np.ndarray:
+        prices = np.fromiter(side.keys(), dtype=np.float64, count=len(side))
+        volumes = np.fromiter(side.values(), dtype=np.float64, count=len(side))
+        order = np.argsort(-prices if descending else prices,
+                           kind="stable")[:limit]
+        levels = np.empty((len(order), 2), dtype=np.float64)
+        levels[:, 0] = prices[order]
+        levels[:, 1] = volumes[order]
+        # Levels far from the top never receive updates once they fall off the
+        # stream's window, so keep the dict bounded to the retained depth.
+        if len(side) > 2 * self.max_levels:
+            side.clear()
+            side.update(zip(levels[:self.max_levels, 0].tolist(),
+                            levels[:self.max_levels, 1].tolist()))
+        return levels
+
+    def to_arrays(self, limit: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``limit`` levels per side as (n, 2) arrays in book order, like a REST snapshot."""
+        return self._side_array(self.bids, True, limit), self._side_array(self.asks, False, limit)
+
+
+class BinanceDepthStream:
+    """Combined ``<symbol>@depth@100ms`` diff stream for one market."""
+
+    def __init__(self, symbols: List[str], trade: Literal["spot", "future"] = "spot", url: Optional[str] = None) -> None:
+        self.symbols = symbols
+        self.trade = trade
+        base_url = url or (SPOT_STREAM_URL if trade == "spot" else FUTURES_STREAM_URL)
+        streams = "/".join(f"{symbol.lower()}@depth@100ms" for symbol in symbols)
+        self.url = f"{base_url}?streams={streams}"
+
+    async def events(self) -> AsyncIterator[dict]:
+        import websockets
+
+        async with websockets.connect(self.url, ping_interval=20, max_size=None) as websocket:
+            async for message in websocket:
+                payload = json.loads(message)
+                yield payload.get("data", payload)
+
+
+class ReplayDepthFeed:
+    """Local stand-in for ``BinanceDepthStream`` replaying recorded diff events.
+
+    ``source`` is either a list of events or the path of a JSON-lines file as
+    written by ``record_depth_events``.
+    """
+
+    def __init__(self, source: Union[str, Iterable[dict]], delay: float = 0) -> None:
+        self.source = source
+        self.delay = delay
+
+    async def events(self) -> AsyncIterator[dict]:
+        if isinstance(self.source, str):
+            with open(self.source) as file:
+                events = [json.loads(line) for line in file if line.strip()]
+        else:
+            events = list(self.source)
+
+        for event in events:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            else:
+                # Let other tasks (e.g. snapshot resyncs) interleave with the replay
+                await asyncio.sleep(0)
+            yield event
+
+
+async def record_depth_events(feed, path: str, count: int):
+    """Write the next ``count`` events of ``feed`` to a JSON-lines file for replay."""
+    with open(path, "w") as file:
+        recorded = 0
+        async for event in feed.events():
+            file.write(json.dumps(event) + "\n")
+            recorded += 1
+            if recorded >= count:
+                break
+
+
+SnapshotFetcher = Callable[[str, str], Awaitable[Optional[dict]]]
+
+
+class OrderBookManager:
+    """Keeps a ``LocalOrderBook`` per symbol and market in sync with its diff feed.
+
+    Events that arrive while a book is (re)syncing are buffered and replayed on
+    top of the fresh snapshot, as Binance prescribes. Only the latest
+    ``max_buffered_events`` are kept (the next snapshot covers anything older).
+    Each book has at most one resync in flight; it retries failed snapshots
+    with exponential backoff from ``resync_delay`` up to ``max_resync_delay``
+    seconds, since every snapshot costs request weight. A stream reconnect
+    cancels the resyncs of its market. ``feeds`` and ``fetch_snapshot`` can be
+    swapped for local stand-ins (see ``ReplayDepthFeed``).
+    """
+
+    def __init__(self,
+                 http: Optional[BinanceHTTP],
+                 symbols: List[str],
+                 trades: Iterable[str] = ("spot", "future"),
+                 depth_limit: int = 1000,
+                 feeds: Optional[Dict[str, object]] = None,
+                 fetch_snapshot: Optional[SnapshotFetcher] = None,
+                 reconnect_delay: float = 5,
+                 resync_delay: float = 1,
+                 max_resync_delay: float = 60,
+                 max_buffered_events: int = 1000) -> None:
+        self.http = http
+        self.symbols = symbols
+        self.trades = list(trades)
+        self.depth_limit = depth_limit
+        self.reconnect_delay = reconnect_delay
+        self.resync_delay = resync_delay
+        self.max_resync_delay = max_resync_delay
+        self.feeds = feeds or {trade: BinanceDepthStream(symbols, trade) for trade in self.trades}
+        self.fetch_snapshot = fetch_snapshot or self._fetch_rest_snapshot
+        self.books: Dict[Tuple[str, str], LocalOrderBook] = {
+            (symbol, trade): LocalOrderBook(symbol, trade, depth_limit)
+            for symbol in symbols for trade in self.trades}
+        self.buffers: Dict[Tuple[str, str], deque] = {
+            key: deque(maxlen=max_buffered_events) for key in self.books}
+        self.resyncs: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.resync_count = 0
+        self.feed_tasks: List[asyncio.Task] = []
+
+    async def _fetch_rest_snapshot(self, symbol: str, trade: str) -> Optional[dict]:
+        return await get_depth_snapshot(self.http, symbol, trade, self.depth_limit)
+
+    def get_book(self, symbol: str, trade: str) -> Optional[LocalOrderBook]:
+        book = self.books.get((symbol, trade))
+        if book is not None and book.synced and not book._awaiting_first_event:
+            return book
+        return None
+
+    def start(self):
+        for trade in self.trades:
+            self.feed_tasks.append(asyncio.create_task(self.run_feed(trade)))
+
+    async def stop(self):
+        for task in [*self.feed_tasks, *self.resyncs.values()]:
+            task.cancel()
+        await asyncio.gather(*self.feed_tasks, *self.resyncs.values(), return_exceptions=True)
+        self.feed_tasks.clear()
+        self.resyncs.clear()
+
+    async def run_feed(self, trade: str, reconnect: bool = True):
+        while True:
+            try:
+                async for event in self.feeds[trade].events():
+                    self.handle_event(trade, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{trade} depth stream failed:", repr(e))
+
+            if not reconnect:
+                return
+            # Whatever was missed while disconnected makes every book stale,
+            # and resyncs against the old stream's buffered events are moot
+            for (symbol, book_trade), book in self.books.items():
+                if book_trade == trade:
+                    book.invalidate()
+                    self.buffers[(symbol, trade)].clear()
+                    resync = self.resyncs.pop((symbol, trade), None)
+                    if resync is not None:
+                        resync.cancel()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def handle_event(self, trade: str, event: dict):
+        key = (event["s"], trade)
+        book = self.books.get(key)
+        if book is None:
+            return
+
+        if not book.synced or key in self.resyncs:
+            self.buffers[key].append(event)
+            self.schedule_resync(*key)
+            return
+
+        try:
+            book.apply_diff(event)
+        except OrderBookDesync as e:
+            print(e)
+            self.buffers[key].append(event)
+            self.schedule_resync(*key)
+
+    def schedule_resync(self, symbol: str, trade: str):
+        key = (symbol, trade)
+        if key not in self.resyncs:
+            self.resyncs[key] = asyncio.create_task(self.resync(symbol, trade))
+
+    async def resync(self, symbol: str, trade: str):
+        key = (symbol, trade)
+        book = self.books[key]
+        attempt = 0
+        try:
+            while True:
+                if attempt:
+                    # Events keep buffering meanwhile; a later snapshot will cover the gap
+                    await asyncio.sleep(min(self.resync_delay * 2 ** (attempt - 1), self.max_resync_delay))
+                attempt += 1
+                snapshot = await self.fetch_snapshot(symbol, trade)
+                if snapshot is None:
+                    continue
+                self.resync_count += 1
+                book.load_snapshot(snapshot)
+                try:
+                    for event in self.buffers[key]:
+                        book.apply_diff(event)
+                except OrderBookDesync as e:
+                    print(e)
+                    continue
+                self.buffers[key].clear()
+                return
+        finally:
+            # A reconnect may already have replaced this task
+            if self.resyncs.get(key) is asyncio.current_task():
+                del self.resyncs[key]
@@ -0,0 +1,196 @@
+from typing import Optional
+
+import numpy as np
+
+# Feature parameters (kept identical to the original pandas implementation)
+NEAR_MARKET_RANGE = 0.005
+NUM_PRICE_BRACKETS = 10
+LARGE_ORDER_QUANTILE = 0.95
+WHALE_ORDER_QUANTILE = 0.99
+DEPTH_RANGES = [0.01, 0.02, 0.05]
+PRICE_MOVEMENT_PERCENTILES = [0.95, 0.99]
+TOP_ORDER_THRESHOLD = 100
+TOP_LEVELS = 5
+
+# Feature names of compute_depth_features, in row order, without the market prefix
+DEPTH_FEATURE_FIELDS = [
+    "TotalBidVolumeRatio", "TotalAskVolumeRatio",
+    *[f"Support_{i}" for i in range(TOP_LEVELS)], *[f"Resistance_{i}" for i in range(TOP_LEVELS)],
+    "Spread", "TotalBidsVolumeNearMarket", "TotalAsksVolumeNearMarket",
+    *[f"BidVolumePercentage_{i}" for i in range(NUM_PRICE_BRACKETS)],
+    *[f"AskVolumePercentage_{i}" for i in range(NUM_PRICE_BRACKETS)],
+    "PriceImpactBids", "PriceImpactAsks", "MarketPrice", "BidToAskRatio", "LargeBidsCount", "LargeAsksCount",
+    *[f"DepthImbalance_{depth_range * 100}" for depth_range in DEPTH_RANGES],
+    "BidsConcentrationNearMarketRatio", "AsksConcentrationNearMarketRatio", "VwapBids", "VwapAsks",
+    *[f"LargeBidPriceMovementRange_{percentile * 100}" for percentile in PRICE_MOVEMENT_PERCENTILES],
+    *[f"LargeAskPriceMovementRange_{percentile * 100}" for percentile in PRICE_MOVEMENT_PERCENTILES],
+    "LargeBidsDistributionRatio", "LargeAsksDistributionRatio",
+    "LargeBidsRelativeMeanSize", "LargeAsksRelativeMeanSize",
+]
+
+
+def parse_levels(levels) -> np.ndarray:
+    """Parse Binance ``[[price, qty], ...]`` string levels into a contiguous (n, 2) float64 array."""
+    if len(levels) == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.ascontiguousarray(np.array(levels, dtype=np.float64)[:, :2])
+
+
+class BookSide:
+    """One side of the book with the precomputed views every feature reads from.
+
+    ``price``/``volume`` are in book order (best level first), ``sorted_price``
+    and ``sorted_cumsum`` are ascending by price so any price-band volume is two
+    ``searchsorted`` lookups.
+    """
+
+    def __init__(self, levels: np.ndarray, is_bid: bool) -> None:
+        self.is_bid = is_bid
+        self.price = levels[:, 0]
+        self.volume = levels[:, 1]
+        self.total = self.volume.sum()
+        self.book_cumsum = np.cumsum(self.volume)
+
+        order = np.argsort(self.price, kind="stable")
+        self.sorted_price = self.price[order]
+        self.sorted_volume = self.volume[order]
+        self.sorted_cumsum = np.concatenate(
+            ([0.0], np.cumsum(self.sorted_volume)))
+
+    def volume_between(self, low: float, high: float) -> float:
+        # Total volume for levels with low <= price <= high
+        start = np.searchsorted(self.sorted_price, low, side="left")
+        end = np.searchsorted(self.sorted_price, high, side="right")
+        if end <= start:
+            return 0.0
+        return self.sorted_cumsum[end] - self.sorted_cumsum[start]
+
+    def top_levels_by_volume(self, count: int) -> list:
+        # Price levels holding the most volume (ties resolved by ascending price)
+        order = np.argsort(-self.sorted_volume, kind="stable")[:count]
+        return self.sorted_price[order].tolist()
+
+    def bracket_percentages(self, num_brackets: int) -> list:
+        # Equal-count price brackets (pd.qcut semantics: right-closed, lowest edge included)
+        edges = np.quantile(self.sorted_price, np.linspace(0, 1, num_brackets + 1))
+        brackets = np.clip(np.searchsorted(edges, self.sorted_price, side="left") - 1,
+                           0, num_brackets - 1)
+        sums = np.bincount(brackets, weights=self.sorted_volume,
+                           minlength=num_brackets)
+        present = np.bincount(brackets, minlength=num_brackets) > 0
+        return (sums[present] / self.total * 100).tolist()
+
+    def price_movement(self, market_price: float, percentile: float) -> float:
+        # Price reached when walking the book until the cumulative volume covers an order
+        # of the given volume percentile
+        order_size = np.quantile(self.volume, percentile)
+        index = np.searchsorted(self.book_cumsum, order_size, side="left")
+        price = self.price[index] if index < len(self.price) else 0
+        return market_price - price if self.is_bid else price - market_price
+
+    def vwap(self, top_orders: int) -> float:
+        return np.dot(self.price[:top_orders], self.volume[:top_orders]) / self.volume[:top_orders].sum()
+
+
+def compute_depth_features(bids: np.ndarray, asks: np.ndarray, trade: str = "spot") -> Optional[dict]:
+    """Compute the market depth features of ``get_mdd`` from parsed bid/ask level arrays.
+
+    Both arrays are (n, 2) ``[price, volume]`` float arrays in book order (bids
+    descending, asks ascending). Keys and their order match the original
+    DataFrame implementation so existing sheets keep lining up.
+    """
+    if len(bids) == 0 or len(asks) == 0:
+        return None
+
+    bid_side = BookSide(bids, is_bid=True)
+    ask_side = BookSide(asks, is_bid=False)
+    total_bid_volume = bid_side.total
+    total_ask_volume = ask_side.total
+    total_volume = total_bid_volume + total_ask_volume
+
+    mdd = {}
+    # ORDER BOOK BALANCE
+    mdd[f'{trade}TotalBidVolumeRatio'] = total_bid_volume / total_volume
+    mdd[f'{trade}TotalAskVolumeRatio'] = total_ask_volume / total_volume
+
+    # PRICE MOVEMENTS
+    # Top potential support and resistance levels
+    for i, level in enumerate(bid_side.top_levels_by_volume(TOP_LEVELS)):
+        mdd[f'{trade}Support_{i}'] = level
+    for i, level in enumerate(ask_side.top_levels_by_volume(TOP_LEVELS)):
+        mdd[f'{trade}Resistance_{i}'] = level
+
+    # LIQUIDITY
+    best_bid_price = bid_side.sorted_price[-1]
+    best_ask_price = ask_side.sorted_price[0]
+    mdd[f'{trade}Spread'] = best_ask_price - best_bid_price
+
+    # Volume depth near market price
+    market_price = (best_bid_price + best_ask_price) / 2
+    price_range = market_price * NEAR_MARKET_RANGE
+    mdd[f'{trade}TotalBidsVolumeNearMarket'] = bid_side.volume_between(
+        market_price - price_range, market_price) / total_volume
+    mdd[f'{trade}TotalAsksVolumeNearMarket'] = ask_side.volume_between(
+        market_price, market_price + price_range) / total_volume
+
+    # Percentage Distribution Analysis
+    for i, percentage in enumerate(bid_side.bracket_percentages(NUM_PRICE_BRACKETS)):
+        mdd[f'{trade}BidVolumePercentage_{i}'] = percentage
+    for i, percentage in enumerate(ask_side.bracket_percentages(NUM_PRICE_BRACKETS)):
+        mdd[f'{trade}AskVolumePercentage_{i}'] = percentage
+
+    # Large orders (top 5% of volume) and their potential price impact
+    large_bids = bid_side.volume >= np.quantile(
+        bid_side.volume, LARGE_ORDER_QUANTILE)
+    large_asks = ask_side.volume >= np.quantile(
+        ask_side.volume, LARGE_ORDER_QUANTILE)
+    mdd[f'{trade}PriceImpactBids'] = np.dot(
+        bid_side.volume[large_bids], bid_side.price[large_bids]) / total_bid_volume
+    mdd[f'{trade}PriceImpactAsks'] = np.dot(
+        ask_side.volume[large_asks], ask_side.price[large_asks]) / total_ask_volume
+
+    # MARKET SENTIMENT ANALYSIS
+    mdd[f'{trade}MarketPrice'] = market_price
+    mdd[f'{trade}BidToAskRatio'] = total_bid_volume / total_ask_volume
+    mdd[f'{trade}LargeBidsCount'] = int(large_bids.sum())
+    mdd[f'{trade}LargeAsksCount'] = int(large_asks.sum())
+
+    # Depth Imbalance
+    for depth_range in DEPTH_RANGES:
+        bid_depth = bid_side.volume_between(
+            market_price * (1 - depth_range), np.inf)
+        ask_depth = ask_side.volume_between(
+            -np.inf, market_price * (1 + depth_range))
+        mdd[f'{trade}DepthImbalance_{depth_range * 100}'] = bid_depth - ask_depth
+
+    # Price Movement Trends
+    mdd[f'{trade}BidsConcentrationNearMarketRatio'] = bid_side.volume_between(
+        market_price * (1 - NEAR_MARKET_RANGE), market_price) / total_bid_volume
+    mdd[f'{trade}AsksConcentrationNearMarketRatio'] = ask_side.volume_between(
+        market_price, market_price * (1 + NEAR_MARKET_RANGE)) / total_ask_volume
+
+    # Potential Price Slippage (VWAP of the top orders)
+    mdd[f'{trade}VwapBids'] = bid_side.vwap(TOP_ORDER_THRESHOLD)
+    mdd[f'{trade}VwapAsks'] = ask_side.vwap(TOP_ORDER_THRESHOLD)
+
+    # Cumulative Order Depth Analysis
+    for percentile in PRICE_MOVEMENT_PERCENTILES:
+        mdd[f'{trade}LargeBidPriceMovementRange_{percentile * 100}'] = bid_side.price_movement(
+            market_price, percentile)
+    for percentile in PRICE_MOVEMENT_PERCENTILES:
+        mdd[f'{trade}LargeAskPriceMovementRange_{percentile * 100}'] = ask_side.price_movement(
+            market_price, percentile)
+
+    # WHALE ACTIVITY (top 1% of orders)
+    whale_bids = bid_side.volume[bid_side.volume >= np.quantile(
+        bid_side.volume, WHALE_ORDER_QUANTILE)]
+    whale_asks = ask_side.volume[ask_side.volume >= np.quantile(
+        ask_side.volume, WHALE_ORDER_QUANTILE)]
+    mdd[f'{trade}LargeBidsDistributionRatio'] = whale_bids.sum() / total_bid_volume
+    mdd[f'{trade}LargeAsksDistributionRatio'] = whale_asks.sum() / total_ask_volume
+    mdd[f'{trade}LargeBidsRelativeMeanSize'] = whale_bids.mean() / \
+        bid_side.volume.mean()
+    mdd[f'{trade}LargeAsksRelativeMeanSize'] = whale_asks.mean() / \
+        ask_side.volume.mean()
+
+    return mdd
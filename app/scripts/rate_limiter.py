@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+
+
+def depth_weight(trade: str, limit: int) -> int:
+    if trade == "spot":
+        if limit <= 100:
+            return 5
+        if limit <= 500:
+            return 25
+        if limit <= 1000:
+            return 50
+        return 250
+    if limit <= 50:
+        return 2
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 10
+    return 20
+
+
+def futures_klines_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def endpoint_weight(path: str, params: Optional[dict] = None) -> Tuple[Optional[str], int]:
+    """Rate-limit bucket and request weight of a Binance endpoint.
+
+    Weights follow Binance's published tables for the endpoints the collectors
+    use; anything else counts as 1. Paths outside the limited APIs (e.g. the
+    capital-flow ``/bapi`` endpoint) have no bucket.
+    """
+    limit = int((params or {}).get("limit", 500))
+    if path.startswith("/api/"):
+        if path.endswith("/depth"):
+            return "spot", depth_weight("spot", limit)
+        if path.endswith("/trades"):
+            return "spot", 25
+        if path.endswith("/klines") or path.endswith("/aggTrades"):
+            return "spot", 2
+        return "spot", 1
+    if path.startswith("/fapi/"):
+        if path.endswith("/depth"):
+            return "futures", depth_weight("future", limit)
+        if path.endswith("/klines"):
+            return "futures", futures_klines_weight(limit)
+        if path.endswith("/aggTrades"):
+            return "futures", 20
+        if path.endswith("/trades"):
+            return "futures", 5
+        return "futures", 1
+    if path.startswith("/futures/data/"):
+        # Counted per request, on its own budget
+        return "futures_data", 1
+    return None, 0
+
+
+class WeightBucket:
+    """Request weight budget over fixed windows aligned to the wall clock, like Binance's counters.
+
+    Weight is reserved before a request is sent and reconciled with the
+    server's ``X-MBX-USED-WEIGHT-1M`` count, which also covers other clients
+    sharing the IP. Requests that don't fit wait, in arrival order, for the
+    next window; a 429/418 blocks the bucket for the ``Retry-After`` period.
+    """
+
+    def __init__(self, limit: int, window: float = 60) -> None:
+        self.limit = limit
+        self.window = window
+        self.window_id: Optional[int] = None
+        self.used = 0
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _roll(self, now: float):
+        window_id = int(now // self.window)
+        if window_id != self.window_id:
+            self.window_id = window_id
+            self.used = 0
+
+    async def acquire(self, weight: int):
+        # The lock keeps waiters in FIFO order instead of all racing for the next window
+        async with self.lock:
+            while True:
+                now = time.time()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._roll(now)
+                # A request heavier than the whole budget still goes out alone in a fresh window
+                if self.used + weight <= self.limit or self.used == 0:
+                    self.used += weight
+                    return
+                await asyncio.sleep((self.window_id + 1) * self.window - now)
+
+    def observe_used(self, used: int):
+        self._roll(time.time())
+        self.used = max(self.used, used)
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+
+class RateLimiter:
+    """Shared Binance request budget: one ``WeightBucket`` per rate-limited API."""
+
+    def __init__(self, spot_limit: int = 6000, futures_limit: int = 2400, futures_data_limit: int = 1000) -> None:
+        self.buckets: Dict[str, WeightBucket] = {
+            "spot": WeightBucket(spot_limit),
+            "futures": WeightBucket(futures_limit),
+            # /futures/data allows a number of requests per 5 minutes
+            "futures_data": WeightBucket(futures_data_limit, 300),
+        }
+        self.throttled = 0
+
+    async def acquire(self, path: str, params: Optional[dict] = None) -> Tuple[Optional[str], int]:
+        bucket, weight = endpoint_weight(path, params)
+        if bucket is not None:
+            await self.buckets[bucket].acquire(weight)
+        return bucket, weight
+
+    def observe(self, path: str, status_code: int, headers) -> None:
+        bucket_name, _ = endpoint_weight(path)
+        bucket = self.buckets.get(bucket_name)
+        if bucket is None:
+            return
+        used = headers.get(USED_WEIGHT_HEADER)
+        if used is not None and used.isdigit():
+            bucket.observe_used(int(used))
+        if status_code in (418, 429):
+            self.throttled += 1
+            retry_after = headers.get("retry-after")
+            # Without a Retry-After, sit out the rest of the window
+            seconds = float(retry_after) if retry_after else bucket.window - time.time() % bucket.window
+            print(f"Binance returned {status_code} for {path}, pausing {bucket_name} requests for {seconds:.0f}s")
+            bucket.block(seconds)
+
+    def usage(self) -> Dict[str, dict]:
+        return {name: {"used": bucket.used, "limit": bucket.limit,
+                       "blocked": bucket.blocked_until > time.time()}
+                for name, bucket in self.buckets.items()}
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.serialization import dumps
+
+
+class SheetsWriteBuffer:
+    """Coalesces row appends per spreadsheet tab and flushes them in bulk.
+
+    Rows are held until ``max_rows`` are pending or the oldest one has waited
+    ``max_delay`` seconds; a flush then issues one ``values:append`` per tab
+    touched, so request volume follows the number of spreadsheets rather than
+    the number of rows. Rows of a failed append are kept for a retry after
+    ``retry_delay`` seconds, doubling with each further failure of the tab;
+    after ``max_attempts`` failures they are set aside as JSON lines in
+    ``rejected_path`` (or dropped without one), so a tab Sheets keeps rejecting
+    can't hold up the buffer forever.
+    """
+
+    def __init__(self, google_accessor, max_rows: int = 1000, max_delay: float = 300, max_attempts: int = 5,
+                 retry_delay: float = 30, rejected_path: Optional[str] = None) -> None:
+        self.google_accessor = google_accessor
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.rejected_path = rejected_path
+        self.pending: Dict[Tuple[str, str], List[list]] = defaultdict(list)
+        self.pending_rows = 0
+        self.oldest: Optional[float] = None
+        # Failed appends per tab, and when the tab may be retried
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.retry_at: Dict[Tuple[str, str], float] = {}
+        self.rejected_rows = 0
+        self.lock = asyncio.Lock()
+
+    def add(self, spreadsheet_id: str, sheet_name: str, row: list):
+        self.pending[(spreadsheet_id, sheet_name)].append(row)
+        self.pending_rows += 1
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+
+    def due(self) -> bool:
+        if self.pending_rows == 0:
+            return False
+        return self.pending_rows >= self.max_rows or time.monotonic() - self.oldest >= self.max_delay
+
+    async def maybe_flush(self):
+        if self.due():
+            await self.flush()
+
+    async def _append(self, spreadsheet_id: str, sheet_name: str, rows: List[list]) -> bool:
+        response = await self.google_accessor.add_row_data(spreadsheet_id, sheet_name, rows)
+        return response is not None
+
+    def reject(self, key: Tuple[str, str], rows: List[list], error):
+        self.rejected_rows += len(rows)
+        print(f"Giving up on {len(rows)} rows for {key[0]}/{key[1]} after {self.max_attempts} failed appends")
+        if self.rejected_path is None:
+            return
+        directory = os.path.dirname(self.rejected_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.rejected_path, "ab") as file:
+            file.write(dumps({"spreadsheet_id": key[0], "sheet_name": key[1], "error": str(error),
+                              "rejected_at": time.time(), "rows": rows}) + b"\n")
+
+    async def flush(self):
+        async with self.lock:
+            now = time.monotonic()
+            # Tabs backing off after a failure wait for their retry time
+            batches = [(key, rows) for key, rows in self.pending.items() if self.retry_at.get(key, 0) <= now]
+            if not batches:
+                return
+            for key, rows in batches:
+                del self.pending[key]
+                self.pending_rows -= len(rows)
+            self.oldest = None
+
+            results = await asyncio.gather(*[self._append(spreadsheet_id, sheet_name, rows)
+                                             for (spreadsheet_id, sheet_name), rows in batches],
+                                           return_exceptions=True)
+
+            for (key, rows), result in zip(batches, results):
+                if result is True:
+                    self.failures.pop(key, None)
+                    self.retry_at.pop(key, None)
+                    continue
+                error = result if isinstance(result, BaseException) else "no response from Sheets"
+                print(f"Failed to append {len(rows)} rows to {key[0]}/{key[1]}:", error)
+                failures = self.failures.get(key, 0) + 1
+                if failures >= self.max_attempts:
+                    self.failures.pop(key, None)
+                    self.retry_at.pop(key, None)
+                    self.reject(key, rows, error)
+                    continue
+                self.failures[key] = failures
+                self.retry_at[key] = time.monotonic() + self.retry_delay * 2 ** (failures - 1)
+                # Put them back ahead of rows added during the flush to keep order
+                self.pending[key] = rows + self.pending[key]
+                self.pending_rows += len(rows)
+
+            if self.pending_rows:
+                # Due again at the earliest retry, or by the usual delay for rows added meanwhile
+                due_times = [self.retry_at[key] - self.max_delay for key in self.pending if key in self.retry_at]
+                if self.oldest is not None:
+                    due_times.append(self.oldest)
+                self.oldest = min(due_times) if due_times else time.monotonic()
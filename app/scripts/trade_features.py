@@ -0,0 +1,35 @@
+import numpy as np
+
+# Feature names of compute_trade_features, in row order, without the market prefix
+TRADE_FEATURE_FIELDS = ["TotalTradeVolume", "AverageTradePrice", "TradeFrequency(sec)", "BuyerMakerRatio"]
+
+
+def parse_trades(trades: list) -> np.ndarray:
+    """Parse Binance trade objects into an (n, 4) float64 array of ``[time, price, qty, isBuyerMaker]``."""
+    count = len(trades)
+    parsed = np.empty((count, 4), dtype=np.float64)
+    # Column by column: NumPy converts the decimal strings in C rather than one float() per value
+    parsed[:, 0] = np.fromiter((trade["time"] for trade in trades), dtype=np.float64, count=count)
+    parsed[:, 1] = np.array([trade["price"] for trade in trades], dtype=np.float64)
+    parsed[:, 2] = np.array([trade["qty"] for trade in trades], dtype=np.float64)
+    parsed[:, 3] = np.fromiter((trade["isBuyerMaker"] for trade in trades), dtype=np.float64, count=count)
+    return parsed
+
+
+def compute_trade_features(trades: np.ndarray, trade: str = "spot") -> dict:
+    """Recent-trade features of ``get_recent_trades`` from a ``parse_trades`` array (same keys and order)."""
+    times, prices, quantities, buyer_maker = trades.T
+
+    total_trade_volume = quantities.sum()
+    average_trade_price = np.dot(prices, quantities) / total_trade_volume
+    # Mean gap between consecutive trades, in seconds
+    trade_frequency = np.diff(times).mean() / 1000 if len(times) > 1 else float("nan")
+    # Proportion of trades where buyer is the maker
+    buyer_maker_ratio = buyer_maker.mean()
+
+    return {
+        f'{trade}TotalTradeVolume': float(total_trade_volume),
+        f'{trade}AverageTradePrice': float(average_trade_price),
+        f'{trade}TradeFrequency(sec)': float(trade_frequency),
+        f'{trade}BuyerMakerRatio': float(buyer_maker_ratio),
+    }
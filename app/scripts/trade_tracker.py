@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from app.scripts.binance_http import BinanceHTTP, SPOT_HOST, FUTURES_HOST
+
+AGG_TRADES_LIMIT = 1000
+
+
+class RollingTradeWindow:
+    """Running trade aggregates over the last ``window_ms`` milliseconds.
+
+    Each aggregated trade is added once and evicted once, with the sums
+    adjusted in place, so every update and read is O(1) amortized. Aggregated
+    trades carry the range of trade IDs they merge, so counts (and the
+    buyer-maker ratio and inter-trade interval built on them) are per trade,
+    as with the raw trades endpoint.
+    """
+
+    def __init__(self, window_ms: int = 60 * 1000) -> None:
+        self.window_ms = window_ms
+        # (time, qty, price * qty, trades, buyer-maker trades)
+        self.entries: deque = deque()
+        self.volume = 0.0
+        self.notional = 0.0
+        self.trades = 0
+        self.buyer_maker_trades = 0
+
+    def add(self, timestamp: int, price: float, qty: float, trades: int, is_buyer_maker: bool):
+        maker_trades = trades if is_buyer_maker else 0
+        self.entries.append((timestamp, qty, price * qty, trades, maker_trades))
+        self.volume += qty
+        self.notional += price * qty
+        self.trades += trades
+        self.buyer_maker_trades += maker_trades
+
+    def evict(self, now: int):
+        while self.entries and self.entries[0][0] < now - self.window_ms:
+            _, qty, notional, trades, maker_trades = self.entries.popleft()
+            self.volume -= qty
+            self.notional -= notional
+            self.trades -= trades
+            self.buyer_maker_trades -= maker_trades
+        if not self.entries:
+            # Drop the rounding drift accumulated by the running sums
+            self.volume = self.notional = 0.0
+
+    def features(self, trade: str) -> dict:
+        empty = not self.entries
+        span = self.entries[-1][0] - self.entries[0][0] if not empty else 0
+        return {
+            f'{trade}TotalTradeVolume': self.volume,
+            f'{trade}AverageTradePrice': self.notional / self.volume if self.volume else None,
+            # Mean gap between consecutive trades, in seconds
+            f'{trade}TradeFrequency(sec)': span / (self.trades - 1) / 1000 if self.trades > 1 else None,
+            f'{trade}BuyerMakerRatio': self.buyer_maker_trades / self.trades if self.trades else None,
+        }
+
+
+class TradeTracker:
+    """Incremental trade ingestion per symbol and market.
+
+    Remembers the last aggregated trade ID seen and only asks for newer ones
+    (``fromId``), paging until caught up, so every trade lands in the rolling
+    window once, whether the symbol trades a handful of times a minute or
+    thousands.
+    """
+
+    def __init__(self, http: BinanceHTTP, window_ms: int = 60 * 1000, max_pages: int = 10) -> None:
+        self.http = http
+        self.window_ms = window_ms
+        self.max_pages = max_pages
+        self.cursors: Dict[Tuple[str, str], int] = {}
+        self.windows: Dict[Tuple[str, str], RollingTradeWindow] = {}
+        self.locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    async def fetch(self, symbol: str, trade: str, from_id: Optional[int]) -> Optional[list]:
+        params = {"symbol": symbol, "limit": AGG_TRADES_LIMIT}
+        if from_id is not None:
+            params["fromId"] = from_id
+        return await self.http.get(SPOT_HOST, "/api/v3/aggTrades", params) if trade == "spot" \
+            else await self.http.get(FUTURES_HOST, "/fapi/v1/aggTrades", params)
+
+    async def update(self, symbol: str, trade: str) -> bool:
+        key = (symbol, trade)
+        window = self.windows.setdefault(key, RollingTradeWindow(self.window_ms))
+        for _ in range(self.max_pages):
+            cursor = self.cursors.get(key)
+            # Without a cursor yet, start from the latest page
+            trades = await self.fetch(symbol, trade, cursor + 1 if cursor is not None else None)
+            if trades is None:
+                return False
+            for agg_trade in trades:
+                window.add(agg_trade["T"], float(agg_trade["p"]), float(agg_trade["q"]),
+                           agg_trade["l"] - agg_trade["f"] + 1, agg_trade["m"])
+            if trades:
+                self.cursors[key] = trades[-1]["a"]
+            if len(trades) < AGG_TRADES_LIMIT or cursor is None:
+                break
+        else:
+            print(f"{trade} trades for {symbol} still behind after {self.max_pages} pages")
+        return True
+
+    async def features(self, symbol: str, trade: str) -> Optional[dict]:
+        key = (symbol, trade)
+        # Overlapping ticks must not fetch the same trades twice
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            if not await self.update(symbol, trade):
+                return None
+            window = self.windows[key]
+            window.evict(int(time.time() * 1000))
+            return window.features(trade)
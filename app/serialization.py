@@ -0,0 +1,60 @@
+import json
+import math
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    # Optional: the standard library encoder is used without it
+    orjson = None
+
+
+def default(obj):
+    # Only reached for values the encoder can't handle natively
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    try:
+        return float(obj)
+    except (TypeError, ValueError):
+        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable.')
+
+
+def finite(obj):
+    # NaN and inf as None, the way orjson writes them
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [finite(value) for value in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return finite(obj.tolist())
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON-encode rows and responses, NumPy scalars and arrays included.
+
+    With orjson installed, NumPy values are encoded natively (and NaN/inf as
+    null); otherwise the standard library encoder converts them one by one,
+    with NaN/inf also written as null rather than as invalid JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    try:
+        return json.dumps(obj, default=default, separators=(",", ":"), allow_nan=False).encode()
+    except ValueError:
+        # Only pay for the walk when there is a non-finite value to replace
+        return json.dumps(finite(obj), default=default, separators=(",", ":"), allow_nan=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` encoded with ``dumps``; return it directly to skip FastAPI's ``jsonable_encoder`` pass."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
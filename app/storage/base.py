@@ -0,0 +1,214 @@
+import asyncio
+import calendar
+import time
+from typing import AsyncIterator, List, Optional
+
+from app.storage.rollups import ROLLUP_GRANULARITIES
+
+SHEET_NAMES = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+
+
+def row_timestamp(row: dict) -> int:
+    """Open time of the row's kline in epoch milliseconds (UTC), from its calendar fields."""
+    return calendar.timegm((row['year'], row['month'], row['day'], row['hour'], row['minute'], 0)) * 1000
+
+
+# 1m rows plus the rollups maintained from them
+GRANULARITIES = ("1m", *ROLLUP_GRANULARITIES)
+
+# Leading column of range reads: the row's open time in epoch milliseconds
+RANGE_TIMESTAMP = "timestamp"
+
+
+def month_bounds(year: int, month: int):
+    """[start, end) epoch milliseconds of a calendar month."""
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    end = calendar.timegm((year + month // 12, month % 12 + 1, 1, 0, 0, 0))
+    return start * 1000, end * 1000
+
+
+def months_between(start: int, end: int):
+    """(year, month) pairs overlapping the [start, end) epoch-millisecond span."""
+    first = time.gmtime(start // 1000)
+    last = time.gmtime((end - 1) // 1000)
+    year, month = first.tm_year, first.tm_mon
+    while (year, month) <= (last.tm_year, last.tm_mon):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def check_granularity(granularity: str, supported=GRANULARITIES):
+    if granularity not in supported:
+        raise ValueError(
+            f"Unsupported granularity {granularity!r}; expected one of {', '.join(supported)}.")
+
+
+class StorageBackend:
+    """Interface between the pipeline/getters and wherever rows are kept.
+
+    Reads return the same shapes the Sheets API used to: a month is a list of
+    rows with the header first, a year is a list of ``{month_name: month}``.
+    ``exact_reads`` tells whether rows read back carry the values exactly as
+    written (Sheets returns formatted strings). Reads take a ``granularity``:
+    "1m" rows or one of the rollups in ``ROLLUP_GRANULARITIES``.
+    """
+
+    exact_reads = False
+
+    async def write_row(self, symbol: str, row: dict):
+        raise NotImplementedError
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        """Bulk write (e.g. backfills); backends with a cheaper batch path override it."""
+        for row in rows:
+            await self.write_row(symbol, row)
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        raise NotImplementedError
+
+    async def read_year(self, symbol: str, year: int, granularity: str = "1m") -> list:
+        return [{sheet_name: await self.read_month(symbol, year, month, granularity)}
+                for month, sheet_name in enumerate(SHEET_NAMES, start=1)]
+
+    async def read_years(self, symbol: str, years: List[int], granularity: str = "1m") -> List[list]:
+        return list(await asyncio.gather(*[self.read_year(symbol, year, granularity) for year in years]))
+
+    async def stream_month(self, symbol: str, year: int, month: int, chunk_size: int = 5000,
+                           granularity: str = "1m") -> AsyncIterator[list]:
+        """Yield the month as chunks of rows, the first chunk starting with the header.
+
+        The default slices a full read; backends that can page through their
+        storage override it to keep memory flat.
+        """
+        rows = await self.read_month(symbol, year, month, granularity)
+        for start in range(0, len(rows or []), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    async def stream_year(self, symbol: str, year: int, chunk_size: int = 5000,
+                          granularity: str = "1m") -> AsyncIterator[list]:
+        """Yield every month of the year as one table (single header, same chunking as ``stream_month``)."""
+        header = None
+        for month in range(1, 13):
+            month_header = None
+            async for chunk in self.stream_month(symbol, year, month, chunk_size, granularity):
+                if month_header is None:
+                    month_header, chunk = chunk[0], chunk[1:]
+                    if header is None:
+                        header = month_header
+                        yield [header]
+                if month_header != header:
+                    # Align months whose tab/table layout differs with the first header
+                    positions = {column: i for i, column in enumerate(month_header)}
+                    chunk = [[row[positions[column]] if column in positions and positions[column] < len(row) else None
+                              for column in header] for row in chunk]
+                if chunk:
+                    yield chunk
+
+    async def stream_range(self, symbol: str, start: int, end: int, columns: Optional[List[str]] = None,
+                           chunk_size: int = 5000, granularity: str = "1m") -> AsyncIterator[list]:
+        """Yield rows with open time in [start, end) (epoch ms), restricted to ``columns``.
+
+        The header is ``[RANGE_TIMESTAMP, *columns]``. This default scans the
+        months overlapping the span; indexed backends override it.
+        """
+        header = None
+        for year, month in months_between(start, end):
+            rows = await self.read_month(symbol, year, month, granularity)
+            if not rows:
+                continue
+            positions = {column: i for i, column in enumerate(rows[0])}
+            if header is None:
+                selected = list(rows[0]) if columns is None else list(columns)
+                unknown = [column for column in selected if column not in positions]
+                if unknown:
+                    raise ValueError(f"Unknown columns for {symbol}: {', '.join(unknown)}")
+                header = [RANGE_TIMESTAMP, *selected]
+                yield [header]
+            calendar_positions = [positions[field] for field in ("year", "month", "day", "hour", "minute")]
+            chunk = []
+            for row in rows[1:]:
+                timestamp = calendar.timegm((*(int(row[i]) for i in calendar_positions), 0)) * 1000
+                if start <= timestamp < end:
+                    chunk.append([timestamp, *(row[positions[column]] if column in positions and positions[column] < len(row)
+                                               else None for column in header[1:])])
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
+
+    def pending_writes(self) -> int:
+        """Rows written but not yet readable back (buffered for a later flush)."""
+        return 0
+
+    async def maybe_flush(self):
+        """Flush buffered writes if the backend's own thresholds say so (called once per tick)."""
+        pass
+
+    async def flush(self):
+        pass
+
+    async def close(self):
+        await self.flush()
+
+
+class MirroredStore(StorageBackend):
+    """Writes go to the primary backend and then to every mirror; reads use the primary only."""
+
+    def __init__(self, primary: StorageBackend, mirrors: List[StorageBackend]) -> None:
+        self.primary = primary
+        self.mirrors = mirrors
+        self.exact_reads = primary.exact_reads
+
+    async def write_row(self, symbol: str, row: dict):
+        await self.primary.write_row(symbol, row)
+        for mirror in self.mirrors:
+            try:
+                await mirror.write_row(symbol, row)
+            except Exception as e:
+                print(f"Mirror write failed for {symbol}:", repr(e))
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        await self.primary.write_rows(symbol, rows)
+        for mirror in self.mirrors:
+            try:
+                await mirror.write_rows(symbol, rows)
+            except Exception as e:
+                print(f"Mirror write failed for {symbol}:", repr(e))
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        return await self.primary.read_month(symbol, year, month, granularity)
+
+    async def read_year(self, symbol: str, year: int, granularity: str = "1m") -> list:
+        return await self.primary.read_year(symbol, year, granularity)
+
+    async def read_years(self, symbol: str, years: List[int], granularity: str = "1m") -> List[list]:
+        return await self.primary.read_years(symbol, years, granularity)
+
+    def stream_month(self, symbol: str, year: int, month: int, chunk_size: int = 5000,
+                     granularity: str = "1m") -> AsyncIterator[list]:
+        return self.primary.stream_month(symbol, year, month, chunk_size, granularity)
+
+    def stream_range(self, symbol: str, start: int, end: int, columns: Optional[List[str]] = None,
+                     chunk_size: int = 5000, granularity: str = "1m") -> AsyncIterator[list]:
+        return self.primary.stream_range(symbol, start, end, columns, chunk_size, granularity)
+
+    def pending_writes(self) -> int:
+        # Reads use the primary only
+        return self.primary.pending_writes()
+
+    async def maybe_flush(self):
+        await self.primary.maybe_flush()
+        for mirror in self.mirrors:
+            await mirror.maybe_flush()
+
+    async def flush(self):
+        await self.primary.flush()
+        for mirror in self.mirrors:
+            await mirror.flush()
+
+    async def close(self):
+        await self.primary.close()
+        for mirror in self.mirrors:
+            await mirror.close()
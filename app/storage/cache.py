@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.storage.base import SHEET_NAMES, StorageBackend
+
+CacheKey = Tuple[str, int, int]
+CALENDAR_FIELDS = ("year", "month", "day", "hour", "minute")
+
+
+def estimate_size(rows: list) -> int:
+    # Rough resident size of a list of rows of boxed scalars (list header + pointer + value per cell)
+    return sum(64 + 40 * len(row) for row in rows)
+
+
+class ReadCache:
+    """LRU of month reads bounded by an estimated memory budget."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[CacheKey, list]" = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[list]:
+        rows = self.entries.get(key)
+        if rows is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return rows
+
+    def put(self, key: CacheKey, rows: list):
+        self.pop(key)
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = rows
+        self.sizes[key] = size
+        self.size += size
+        self._evict()
+
+    def append(self, key: CacheKey, row: list, replace_last: bool = False):
+        rows = self.entries[key]
+        added = estimate_size([row])
+        if replace_last:
+            added -= estimate_size([rows[-1]])
+            rows[-1] = row
+        else:
+            rows.append(row)
+        self.sizes[key] += added
+        self.size += added
+        self._evict()
+
+    def pop(self, key: CacheKey):
+        if key in self.entries:
+            del self.entries[key]
+            self.size -= self.sizes.pop(key)
+
+    def _evict(self):
+        while self.size > self.max_bytes and self.entries:
+            self.pop(next(iter(self.entries)))
+
+
+class CachedStore(StorageBackend):
+    """Read-through month cache in front of another backend.
+
+    Months only change through writes, so every month read (past, current or
+    still empty) stays cached until a write touches it or the memory budget
+    evicts it. The current month is kept current by appending each row the
+    pipeline writes, when the backend returns rows exactly as written
+    (``exact_reads``). Otherwise the month is marked dirty and dropped once the
+    backend's buffered writes have landed, since until then a read returns the
+    same rows anyway.
+    """
+
+    def __init__(self, backend: StorageBackend, max_bytes: int) -> None:
+        self.backend = backend
+        self.cache = ReadCache(max_bytes)
+        # Months with writes the backend hasn't made readable yet
+        self.dirty: Set[CacheKey] = set()
+        # Writes per month, so a read that raced a write isn't cached
+        self.writes: Dict[CacheKey, int] = {}
+
+    @property
+    def exact_reads(self) -> bool:
+        return self.backend.exact_reads
+
+    def _store(self, key: CacheKey, rows: list, writes: int):
+        if rows is not None and self.writes.get(key, 0) == writes:
+            self.cache.put(key, rows)
+
+    async def _flushed(self, flush):
+        # Drop the dirty months as soon as some of the buffered rows have landed
+        pending = self.backend.pending_writes()
+        await flush()
+        remaining = self.backend.pending_writes()
+        if self.dirty and (remaining < pending or remaining == 0):
+            for key in self.dirty:
+                self.cache.pop(key)
+            if remaining == 0:
+                self.dirty.clear()
+
+    async def write_row(self, symbol: str, row: dict):
+        await self.backend.write_row(symbol, row)
+
+        key = (symbol, row['year'], row['month'])
+        self.writes[key] = self.writes.get(key, 0) + 1
+        if not self.exact_reads:
+            self.dirty.add(key)
+            return
+        rows = self.cache.entries.get(key)
+        if rows is None:
+            return
+        header = rows[0] if rows else None
+        if header != list(row.keys()):
+            self.cache.pop(key)
+            return
+
+        values = [value.item() if isinstance(value, np.generic) else value
+                  for value in row.values()]
+        # Missing (NaN) values read back from the backend as None
+        values = [None if value != value else value for value in values]
+        # Rows of a month arrive in time order; a rewrite of the latest row replaces it
+        indices = [header.index(field) for field in CALENDAR_FIELDS]
+        new_time = tuple(values[i] for i in indices)
+        last_time = tuple(rows[-1][i] for i in indices) if len(rows) > 1 else None
+        if last_time is None or new_time > last_time:
+            self.cache.append(key, values)
+        elif new_time == last_time:
+            # Like the backend's upsert, missing values keep what was stored
+            values = [old if new is None else new for new, old in zip(values, rows[-1])]
+            self.cache.append(key, values, replace_last=True)
+        else:
+            self.cache.pop(key)
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        await self.backend.write_rows(symbol, rows)
+        # Bulk writes land anywhere in time, so the months they touch are simply dropped
+        for year, month in {(row['year'], row['month']) for row in rows}:
+            self.writes[(symbol, year, month)] = self.writes.get((symbol, year, month), 0) + 1
+            self.cache.pop((symbol, year, month))
+            if not self.exact_reads:
+                # Rows still buffered land later
+                self.dirty.add((symbol, year, month))
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        # Rollups are small enough to read straight from the backend
+        if granularity != "1m":
+            return await self.backend.read_month(symbol, year, month, granularity)
+        key = (symbol, year, month)
+        rows = self.cache.get(key)
+        if rows is None:
+            writes = self.writes.get(key, 0)
+            rows = await self.backend.read_month(symbol, year, month)
+            self._store(key, rows, writes)
+        return rows
+
+    async def read_year(self, symbol: str, year: int, granularity: str = "1m") -> list:
+        if granularity != "1m":
+            return await self.backend.read_year(symbol, year, granularity)
+        cached = [self.cache.get((symbol, year, month))
+                  for month in range(1, 13)]
+        if all(rows is not None for rows in cached):
+            return [{sheet_name: rows} for sheet_name, rows in zip(SHEET_NAMES, cached)]
+
+        writes = [self.writes.get((symbol, year, month), 0) for month in range(1, 13)]
+        data = await self.backend.read_year(symbol, year)
+        for tab in data or []:
+            for sheet_name, rows in tab.items():
+                if sheet_name in SHEET_NAMES:
+                    month = SHEET_NAMES.index(sheet_name) + 1
+                    self._store((symbol, year, month), rows, writes[month - 1])
+        return data
+
+    async def stream_month(self, symbol: str, year: int, month: int, chunk_size: int = 5000,
+                           granularity: str = "1m") -> AsyncIterator[list]:
+        rows = self.cache.get((symbol, year, month)) if granularity == "1m" else None
+        if rows is None:
+            # Streams are meant for reads too large to hold, so they bypass the cache
+            async for chunk in self.backend.stream_month(symbol, year, month, chunk_size, granularity):
+                yield chunk
+            return
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    def stream_range(self, symbol: str, start: int, end: int, columns: Optional[List[str]] = None,
+                     chunk_size: int = 5000, granularity: str = "1m") -> AsyncIterator[list]:
+        # Indexed local backends answer ranges directly; otherwise scan the (cached) months
+        if self.exact_reads or granularity != "1m":
+            return self.backend.stream_range(symbol, start, end, columns, chunk_size, granularity)
+        return super().stream_range(symbol, start, end, columns, chunk_size)
+
+    def pending_writes(self) -> int:
+        return self.backend.pending_writes()
+
+    async def maybe_flush(self):
+        await self._flushed(self.backend.maybe_flush)
+
+    async def flush(self):
+        await self._flushed(self.backend.flush)
+
+    async def close(self):
+        await self.backend.close()
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from app.scripts.google_async import FOLDER_MIME_TYPE, SPREADSHEET_MIME_TYPE
+
+
+class DriveRegistry:
+    """Persisted map of Drive folder and spreadsheet IDs, keyed by their path.
+
+    Folders are keyed like ``Binance/BNBUSDT`` and yearly spreadsheets like
+    ``Binance/BNBUSDT/2024``; the same entry serves reads and writes. IDs are
+    resolved through the accessor only when missing and saved to ``path``, so a
+    restart with a warm registry needs no Drive lookups. ``refresh`` re-checks
+    every entry against Drive and is meant to run in the background.
+    """
+
+    def __init__(self, google_accessor, path: str) -> None:
+        self.google_accessor = google_accessor
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.folders: Dict[str, str] = {}
+        self.spreadsheets: Dict[str, str] = {}
+        self.refreshed_at = 0.0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print("Could not read the Drive registry:", repr(e))
+            return
+        self.folders = data.get("folders", {})
+        self.spreadsheets = data.get("spreadsheets", {})
+        self.refreshed_at = data.get("refreshed_at", 0.0)
+        # Header widths size the read ranges, so they are worth keeping too
+        for spreadsheet_id, column_count in data.get("column_counts", {}).items():
+            self.google_accessor.column_counts.setdefault(spreadsheet_id, column_count)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"folders": self.folders, "spreadsheets": self.spreadsheets, "refreshed_at": self.refreshed_at,
+                "column_counts": dict(self.google_accessor.column_counts)}
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temporary_path, self.path)
+
+    async def _folder_id(self, folder_path: str) -> Optional[str]:
+        # Caller holds the lock
+        if folder_path not in self.folders:
+            parent_path, _, name = folder_path.rpartition("/")
+            parent_id = await self._folder_id(parent_path) if parent_path else None
+            folder_id = await self.google_accessor.create_or_get_folder(name, parent_id)
+            if folder_id is None:
+                return None
+            self.folders[folder_path] = folder_id
+            self.save()
+        return self.folders[folder_path]
+
+    async def folder_id(self, folder_path: str) -> Optional[str]:
+        folder_id = self.folders.get(folder_path)
+        if folder_id is not None:
+            return folder_id
+        async with self.lock:
+            return await self._folder_id(folder_path)
+
+    async def spreadsheet_id(self, folder_path: str, name, sheets: tuple = (), column_headers: tuple = ()) -> Optional[str]:
+        key = f"{folder_path}/{name}"
+        spreadsheet_id = self.spreadsheets.get(key)
+        if spreadsheet_id is not None:
+            return spreadsheet_id
+        # Held while resolving so two first writes can't create the same spreadsheet twice
+        async with self.lock:
+            if key not in self.spreadsheets:
+                spreadsheet_id = await self.google_accessor.create_or_get_spreadsheet_in_folder(
+                    name, await self._folder_id(folder_path), sheets, column_headers)
+                if spreadsheet_id is None:
+                    return None
+                self.spreadsheets[key] = spreadsheet_id
+                self.save()
+            return self.spreadsheets[key]
+
+    async def refresh(self):
+        # Pick up files renamed, moved or recreated outside this process. The lookups
+        # run on a snapshot and the result is swapped in under the lock, so readers
+        # never see a half-refreshed registry; a failed lookup raises and changes nothing
+        known_folders, known_spreadsheets = dict(self.folders), dict(self.spreadsheets)
+        folders: Dict[str, str] = {}
+        for folder_path in sorted(known_folders, key=lambda path: path.count("/")):
+            parent_path, _, name = folder_path.rpartition("/")
+            if parent_path and parent_path not in folders:
+                continue
+            folder_id = await self.google_accessor.find_file(name, FOLDER_MIME_TYPE, folders.get(parent_path))
+            if folder_id is not None:
+                folders[folder_path] = folder_id
+        spreadsheets: Dict[str, str] = {}
+        for key in known_spreadsheets:
+            folder_path, _, name = key.rpartition("/")
+            folder_id = folders.get(folder_path)
+            spreadsheet_id = await self.google_accessor.find_file(
+                name, SPREADSHEET_MIME_TYPE, folder_id) if folder_id else None
+            if spreadsheet_id is not None:
+                spreadsheets[key] = spreadsheet_id
+        async with self.lock:
+            # Entries resolved while the lookups ran are newer than them
+            folders.update({path: folder_id for path, folder_id in self.folders.items()
+                            if known_folders.get(path) != folder_id})
+            spreadsheets.update({key: spreadsheet_id for key, spreadsheet_id in self.spreadsheets.items()
+                                 if known_spreadsheets.get(key) != spreadsheet_id})
+            self.folders, self.spreadsheets = folders, spreadsheets
+            self.refreshed_at = time.time()
+            self.save()
+
+    async def refresh_forever(self, interval: float):
+        while True:
+            # The schedule survives restarts, so frequent restarts don't mean frequent refreshes
+            await asyncio.sleep(max(0.0, self.refreshed_at + interval - time.time()))
+            try:
+                await self.refresh()
+            except Exception as e:
+                print("Drive registry refresh failed:", repr(e))
+                await asyncio.sleep(interval)
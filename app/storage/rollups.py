@@ -0,0 +1,111 @@
+import math
+import re
+from typing import Dict, Iterable, Optional
+
+MINUTE = 60 * 1000
+DAY = 24 * 60 * MINUTE
+# Weekly buckets start on Monday 00:00 UTC; the epoch fell on a Thursday
+WEEK_OFFSET = 4 * DAY
+
+ROLLUP_GRANULARITIES = {
+    "5m": 5 * MINUTE,
+    "1h": 60 * MINUTE,
+    "1d": DAY,
+    "1w": 7 * DAY,
+}
+
+ROW_COUNT = "rowCount"
+CALENDAR_FIELDS = {"year", "month", "day", "hour",
+                   "minute", "dayOfWeek", "isWeekend", "partOfMonth"}
+OHLC = re.compile(r"^(spot|future)(Open|High|Low|Close)$")
+
+
+def bucket_start(timestamp: int, granularity: str) -> int:
+    size = ROLLUP_GRANULARITIES[granularity]
+    if granularity == "1w":
+        return (timestamp - WEEK_OFFSET) // size * size + WEEK_OFFSET
+    return timestamp // size * size
+
+
+def aggregation(column: str) -> str:
+    """How a 1m column is combined into a coarser bucket."""
+    if column in CALENDAR_FIELDS:
+        # Calendar fields describe the bucket's first minute
+        return "first"
+    match = OHLC.match(column)
+    if match:
+        return {"Open": "first", "High": "max", "Low": "min", "Close": "last"}[match.group(2)]
+    if column.endswith("Volume") or column.endswith("NumberOfTrades"):
+        return "sum"
+    # Depth, trader statistics, trade and capital-flow features are averaged
+    return "mean"
+
+
+def numeric(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class RollupAccumulator:
+    """Running aggregate of the 1m rows falling in one bucket.
+
+    Means keep a per-column count so missing values don't bias them; values
+    that are not numeric fall back to the last one seen.
+    """
+
+    def __init__(self, bucket: int) -> None:
+        self.bucket = bucket
+        self.last_timestamp: Optional[int] = None
+        self.row_count = 0
+        self.values: Dict[str, object] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, timestamp: int, row: dict):
+        self.row_count += 1
+        self.last_timestamp = timestamp
+        values, counts = self.values, self.counts
+        for column, value in row.items():
+            method = aggregation(column)
+            if method == "first":
+                values.setdefault(column, value)
+                continue
+            number = numeric(value)
+            if number is None:
+                if value is None or isinstance(value, float):
+                    values.setdefault(column, None)
+                else:
+                    values[column] = value
+                continue
+            current = values.get(column)
+            if current is None or isinstance(current, str):
+                values[column] = number
+                counts[column] = 1
+            elif method == "max":
+                values[column] = max(current, number)
+            elif method == "min":
+                values[column] = min(current, number)
+            elif method == "sum":
+                values[column] = current + number
+            elif method == "last":
+                values[column] = number
+            else:
+                counts[column] += 1
+                values[column] = current + (number - current) / counts[column]
+
+    def result(self) -> dict:
+        return {**self.values, ROW_COUNT: self.row_count}
+
+    @classmethod
+    def from_rows(cls, bucket: int, rows: Iterable[tuple]) -> "RollupAccumulator":
+        """Rebuild from ``(timestamp, row)`` pairs in time order."""
+        accumulator = cls(bucket)
+        for timestamp, row in rows:
+            accumulator.add(timestamp, row)
+        return accumulator
@@ -0,0 +1,101 @@
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.schema import ROW_SCHEMA
+from app.scripts.sheets_writer import SheetsWriteBuffer
+from app.storage.base import SHEET_NAMES, StorageBackend, check_granularity
+from app.storage.drive_registry import DriveRegistry
+
+
+class SheetsStore(StorageBackend):
+    """Google Sheets backend: a folder per symbol, a spreadsheet per year and a tab per month.
+
+    New spreadsheets get the ``columns`` of the row schema as their header. The
+    header of every tab already in Drive is read before the first write to it:
+    rows are laid out in that header's order, and schema columns it lacks are
+    appended to it (and to the grid), so older tabs keep their own layout.
+    """
+
+    def __init__(self, google_accessor, registry: DriveRegistry, flush_rows: int = 1000, flush_seconds: float = 300,
+                 max_attempts: int = 5, retry_delay: float = 30, rejected_path: Optional[str] = None,
+                 columns: Sequence[str] = ROW_SCHEMA.columns) -> None:
+        self.google_accessor = google_accessor
+        self.columns = tuple(columns)
+        # Header of each tab written by this process
+        self.headers: Dict[Tuple[str, str], List[str]] = {}
+        self.header_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        # Folder and spreadsheet IDs, created on first use (Crypto Exchange folder, only binance for now)
+        self.registry = registry
+        self.write_buffer = SheetsWriteBuffer(
+            google_accessor, flush_rows, flush_seconds, max_attempts, retry_delay, rejected_path)
+
+    async def get_spreadsheet_id(self, symbol: str, year: int, column_headers: tuple = ()):
+        # Reads (no headers) and writes resolve to the same registry entry
+        return await self.registry.spreadsheet_id(f"Binance/{symbol}", year,
+                                            tuple(SHEET_NAMES) if column_headers else (),
+                                            column_headers)
+
+    async def tab_header(self, spreadsheet_id: str, sheet_name: str) -> Optional[List[str]]:
+        key = (spreadsheet_id, sheet_name)
+        header = self.headers.get(key)
+        if header is not None:
+            return header
+        async with self.header_locks.setdefault(key, asyncio.Lock()):
+            if key not in self.headers:
+                header = await self.google_accessor.retrieve_header(spreadsheet_id, sheet_name)
+                if header is None:
+                    return None
+                known = set(header)
+                missing = [column for column in self.columns if column not in known]
+                if missing:
+                    if not await self.google_accessor.extend_header(spreadsheet_id, sheet_name, len(header), missing):
+                        return None
+                    if header:
+                        print(f"Added {len(missing)} columns to the header of {spreadsheet_id}/{sheet_name}")
+                    header = header + missing
+                    # Keep the widened read range across restarts
+                    self.registry.save()
+                self.headers[key] = header
+            return self.headers[key]
+
+    async def write_row(self, symbol: str, row: dict):
+        # Create or Get Reference of spreadsheet (by year)
+        spreadsheet_id = await self.get_spreadsheet_id(symbol, row['year'], self.columns)
+        if spreadsheet_id is None:
+            raise RuntimeError(f"No spreadsheet for {symbol} {row['year']}")
+        sheet_name = SHEET_NAMES[row['month'] - 1]
+        header = await self.tab_header(spreadsheet_id, sheet_name)
+        if header is None:
+            raise RuntimeError(f"Could not read the header of {spreadsheet_id}/{sheet_name}")
+        # Queue the row in the tab's column order; the write buffer appends it together with the other rows of the tab
+        self.write_buffer.add(spreadsheet_id, sheet_name, [row.get(column) for column in header])
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        for row in rows:
+            await self.write_row(symbol, row)
+        await self.write_buffer.maybe_flush()
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        # Sheets only hold the collected rows; rollups live in the local store
+        check_granularity(granularity, ("1m",))
+        spreadsheet_id = await self.get_spreadsheet_id(symbol, year)
+        return await self.google_accessor.retrieve_sheet_data(spreadsheet_id, SHEET_NAMES[month - 1])
+
+    async def read_year(self, symbol: str, year: int, granularity: str = "1m") -> list:
+        check_granularity(granularity, ("1m",))
+        spreadsheet_id = await self.get_spreadsheet_id(symbol, year)
+        return await self.google_accessor.retrieve_spreadsheet_data(spreadsheet_id, SHEET_NAMES)
+
+    async def read_years(self, symbol: str, years: List[int], granularity: str = "1m") -> List[list]:
+        check_granularity(granularity, ("1m",))
+        spreadsheet_ids = await asyncio.gather(*[self.get_spreadsheet_id(symbol, year) for year in years])
+        return await self.google_accessor.retrieve_spreadsheets_data(spreadsheet_ids, SHEET_NAMES)
+
+    def pending_writes(self) -> int:
+        return self.write_buffer.pending_rows
+
+    async def maybe_flush(self):
+        await self.write_buffer.maybe_flush()
+
+    async def flush(self):
+        await self.write_buffer.flush()
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.storage.base import RANGE_TIMESTAMP, StorageBackend, check_granularity, month_bounds, row_timestamp
+from app.storage.rollups import ROLLUP_GRANULARITIES, RollupAccumulator, bucket_start
+
+# NumPy scalars coming out of the feature code are stored as plain Python values
+for numpy_type in (np.int64, np.int32, np.int16, np.int8, np.uint64, np.uint32, np.bool_):
+    sqlite3.register_adapter(numpy_type, lambda value: value.item())
+sqlite3.register_adapter(np.float32, float)
+
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_name(symbol: str, granularity: str = "1m") -> str:
+    check_granularity(granularity)
+    return symbol if granularity == "1m" else f"{symbol}_{granularity}"
+
+
+class SQLiteStore(StorageBackend):
+    """Embedded local store: one table per symbol keyed (and clustered) on the row timestamp.
+
+    ``ts`` is the table's INTEGER PRIMARY KEY, i.e. the rowid, so range reads are
+    a B-tree seek. Feature columns are added on first sight, keeping the column
+    order of the rows as they were collected.
+
+    Each symbol also has a ``<symbol>_<granularity>`` table per rollup, updated
+    in the same transaction as the 1m write. Rows appended in time order are
+    folded into the in-memory accumulator of the open bucket; anything else
+    (restarts, rewrites, backfills) rebuilds the touched buckets from 1m rows.
+    """
+
+    exact_reads = True
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.lock = threading.Lock()
+        self.columns: Dict[str, List[str]] = {}
+        self.accumulators: Dict[Tuple[str, str], RollupAccumulator] = {}
+
+    def _table_columns(self, table: str) -> List[str]:
+        if table not in self.columns:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(table)} (ts INTEGER PRIMARY KEY)")
+            info = self.connection.execute(
+                f"PRAGMA table_info({quote(table)})").fetchall()
+            self.columns[table] = [column[1] for column in info if column[1] != "ts"]
+        return self.columns[table]
+
+    def _ensure_columns(self, table: str, keys) -> List[str]:
+        if table not in self.columns and not self.connection.execute(
+                f"PRAGMA table_info({quote(table)})").fetchall():
+            # New tables get their columns in one statement: every ALTER TABLE reparses the
+            # whole schema, which made a symbol's first write slower with each table added
+            keys = list(dict.fromkeys(keys))
+            self.connection.execute(
+                f"CREATE TABLE {quote(table)} (ts INTEGER PRIMARY KEY{''.join(', ' + quote(key) for key in keys)})")
+            self.columns[table] = keys
+            return keys
+        columns = self._table_columns(table)
+        known = set(columns)
+        for key in keys:
+            if key not in known:
+                self.connection.execute(
+                    f"ALTER TABLE {quote(table)} ADD COLUMN {quote(key)}")
+                columns.append(key)
+                known.add(key)
+        return columns
+
+    def _insert(self, table: str, timestamps: List[int], rows: List[dict]):
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        self._ensure_columns(table, keys)
+        placeholders = ", ".join("?" * (len(keys) + 1))
+        # Upsert only the given, non-null values, so partial rows (e.g. backfilled klines or
+        # a tick whose collectors failed) never wipe the features already stored for the minute
+        updates = ", ".join(f"{quote(key)} = COALESCE(excluded.{quote(key)}, {quote(key)})" for key in keys)
+        statement = f"INSERT INTO {quote(table)} (ts, {', '.join(map(quote, keys))}) VALUES ({placeholders}) " \
+            f"ON CONFLICT(ts) DO UPDATE SET {updates}"
+        self.connection.executemany(
+            statement, [[timestamp, *(row.get(key) for key in keys)] for timestamp, row in zip(timestamps, rows)])
+
+    def _rebuild_bucket(self, symbol: str, granularity: str, bucket: int) -> RollupAccumulator:
+        columns = self._table_columns(symbol)
+        cursor = self.connection.execute(
+            f"SELECT ts, {', '.join(map(quote, columns))} FROM {quote(symbol)} WHERE ts >= ? AND ts < ? ORDER BY ts",
+            (bucket, bucket + ROLLUP_GRANULARITIES[granularity]))
+        return RollupAccumulator.from_rows(bucket, ((row[0], dict(zip(columns, row[1:]))) for row in cursor))
+
+    def _update_rollups(self, symbol: str, timestamps: List[int], rows: List[dict], latest: Optional[int]):
+        # Pure in-order appends can be folded in; anything else rebuilds from 1m rows
+        appended = latest is None or min(timestamps) > latest
+        ordered = sorted(zip(timestamps, rows), key=lambda item: item[0])
+        for granularity in ROLLUP_GRANULARITIES:
+            buckets: Dict[int, list] = {}
+            for timestamp, row in ordered:
+                buckets.setdefault(bucket_start(timestamp, granularity), []).append((timestamp, row))
+
+            key = (symbol, granularity)
+            results = []
+            for bucket, items in buckets.items():
+                accumulator = self.accumulators.get(key)
+                if appended and accumulator is not None and accumulator.bucket == bucket:
+                    for timestamp, row in items:
+                        accumulator.add(timestamp, row)
+                else:
+                    accumulator = self._rebuild_bucket(symbol, granularity, bucket)
+                    current = self.accumulators.get(key)
+                    if current is None or bucket >= current.bucket:
+                        self.accumulators[key] = accumulator
+                results.append(accumulator.result())
+            self._insert(table_name(symbol, granularity), list(buckets), results)
+
+    def _write_rows(self, symbol: str, rows: List[dict]):
+        timestamps = [row_timestamp(row) for row in rows]
+        with self.lock, self.connection:
+            self._ensure_columns(symbol, [key for row in rows for key in row])
+            latest = self.connection.execute(
+                f"SELECT MAX(ts) FROM {quote(symbol)}").fetchone()[0]
+            self._insert(symbol, timestamps, rows)
+            self._update_rollups(symbol, timestamps, rows, latest)
+
+    def _select(self, table: str, start: int, end: int) -> list:
+        with self.lock:
+            columns = self._table_columns(table)
+            if not columns:
+                return []
+            cursor = self.connection.execute(
+                f"SELECT {', '.join(map(quote, columns))} FROM {quote(table)} WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start, end))
+            return [list(columns), *map(list, cursor.fetchall())]
+
+    async def write_row(self, symbol: str, row: dict):
+        await asyncio.to_thread(self._write_rows, symbol, [row])
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        if rows:
+            await asyncio.to_thread(self._write_rows, symbol, rows)
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        return await asyncio.to_thread(self._select, table_name(symbol, granularity), *month_bounds(year, month))
+
+    def _projection(self, table: str, columns: Optional[List[str]]) -> List[str]:
+        with self.lock:
+            available = list(self._table_columns(table))
+        if columns is None:
+            return available
+        unknown = [column for column in columns if column not in available]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {', '.join(unknown)}")
+        return list(columns)
+
+    async def _stream(self, table: str, start: int, end: int, selected: List[str], header: list,
+                      chunk_size: int) -> AsyncIterator[list]:
+        # A dedicated connection per stream: WAL readers don't block the writer
+        connection = await asyncio.to_thread(sqlite3.connect, self.path, check_same_thread=False)
+        try:
+            cursor = await asyncio.to_thread(
+                connection.execute,
+                f"SELECT {', '.join(map(quote, selected))} FROM {quote(table)} WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start, end))
+            chunk = [header]
+            while True:
+                rows = await asyncio.to_thread(cursor.fetchmany, chunk_size)
+                chunk.extend(map(list, rows))
+                if chunk:
+                    yield chunk
+                if len(rows) < chunk_size:
+                    break
+                chunk = []
+        finally:
+            connection.close()
+
+    async def stream_month(self, symbol: str, year: int, month: int, chunk_size: int = 5000,
+                           granularity: str = "1m") -> AsyncIterator[list]:
+        table = table_name(symbol, granularity)
+        columns = self._projection(table, None)
+        if not columns:
+            return
+        async for chunk in self._stream(table, *month_bounds(year, month), columns, columns, chunk_size):
+            yield chunk
+
+    async def stream_range(self, symbol: str, start: int, end: int, columns: Optional[List[str]] = None,
+                           chunk_size: int = 5000, granularity: str = "1m") -> AsyncIterator[list]:
+        # The ts primary key bounds the scan to the requested span; only the projected columns are read
+        table = table_name(symbol, granularity)
+        columns = self._projection(table, columns)
+        async for chunk in self._stream(table, start, end, ["ts", *columns], [RANGE_TIMESTAMP, *columns], chunk_size):
+            yield chunk
+
+    async def close(self):
+        with self.lock:
+            self.connection.close()
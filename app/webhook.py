@@ -1,21 +1,100 @@
-from fastapi import Request, WebSocket
-from typing import List
+import asyncio
+from typing import Dict, List, Literal, Optional, Set
+
+from fastapi import WebSocket
+
+from app.serialization import dumps
+
+SlowConsumerPolicy = Literal["drop_oldest", "disconnect"]
+
+
+class Subscriber:
+    """One WebSocket client with its own bounded outgoing queue and sender task."""
+
+    def __init__(self, websocket: WebSocket, symbols: Optional[Set[str]], columns: Optional[List[str]],
+                 queue_size: int) -> None:
+        self.websocket = websocket
+        self.symbols = symbols
+        self.columns = columns
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def wants(self, symbol: str) -> bool:
+        return self.symbols is None or symbol in self.symbols
+
+    async def send_forever(self):
+        while True:
+            message = await self.queue.get()
+            await self.websocket.send_text(message)
+
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Pushes every collected row to the WebSocket subscribers interested in it.
+
+    ``publish`` never waits on a client: messages go to each subscriber's
+    bounded queue and a per-client task sends them, so clients are served
+    concurrently. When a queue is full the slow consumer either loses its
+    oldest pending message (``drop_oldest``) or is disconnected.
+    """
 
-    async def connect(self, websocket: WebSocket):
+    def __init__(self, queue_size: int = 100, policy: SlowConsumerPolicy = "drop_oldest"):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.active_connections: List[Subscriber] = []
+
+    async def connect(self, websocket: WebSocket, symbols: Optional[List[str]] = None,
+                      columns: Optional[List[str]] = None) -> Subscriber:
         await websocket.accept()
-        self.active_connections.append(websocket)
-
-    async def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-            #self.disconnect(connection)
-    
-def get_websocket(request: Request) -> WebSocketManager:
-    return request.app.state.websocket_manager
\ No newline at end of file
+        subscriber = Subscriber(websocket, set(symbols) if symbols else None, columns, self.queue_size)
+        subscriber.task = asyncio.create_task(subscriber.send_forever())
+        self.active_connections.append(subscriber)
+        return subscriber
+
+    async def disconnect(self, subscriber: Subscriber):
+        if subscriber in self.active_connections:
+            self.active_connections.remove(subscriber)
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+            await asyncio.gather(subscriber.task, return_exceptions=True)
+
+    async def _close_slow(self, subscriber: Subscriber):
+        await self.disconnect(subscriber)
+        try:
+            await subscriber.websocket.close(code=1008, reason="Slow consumer")
+        except Exception:
+            pass
+
+    def publish(self, symbol: str, row: dict):
+        # Serialized once per distinct column selection, not once per client
+        messages: Dict[Optional[tuple], str] = {}
+        for subscriber in list(self.active_connections):
+            if not subscriber.wants(symbol):
+                continue
+            if subscriber.task is not None and subscriber.task.done():
+                # The sender died with the connection
+                asyncio.create_task(self.disconnect(subscriber))
+                continue
+
+            key = tuple(subscriber.columns) if subscriber.columns else None
+            if key not in messages:
+                data = row if key is None else {column: row.get(column) for column in key}
+                messages[key] = dumps({"symbol": symbol, "data": data}).decode()
+
+            try:
+                subscriber.queue.put_nowait(messages[key])
+            except asyncio.QueueFull:
+                if self.policy == "disconnect":
+                    asyncio.create_task(self._close_slow(subscriber))
+                    continue
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(messages[key])
+                subscriber.dropped += 1
+
+    async def close(self):
+        for subscriber in list(self.active_connections):
+            await self.disconnect(subscriber)
+
+
+def get_websocket(websocket: WebSocket) -> WebSocketManager:
+    return websocket.app.state.websocket_manager
@@ -0,0 +1,124 @@
+"""Time the collector feature functions and one pipeline tick on recorded payloads.
+
+    python -m benchmarks.bench_collectors --save benchmarks/baseline.json
+    python -m benchmarks.bench_collectors --baseline benchmarks/baseline.json --threshold 0.2
+
+Runs offline: Binance is replaced by the fixtures in ``benchmarks/fixtures``.
+With ``--baseline``, exits with status 1 when any case's fastest run is more
+than ``threshold`` slower than the saved one (the minimum is far less noisy
+than the median on a shared machine). Baselines are machine specific, so save
+one on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from app.pipeline import DataCollectorPipeline
+from app.scripts.data_collectors import get_klines, get_mdd, get_recent_trades, parse_klines
+from app.scripts.order_book_features import compute_depth_features, parse_levels
+from app.scripts.trade_features import compute_trade_features, parse_trades
+from benchmarks.fixtures import FixtureHTTP, load_fixtures
+
+
+def time_sync(fn: Callable, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def time_async(fn: Callable, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def build_cases(fixtures: dict):
+    http = FixtureHTTP(fixtures)
+    app = SimpleNamespace(state=SimpleNamespace(binance_http=http, order_books=None, feature_pool=None,
+                                                trade_tracker=None))
+    pipeline = DataCollectorPipeline(app, ["BNBUSDT"])
+    sync_cases = {}
+    for trade in ("spot", "future"):
+        depth, trades, klines = (fixtures[f"{trade}_depth"], fixtures[f"{trade}_trades"],
+                                 fixtures[f"{trade}_klines"])
+        sync_cases[f"depth_features[{trade}]"] = lambda depth=depth, trade=trade: compute_depth_features(
+            parse_levels(depth["bids"]), parse_levels(depth["asks"]), trade)
+        sync_cases[f"trade_features[{trade}]"] = lambda trades=trades, trade=trade: compute_trade_features(
+            parse_trades(trades), trade)
+        # A backfill page; live ticks parse a single row
+        sync_cases[f"parse_klines[{trade},1000]"] = lambda klines=klines, trade=trade: parse_klines(klines, trade)
+    async_cases = {
+        "get_mdd[spot]": lambda: get_mdd(http, "BNBUSDT"),
+        "get_recent_trades[spot]": lambda: get_recent_trades(http, "BNBUSDT"),
+        "get_klines[spot,1]": lambda: get_klines(http, "BNBUSDT"),
+        "pipeline_tick": lambda: pipeline.tasks("BNBUSDT"),
+    }
+    return sync_cases, async_cases
+
+
+def run(repeat: int, warmup: int) -> Dict[str, dict]:
+    sync_cases, async_cases = build_cases(load_fixtures())
+    results = {}
+    for name, fn in sync_cases.items():
+        time_sync(fn, warmup)
+        results[name] = time_sync(fn, repeat)
+    for name, fn in async_cases.items():
+        asyncio.run(time_async(fn, warmup))
+        results[name] = asyncio.run(time_async(fn, repeat))
+    return {name: {"median": statistics.median(timings), "min": min(timings)}
+            for name, timings in results.items()}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and result["min"] > baseline[name]["min"] * (1 + threshold):
+            regressions.append(f"{name}: {result['min'] * 1000:.3f} ms vs "
+                               f"{baseline[name]['min'] * 1000:.3f} ms baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--save", help="Write the results as a baseline")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown of a case's fastest run, as a fraction")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.warmup)
+    print(f"{'case':32} {'median ms':>10} {'min ms':>10}")
+    for name, result in results.items():
+        print(f"{name:32} {result['median'] * 1000:10.3f} {result['min'] * 1000:10.3f}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions past {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions past {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Local stand-in for the Binance REST endpoints the collectors use.
+
+Serves the synthetic payloads of ``benchmarks.fixtures`` with injected latency,
+jitter and errors, so load tests exercise the real HTTP client, rate limiter
+and parsing without touching Binance.
+"""
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from benchmarks.fixtures import ENDPOINTS, synthetic_payloads
+
+
+def create_app(latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0,
+               trades_per_tick: int = 300, seed: int = 0) -> Starlette:
+    """``latency``/``jitter`` are the mean and standard deviation of the response delay (seconds);
+    ``error_rate`` is the share of requests answered with a 503."""
+    rng = random.Random(seed)
+    payloads = {ENDPOINTS[name]: payload for name, payload in synthetic_payloads(seed=seed).items()}
+    # Fixed responses are encoded once, so the server stays cheap next to the collectors
+    encoded = {path: json.dumps(payload).encode() for path, payload in payloads.items()}
+    error = json.dumps({"code": -1001, "msg": "Internal error; unable to process your request."}).encode()
+
+    def agg_trades(path: str, from_id: int) -> bytes:
+        # Trades since the caller's cursor: a steady trickle per tick
+        template = payloads[path][-1]
+        now = int(time.time() * 1000)
+        rows = [{**template, "a": from_id + i, "f": (from_id + i) * 2, "l": (from_id + i) * 2 + 1,
+                 "T": now - (trades_per_tick - i) * 10, "m": rng.random() < 0.5}
+                for i in range(trades_per_tick)]
+        return json.dumps(rows).encode()
+
+    async def endpoint(request: Request) -> Response:
+        delay = rng.gauss(latency, jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path = request.url.path
+        if path not in encoded:
+            return Response(b'{"code":-1100,"msg":"Unknown endpoint."}', 404, media_type="application/json")
+        if rng.random() < error_rate:
+            return Response(error, 503, media_type="application/json")
+        params = request.query_params
+        if path.endswith("/klines"):
+            limit = int(params.get("limit", 500))
+            content = json.dumps(payloads[path][-limit:]).encode()
+        elif path.endswith("/aggTrades") and "fromId" in params:
+            content = agg_trades(path, int(params["fromId"]))
+        else:
+            content = encoded[path]
+        return Response(content, media_type="application/json")
+
+    return Starlette(routes=[Route("/{path:path}", endpoint)])
+
+
+def serve(port: int, **options):
+    uvicorn.run(create_app(**options), host="127.0.0.1", port=port, log_level="warning")
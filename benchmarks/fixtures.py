@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Fixture name -> Binance endpoint path it was recorded from
+ENDPOINTS = {
+    "spot_depth": "/api/v3/depth",
+    "future_depth": "/fapi/v1/depth",
+    "spot_trades": "/api/v3/trades",
+    "future_trades": "/fapi/v1/trades",
+    "spot_agg_trades": "/api/v3/aggTrades",
+    "future_agg_trades": "/fapi/v1/aggTrades",
+    "spot_klines": "/api/v3/klines",
+    "future_klines": "/fapi/v1/klines",
+    "capital_flow": "/bapi/earn/v1/public/indicator/capital-flow/info",
+    "top_accounts": "/futures/data/topLongShortAccountRatio",
+    "top_positions": "/futures/data/topLongShortPositionRatio",
+    "global_accounts": "/futures/data/globalLongShortAccountRatio",
+}
+
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, f"{name}.json.gz")
+
+
+def save_fixture(name: str, payload):
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with gzip.open(fixture_path(name), "wt") as file:
+        json.dump(payload, file, separators=(",", ":"))
+
+
+def load_fixtures() -> Dict[str, object]:
+    missing = [name for name in ENDPOINTS if not os.path.exists(fixture_path(name))]
+    if missing:
+        raise FileNotFoundError(f"Missing fixtures {missing}; run `python -m benchmarks.record_fixtures`")
+    fixtures = {}
+    for name in ENDPOINTS:
+        with gzip.open(fixture_path(name), "rt") as file:
+            fixtures[name] = json.load(file)
+    return fixtures
+
+
+def synthetic_payloads(symbol: str = "BNBUSDT", price: float = 300.0, seed: int = 0,
+                       now: Optional[int] = None) -> Dict[str, object]:
+    """Payloads shaped like Binance's responses (string numbers, same fields), for use without network."""
+    rng = np.random.default_rng(seed)
+    now = now if now is not None else int(time.time() * 1000)
+    tick = round(price * 1e-4, 8)
+
+    def depth():
+        # Quantities are heavy tailed, like a real book's few large resting orders
+        bids = [[f"{price - (i + 1) * tick:.8f}", f"{q:.8f}"] for i, q in enumerate(rng.lognormal(0, 1.5, 1000))]
+        asks = [[f"{price + (i + 1) * tick:.8f}", f"{q:.8f}"] for i, q in enumerate(rng.lognormal(0, 1.5, 1000))]
+        return {"lastUpdateId": int(rng.integers(1e9, 1e10)), "E": now, "T": now, "bids": bids, "asks": asks}
+
+    def walk(count: int):
+        return price * np.exp(np.cumsum(rng.normal(0, 1e-4, count)))
+
+    def trades(spot: bool):
+        prices, times = walk(1000), now - 60000 + np.sort(rng.integers(0, 60000, 1000))
+        rows = []
+        for i, (p, q, t) in enumerate(zip(prices, rng.lognormal(-1, 1.5, 1000), times)):
+            row = {"id": 1000000 + i, "price": f"{p:.8f}", "qty": f"{q:.8f}", "quoteQty": f"{p * q:.8f}",
+                   "time": int(t), "isBuyerMaker": bool(rng.random() < 0.5)}
+            if spot:
+                row["isBestMatch"] = True
+            rows.append(row)
+        return rows
+
+    def agg_trades(spot: bool):
+        rows = []
+        for row in trades(spot):
+            agg = {"a": row["id"], "p": row["price"], "q": row["qty"], "f": row["id"] * 2, "l": row["id"] * 2 + 1,
+                   "T": row["time"], "m": row["isBuyerMaker"]}
+            if spot:
+                agg["M"] = True
+            rows.append(agg)
+        return rows
+
+    def klines():
+        # One page of 1m bars closing before now
+        open_times = (now // 60000 - 1000 + np.arange(1000)) * 60000
+        closes = walk(1000)
+        rows = []
+        for open_time, close, volume in zip(open_times, closes, rng.lognormal(5, 1, 1000)):
+            high, low = close * (1 + abs(rng.normal(0, 5e-4))), close * (1 - abs(rng.normal(0, 5e-4)))
+            rows.append([int(open_time), f"{close:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close:.8f}",
+                         f"{volume:.8f}", int(open_time) + 59999, f"{volume * close:.8f}",
+                         int(rng.integers(100, 5000)), f"{volume / 2:.8f}", f"{volume * close / 2:.8f}", "0"])
+        return rows
+
+    def long_short(kind: str):
+        ratio = float(rng.uniform(0.5, 2))
+        long_share = ratio / (1 + ratio)
+        return [{"symbol": symbol, "longShortRatio": f"{ratio:.4f}", f"long{kind}": f"{long_share:.4f}",
+                 f"short{kind}": f"{1 - long_share:.4f}", "timestamp": now - now % 300000}]
+
+    flows = {name: f"{value:.8f}" for name, value in zip(
+        ("smallInflow", "mediumInflow", "largeInflow", "smallOutflow", "mediumOutflow", "largeOutflow"),
+        rng.lognormal(10, 1, 6))}
+    capital_flow = {"code": "000000", "data": {"id": 1, "capitalFlowRuleId": 1, "symbol": symbol,
+                                               "capitalFlowPeriod": "MINUTE_15", **flows,
+                                               "createTimestamp": now, "updateTimestamp": now}}
+
+    return {"spot_depth": depth(), "future_depth": depth(),
+            "spot_trades": trades(True), "future_trades": trades(False),
+            "spot_agg_trades": agg_trades(True), "future_agg_trades": agg_trades(False),
+            "spot_klines": klines(), "future_klines": klines(),
+            "capital_flow": capital_flow,
+            "top_accounts": long_short("Account"), "top_positions": long_short("Position"),
+            "global_accounts": long_short("Account")}
+
+
+class FixtureHTTP:
+    """Stands in for ``BinanceHTTP``: answers each request from the fixture of its endpoint."""
+
+    def __init__(self, fixtures: Dict[str, object]) -> None:
+        self.payloads = {ENDPOINTS[name]: payload for name, payload in fixtures.items()}
+        self.calls = 0
+
+    async def get(self, host: str, path: str, params: Optional[dict] = None):
+        self.calls += 1
+        payload = self.payloads.get(path)
+        if isinstance(payload, list) and params and "limit" in params:
+            # Newest rows last, as Binance returns them
+            return payload[-int(params["limit"]):]
+        return payload
+
+    async def close(self):
+        pass
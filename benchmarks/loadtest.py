@@ -0,0 +1,172 @@
+"""Measure how many symbols one instance can collect per tick.
+
+    python -m benchmarks.loadtest [--symbols 10 100 500] [--ticks 3] [--latency 0.05 --jitter 0.02]
+                                  [--error-rate 0.01] [--workers 4] [--rate-limits]
+                                  [--deadline 5] [--hedge]
+
+Starts ``benchmarks.fake_binance`` on a local port and, for each symbol count,
+runs ``DataCollectorPipeline.run`` over that many synthetic symbols in a fresh
+process (SQLite storage, trade tracker and feature pool as configured; the
+local order books need the Binance streams and stay off, so depth comes from
+REST snapshots). One warm-up tick creates the tables and trade cursors, then
+each measured tick reports wall time, CPU time of the collector process, peak
+RSS, failed symbols, collector calls cut off at their deadline (``--deadline``)
+and the request weight it spent. Binance's weight budgets
+are only enforced with ``--rate-limits``; without them the numbers show the
+instance's own capacity, and the weight column shows how far the budgets would
+have to stretch.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import resource
+import socket
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_binance import serve
+
+TICK_SECONDS = 60
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Fake Binance server did not start on port {port}")
+
+
+async def run_ticks(symbol_count: int, port: int, options: dict) -> dict:
+    # Imported here so only the collector processes load the app
+    from app.metrics import BINANCE_WEIGHT, COLLECTOR_DEADLINE_MISSES, TICK_ERRORS
+    from app.pipeline import DataCollectorPipeline
+    from app.scripts.binance_http import FUTURES_HOST, SPOT_HOST, BinanceHTTP
+    from app.scripts.feature_pool import FeaturePool
+    from app.scripts.rate_limiter import RateLimiter
+    from app.scripts.trade_tracker import TradeTracker
+    from app.storage.sqlite import SQLiteStore
+    from app.webhook import WebSocketManager
+
+    symbols = [f"SYM{i:04d}USDT" for i in range(symbol_count)]
+    base_url = f"http://127.0.0.1:{port}"
+    limiter = RateLimiter() if options["rate_limits"] else RateLimiter(10 ** 9, 10 ** 9, 10 ** 9)
+    http = BinanceHTTP(limiter=limiter, hosts={SPOT_HOST: base_url, FUTURES_HOST: base_url}, hedge=options["hedge"])
+    feature_pool = FeaturePool(options["workers"]) if options["workers"] > 0 else None
+    if feature_pool is not None:
+        await feature_pool.warm_up()
+    directory = tempfile.mkdtemp(prefix="loadtest-")
+    state = SimpleNamespace(binance_http=http, order_books=None, feature_pool=feature_pool,
+                            trade_tracker=TradeTracker(http) if options["trade_tracker"] else None,
+                            storage=SQLiteStore(os.path.join(directory, "data.sqlite")),
+                            websocket_manager=WebSocketManager())
+    pipeline = DataCollectorPipeline(SimpleNamespace(state=state), symbols, deadline=options["deadline"])
+
+    async def tick() -> dict:
+        weight = dict(BINANCE_WEIGHT.values)
+        errors = sum(TICK_ERRORS.values.values())
+        misses = sum(COLLECTOR_DEADLINE_MISSES.values.values())
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            await pipeline.run()
+        except RuntimeError:
+            # Failed symbols are counted below
+            pass
+        return {"wall": time.perf_counter() - wall, "cpu": time.process_time() - cpu,
+                "failed": sum(TICK_ERRORS.values.values()) - errors,
+                "stale": sum(COLLECTOR_DEADLINE_MISSES.values.values()) - misses,
+                "weight": {key[0]: value - weight.get(key, 0) for key, value in BINANCE_WEIGHT.values.items()}}
+
+    try:
+        await tick()
+        ticks = [await tick() for _ in range(options["ticks"])]
+    finally:
+        await state.storage.close()
+        await http.close()
+        if feature_pool is not None:
+            feature_pool.close()
+    return {"symbols": symbol_count, "ticks": ticks,
+            # KiB on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def run_size(symbol_count: int, port: int, options: dict, results):
+    results.put(asyncio.run(run_ticks(symbol_count, port, options)))
+
+
+def report(result: dict):
+    ticks = result["ticks"]
+    walls = [tick["wall"] for tick in ticks]
+    weight = {bucket: max(tick["weight"].get(bucket, 0) for tick in ticks)
+              for bucket in ("spot", "futures", "futures_data")}
+    print(f"{result['symbols']:>8} {statistics.median(walls):>10.2f} {max(walls):>9.2f} "
+          f"{statistics.median(tick['cpu'] for tick in ticks):>9.2f} {result['peak_rss_mb']:>9.0f} "
+          f"{max(tick['failed'] for tick in ticks):>7} {max(tick['stale'] for tick in ticks):>6} "
+          f"{weight['spot']:>7.0f} {weight['futures']:>8.0f} {weight['futures_data']:>8.0f} "
+          f"{'yes' if max(walls) < TICK_SECONDS else 'NO':>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response delay (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Standard deviation of the delay (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--trades-per-tick", type=int, default=300, help="New aggregated trades per symbol per tick")
+    parser.add_argument("--workers", type=int, default=0, help="Feature worker processes (FEATURE_WORKERS)")
+    parser.add_argument("--no-trade-tracker", dest="trade_tracker", action="store_false")
+    parser.add_argument("--rate-limits", action="store_true", help="Enforce Binance's request weight budgets")
+    parser.add_argument("--deadline", type=float, default=0,
+                        help="Collector group deadline (COLLECTOR_DEADLINE_SECONDS); 0 waits for every call")
+    parser.add_argument("--hedge", action="store_true", help="Hedge slow requests (BINANCE_HEDGE_REQUESTS)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    port = free_port()
+    server = context.Process(target=serve, args=(port,), daemon=True,
+                             kwargs={"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+                                     "trades_per_tick": args.trades_per_tick})
+    server.start()
+    options = {"ticks": args.ticks, "workers": args.workers, "trade_tracker": args.trade_tracker,
+               "rate_limits": args.rate_limits, "deadline": args.deadline, "hedge": args.hedge}
+    try:
+        wait_for_port(port)
+        print(f"latency {args.latency}s ± {args.jitter}s, error rate {args.error_rate:.1%}, "
+              f"{args.ticks} ticks per size; weight is per tick")
+        print(f"{'symbols':>8} {'median s':>10} {'max s':>9} {'cpu s':>9} {'rss MB':>9} {'failed':>7} {'stale':>6} "
+              f"{'spot':>7} {'futures':>8} {'fdata':>8} {'fits':>5}")
+        for symbol_count in args.symbols:
+            # A fresh process per size, so peak RSS belongs to that size alone
+            results = context.Queue()
+            worker = context.Process(target=run_size, args=(symbol_count, port, options, results))
+            worker.start()
+            while True:
+                try:
+                    result = results.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not worker.is_alive():
+                        raise RuntimeError(f"Load test with {symbol_count} symbols crashed")
+            worker.join()
+            report(result)
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Record the Binance payloads the benchmarks replay.
+
+    python -m benchmarks.record_fixtures [--symbol BNBUSDT]
+    python -m benchmarks.record_fixtures --synthetic
+    python -m benchmarks.record_fixtures --check
+
+Recording needs network access and overwrites ``benchmarks/fixtures``;
+``--synthetic`` writes generated payloads of the same shape instead. After
+recording (or with ``--check``, on the fixtures already there) the payloads
+are run through the collectors and every field that doesn't match the row
+schema's declared columns is reported; the exit status is 1 if there is any.
+"""
+import argparse
+import asyncio
+import sys
+from typing import List
+
+from app.schema import ROW_SCHEMA
+from app.scripts.binance_http import FUTURES_HOST, SPOT_HOST, BinanceHTTP
+from app.scripts.data_collectors import get_cfd, get_klines, get_mdd, get_recent_trades, get_traders_stat
+from benchmarks.fixtures import ENDPOINTS, FixtureHTTP, load_fixtures, save_fixture, synthetic_payloads
+
+
+def request_params(name: str, symbol: str) -> dict:
+    if name.endswith("klines"):
+        return {"symbol": symbol, "interval": "1m", "limit": 1000}
+    if name == "capital_flow":
+        return {"symbol": symbol, "period": "MINUTE_15"}
+    if name in ("top_accounts", "top_positions", "global_accounts"):
+        return {"symbol": symbol, "period": "5m", "limit": 1}
+    # Full 1000-level books and 1000-trade lists
+    return {"symbol": symbol, "limit": 1000}
+
+
+async def record(symbol: str):
+    http = BinanceHTTP()
+    try:
+        for name, path in ENDPOINTS.items():
+            host = FUTURES_HOST if path.startswith(("/fapi/", "/futures/")) else SPOT_HOST
+            payload = await http.get(host, path, request_params(name, symbol))
+            if payload is None:
+                raise RuntimeError(f"Could not record {name} from {host}{path}")
+            save_fixture(name, payload)
+            print(f"Recorded {name}")
+    finally:
+        await http.close()
+
+
+async def check_schema(symbol: str) -> List[str]:
+    http = FixtureHTTP(load_fixtures())
+    spot_klines, future_klines = await get_klines(http, symbol), await get_klines(http, symbol, "future")
+    results = {
+        "spot_klines": spot_klines[0] if spot_klines else None,
+        "future_klines": future_klines[0] if future_klines else None,
+        "capital_flow": await get_cfd(http, symbol),
+        "spot_market_depth": await get_mdd(http, symbol),
+        "future_market_depth": await get_mdd(http, symbol, "future"),
+        "top_accounts": await get_traders_stat(http, symbol, "topAccounts"),
+        "top_positions": await get_traders_stat(http, symbol, "topPositions"),
+        "global_accounts": await get_traders_stat(http, symbol, "globalAccounts"),
+        "spot_recent_trades": await get_recent_trades(http, symbol),
+        "future_recent_trades": await get_recent_trades(http, symbol, "future"),
+    }
+    problems = []
+    for group, data in results.items():
+        if data is None:
+            problems.append(f"{group}: no data")
+            continue
+        undeclared, missing = ROW_SCHEMA.mismatch(group, data)
+        if undeclared:
+            problems.append(f"{group}: fields not in the schema: {', '.join(sorted(undeclared))}")
+        if missing:
+            problems.append(f"{group}: schema columns not returned: {', '.join(missing)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", default="BNBUSDT")
+    parser.add_argument("--synthetic", action="store_true", help="Write generated payloads (no network)")
+    parser.add_argument("--check", action="store_true", help="Only check the existing fixtures against the schema")
+    args = parser.parse_args()
+    if args.synthetic:
+        for name, payload in synthetic_payloads(args.symbol).items():
+            save_fixture(name, payload)
+        print("Wrote synthetic fixtures")
+    elif not args.check:
+        asyncio.run(record(args.symbol))
+
+    problems = asyncio.run(check_schema(args.symbol))
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print(f"Payloads match row schema v{ROW_SCHEMA.version}")
+
+
+if __name__ == "__main__":
+    main()
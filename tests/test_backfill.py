@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List, Set
+
+from app.backfill import INTERVAL_MS, PAGE_LIMIT, BackfillEngine
+
+PAGE = INTERVAL_MS["1m"] * PAGE_LIMIT
+KEY = "BNBUSDT:1m"
+
+
+class MemoryStorage:
+    def __init__(self) -> None:
+        self.written: List[dict] = []
+
+    async def write_rows(self, symbol: str, rows: List[dict]):
+        self.written.extend(rows)
+
+    async def maybe_flush(self):
+        pass
+
+
+class FakeEngine(BackfillEngine):
+    """Serves one row per page, failing the pages in ``failing`` once each."""
+
+    def __init__(self, state_path: str, failing: Set[int] = frozenset(), delay: float = 0) -> None:
+        super().__init__(SimpleNamespace(state=SimpleNamespace(storage=MemoryStorage())), state_path,
+                         requests_per_second=0)
+        self.failing = set(failing)
+        self.delay = delay
+        self.fetched: List[int] = []
+
+    async def fetch_page(self, symbol: str, interval: str, start: int, end: int):
+        await asyncio.sleep(self.delay)
+        self.fetched.append(start)
+        if start in self.failing:
+            self.failing.discard(start)
+            return None
+        return [{"ts": start}]
+
+
+def test_failed_job_resumes_from_its_checkpoint(tmp_path):
+    state_path = str(tmp_path / "backfill.json")
+
+    async def first_run():
+        engine = FakeEngine(state_path, failing={2 * PAGE})
+        engine.start(["BNBUSDT"], 0, 5 * PAGE)
+        await asyncio.gather(*engine.tasks.values())
+        return engine.jobs[KEY]
+
+    job = asyncio.run(first_run())
+    assert job["status"] == "failed"
+    assert job["next"] == 2 * PAGE
+
+    async def second_run():
+        # A new process picks the failed job up again
+        engine = FakeEngine(state_path)
+        engine.resume()
+        await asyncio.gather(*engine.tasks.values())
+        return engine
+
+    engine = asyncio.run(second_run())
+    assert sorted(engine.fetched) == [2 * PAGE, 3 * PAGE, 4 * PAGE]
+    assert engine.jobs[KEY]["status"] == "done"
+    assert engine.jobs[KEY]["next"] == 5 * PAGE
+
+
+def test_request_for_a_running_job_is_refused(tmp_path):
+    async def run():
+        engine = FakeEngine(str(tmp_path / "backfill.json"), delay=0.01)
+        started, busy = engine.start(["BNBUSDT"], 0, 2 * PAGE)
+        assert started == [KEY] and busy == []
+        started, busy = engine.start(["BNBUSDT"], 10 * PAGE, 12 * PAGE)
+        assert started == [] and busy == [KEY]
+        await asyncio.gather(*engine.tasks.values())
+        return engine
+
+    engine = asyncio.run(run())
+    assert (engine.jobs[KEY]["start"], engine.jobs[KEY]["end"]) == (0, 2 * PAGE)
+    assert sorted(engine.fetched) == [0, PAGE]
+
+
+def test_request_for_a_failed_job_extends_it_and_keeps_the_checkpoint(tmp_path):
+    async def run():
+        engine = FakeEngine(str(tmp_path / "backfill.json"), failing={PAGE})
+        engine.start(["BNBUSDT"], 0, 3 * PAGE)
+        await asyncio.gather(*engine.tasks.values())
+        assert engine.jobs[KEY]["next"] == PAGE
+        engine.fetched.clear()
+        engine.start(["BNBUSDT"], 2 * PAGE, 4 * PAGE)
+        await asyncio.gather(*engine.tasks.values())
+        return engine
+
+    engine = asyncio.run(run())
+    job = engine.jobs[KEY]
+    assert (job["start"], job["end"], job["next"], job["status"]) == (0, 4 * PAGE, 4 * PAGE, "done")
+    assert sorted(engine.fetched) == [PAGE, 2 * PAGE, 3 * PAGE]
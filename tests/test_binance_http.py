@@ -0,0 +1,96 @@
+import asyncio
+from typing import List
+
+import httpx
+
+from app.metrics import BINANCE_HEDGES
+from app.scripts.binance_http import BinanceHTTP, RecentLatencies, latency_key
+from app.scripts.rate_limiter import RateLimiter
+
+HOST = "https://binance.test"
+PATH = "/api/v3/klines"
+PARAMS = {"symbol": "BNBUSDT", "limit": 5}
+
+
+class SlowLimiter(RateLimiter):
+    """Holds every request for ``wait`` seconds before it may go out."""
+
+    def __init__(self, wait: float) -> None:
+        super().__init__()
+        self.wait = wait
+
+    async def acquire(self, path, params=None):
+        await asyncio.sleep(self.wait)
+        return None, 0
+
+
+def binance_http(delays: List[float], limiter=None, tokens: float = 5.0) -> BinanceHTTP:
+    """A client whose n-th request is answered after ``delays[n]`` seconds with ``[n]``."""
+    calls = []
+
+    async def handler(request):
+        number = len(calls)
+        calls.append(request)
+        await asyncio.sleep(delays[number])
+        return httpx.Response(200, json=[number])
+
+    http = BinanceHTTP(limiter=limiter, hedge=True)
+    http.clients[HOST] = httpx.AsyncClient(base_url=HOST, transport=httpx.MockTransport(handler))
+    http.calls = calls
+    http.hedge_tokens = tokens
+    # Recent p95 of the endpoint: 20 ms
+    latencies = http.latencies.setdefault(latency_key(PATH, PARAMS), RecentLatencies())
+    for _ in range(20):
+        latencies.add(0.02)
+    return http
+
+
+def hedges() -> float:
+    return BINANCE_HEDGES.values.get((PATH,), 0)
+
+
+def test_slow_request_is_hedged_and_the_first_answer_wins():
+    http = binance_http([1.0, 0.01])
+    before = hedges()
+
+    result = asyncio.run(http.get(HOST, PATH, PARAMS))
+
+    assert result == [1]
+    assert len(http.calls) == 2
+    assert hedges() == before + 1
+    assert http.hedge_tokens == 5.0 + http.hedge_ratio - 1
+
+
+def test_fast_request_is_not_hedged():
+    http = binance_http([0.001])
+
+    assert asyncio.run(http.get(HOST, PATH, PARAMS)) == [0]
+    assert len(http.calls) == 1
+
+
+def test_hedges_stop_when_the_token_budget_is_spent():
+    http = binance_http([0.1, 0.1], tokens=0.0)
+
+    assert asyncio.run(http.get(HOST, PATH, PARAMS)) == [0]
+    assert len(http.calls) == 1
+    assert http.hedge_tokens == http.hedge_ratio
+
+
+def test_time_waiting_for_the_rate_limiter_does_not_trigger_a_hedge():
+    # Waiting far longer than the p95 for request weight, then answered quickly
+    http = binance_http([0.005], limiter=SlowLimiter(0.2))
+
+    assert asyncio.run(http.get(HOST, PATH, PARAMS)) == [0]
+    assert len(http.calls) == 1
+
+
+def test_latencies_are_kept_per_limit():
+    http = binance_http([0.001, 0.001])
+
+    assert http.hedge_delay(latency_key(PATH, PARAMS)) == 0.02
+    assert http.hedge_delay(latency_key(PATH, {**PARAMS, "limit": 1000})) is None
+
+    asyncio.run(http.get(HOST, PATH, {**PARAMS, "limit": 1000}))
+
+    assert len(http.latencies[latency_key(PATH, {**PARAMS, "limit": 1000})].samples) == 1
+    assert len(http.latencies[latency_key(PATH, PARAMS)].samples) == 20
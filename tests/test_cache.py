@@ -0,0 +1,164 @@
+import asyncio
+from typing import List
+
+from app.storage.cache import CachedStore, ReadCache, estimate_size
+from app.storage.sqlite import SQLiteStore
+
+SYMBOL = "BTCUSDT"
+
+
+def minute_row(minute: int, price=100.0, month: int = 1) -> dict:
+    return {"year": 2024, "month": month, "day": 1, "hour": minute // 60, "minute": minute % 60,
+            "spotClose": price, "depthImbalance": minute / 10}
+
+
+class CountingStore(SQLiteStore):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.reads = 0
+
+    async def read_month(self, symbol: str, year: int, month: int, granularity: str = "1m") -> list:
+        self.reads += 1
+        return await super().read_month(symbol, year, month, granularity)
+
+
+class BufferedStore(CountingStore):
+    """Holds written rows until flushed, like the Sheets backend."""
+
+    exact_reads = False
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.buffered: List[dict] = []
+
+    async def write_row(self, symbol: str, row: dict):
+        self.buffered.append(row)
+
+    def pending_writes(self) -> int:
+        return len(self.buffered)
+
+    async def flush(self):
+        rows, self.buffered = self.buffered, []
+        await self.write_rows(SYMBOL, rows)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_appended_rows_keep_cached_month_equal_to_backend(tmp_path):
+    backend = CountingStore(str(tmp_path / "store.db"))
+    store = CachedStore(backend, 10 ** 6)
+
+    async def scenario():
+        for minute in range(3):
+            await store.write_row(SYMBOL, minute_row(minute))
+        await store.read_month(SYMBOL, 2024, 1)
+        await store.write_row(SYMBOL, minute_row(3))
+        # A rewrite of the latest minute with a missing value keeps the stored one
+        await store.write_row(SYMBOL, {**minute_row(3, price=101.0), "depthImbalance": float("nan")})
+        return await store.read_month(SYMBOL, 2024, 1), await backend.read_month(SYMBOL, 2024, 1)
+
+    cached, stored = run(scenario())
+
+    assert cached == stored
+    assert cached[-1][cached[0].index("spotClose")] == 101.0
+    assert backend.reads == 2
+    key = (SYMBOL, 2024, 1)
+    assert store.cache.sizes[key] == estimate_size(store.cache.entries[key])
+
+
+def test_out_of_order_and_bulk_writes_drop_the_month(tmp_path):
+    backend = CountingStore(str(tmp_path / "store.db"))
+    store = CachedStore(backend, 10 ** 6)
+
+    async def scenario():
+        for minute in range(5, 8):
+            await store.write_row(SYMBOL, minute_row(minute))
+        await store.read_month(SYMBOL, 2024, 1)
+        await store.write_row(SYMBOL, minute_row(2))
+        assert (SYMBOL, 2024, 1) not in store.cache.entries
+        first = await store.read_month(SYMBOL, 2024, 1)
+        await store.write_rows(SYMBOL, [minute_row(0), minute_row(1)])
+        assert (SYMBOL, 2024, 1) not in store.cache.entries
+        return first, await store.read_month(SYMBOL, 2024, 1)
+
+    first, second = run(scenario())
+
+    assert len(first) == 1 + 4 and len(second) == 1 + 6
+    assert backend.reads == 3
+
+
+def test_empty_month_is_cached_and_appended_to(tmp_path):
+    backend = CountingStore(str(tmp_path / "store.db"))
+    store = CachedStore(backend, 10 ** 6)
+
+    async def scenario():
+        await store.write_row(SYMBOL, minute_row(0))
+        # Just the header: nothing collected for the month yet
+        assert len(await store.read_month(SYMBOL, 2024, 2)) == 1
+        assert len(await store.read_month(SYMBOL, 2024, 2)) == 1
+        assert backend.reads == 1
+        await store.write_row(SYMBOL, minute_row(0, month=2))
+        return await store.read_month(SYMBOL, 2024, 2)
+
+    rows = run(scenario())
+
+    # The first row was appended to the cached header
+    assert len(rows) == 2
+    assert backend.reads == 1
+
+
+def test_year_is_served_from_cache_after_one_read(tmp_path):
+    backend = CountingStore(str(tmp_path / "store.db"))
+    store = CachedStore(backend, 10 ** 6)
+
+    async def scenario():
+        await store.write_row(SYMBOL, minute_row(0))
+        first = len((await store.read_year(SYMBOL, 2024))[0]["January"])
+        await store.write_row(SYMBOL, minute_row(1))
+        return first, await store.read_year(SYMBOL, 2024)
+
+    first, year = run(scenario())
+
+    assert backend.reads == 12
+    assert first == 2 and len(year[0]["January"]) == 3
+    assert all(len(tab[name]) == 1 for tab in year[1:] for name in tab)
+
+
+def test_buffered_writes_invalidate_the_month_once_flushed(tmp_path):
+    backend = BufferedStore(str(tmp_path / "store.db"))
+    store = CachedStore(backend, 10 ** 6)
+
+    async def scenario():
+        await backend.write_rows(SYMBOL, [minute_row(0)])
+        await store.read_month(SYMBOL, 2024, 1)
+        await store.write_row(SYMBOL, minute_row(1))
+        # Until the flush the backend would return the same rows, so the cache still serves them
+        before = await store.read_month(SYMBOL, 2024, 1)
+        await store.flush()
+        return before, await store.read_month(SYMBOL, 2024, 1)
+
+    before, after = run(scenario())
+
+    assert len(before) == 2 and len(after) == 3
+    assert backend.reads == 2
+    assert not store.dirty
+
+
+def test_read_cache_stays_within_its_budget():
+    rows = [["year", "month"], *([2024, 1] for _ in range(10))]
+    cache = ReadCache(3 * estimate_size(rows))
+    for month in range(1, 5):
+        cache.put(("A", 2024, month), [list(row) for row in rows])
+    cache.get(("A", 2024, 2))
+    cache.put(("A", 2024, 5), [list(row) for row in rows])
+
+    assert list(cache.entries) == [("A", 2024, 4), ("A", 2024, 2), ("A", 2024, 5)]
+    assert cache.size == sum(cache.sizes.values()) <= cache.max_bytes
+
+    cache.put(("B", 2024, 1), rows * 4)
+    assert ("B", 2024, 1) not in cache.entries
+
+    cache.append(("A", 2024, 5), [2024, 1, "longer"], replace_last=True)
+    assert cache.sizes[("A", 2024, 5)] == estimate_size(cache.entries[("A", 2024, 5)])
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.scripts.order_book import LocalOrderBook, OrderBookDesync, OrderBookManager, ReplayDepthFeed
+
+SYMBOL = "BTCUSDT"
+
+
+def depth_event(first_id, final_id, bids=(), asks=(), previous_id=None):
+    event = {"e": "depthUpdate", "s": SYMBOL, "U": first_id, "u": final_id,
+             "b": [[str(price), str(qty)] for price, qty in bids],
+             "a": [[str(price), str(qty)] for price, qty in asks]}
+    if previous_id is not None:
+        event["pu"] = previous_id
+    return event
+
+
+def snapshot(last_update_id, bids=((100, 1),), asks=((101, 1),)):
+    return {"lastUpdateId": last_update_id,
+            "bids": [[str(price), str(qty)] for price, qty in bids],
+            "asks": [[str(price), str(qty)] for price, qty in asks]}
+
+
+class FakeSnapshots:
+    """Hands out the given snapshots in order, ``None`` standing for a failed request."""
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.calls = 0
+
+    async def __call__(self, symbol, trade):
+        self.calls += 1
+        return self.snapshots.pop(0)
+
+
+def replay(manager, trade="spot"):
+    async def run():
+        await manager.run_feed(trade, reconnect=False)
+        await asyncio.gather(*manager.resyncs.values())
+    asyncio.run(run())
+
+
+def test_spot_book_drops_old_events_and_applies_straddling_one():
+    book = LocalOrderBook(SYMBOL, "spot")
+    book.load_snapshot(snapshot(100))
+
+    assert book.apply_diff(depth_event(95, 100, bids=[(99, 5)])) is False
+    assert book.apply_diff(depth_event(100, 102, bids=[(100, 0), (99, 2)])) is True
+    assert book.apply_diff(depth_event(103, 104, asks=[(102, 3)])) is True
+
+    assert book.bids == {99.0: 2.0}
+    assert book.asks == {101.0: 1.0, 102.0: 3.0}
+    assert book.last_update_id == 104
+
+
+def test_spot_book_raises_on_sequence_gap():
+    book = LocalOrderBook(SYMBOL, "spot")
+    book.load_snapshot(snapshot(100))
+    book.apply_diff(depth_event(101, 102))
+
+    with pytest.raises(OrderBookDesync):
+        book.apply_diff(depth_event(104, 105))
+    assert not book.synced
+
+
+def test_futures_book_checks_previous_update_id():
+    book = LocalOrderBook(SYMBOL, "future")
+    book.load_snapshot(snapshot(100))
+    book.apply_diff(depth_event(99, 101, previous_id=98))
+    book.apply_diff(depth_event(102, 103, previous_id=101))
+
+    with pytest.raises(OrderBookDesync):
+        book.apply_diff(depth_event(105, 106, previous_id=104))
+
+
+def test_manager_resyncs_after_gap_and_replays_buffered_events():
+    events = [depth_event(101, 102, bids=[(99, 1)]),
+              depth_event(103, 104),
+              # Events 105-109 were lost
+              depth_event(110, 111, bids=[(98, 4)]),
+              depth_event(112, 112, asks=[(101, 0), (103, 2)])]
+    fetch = FakeSnapshots(snapshot(100), snapshot(109, bids=[(100, 7)]))
+    manager = OrderBookManager(None, [SYMBOL], trades=("spot",), feeds={"spot": ReplayDepthFeed(events)},
+                               fetch_snapshot=fetch)
+
+    replay(manager)
+
+    book = manager.get_book(SYMBOL, "spot")
+    assert book is not None
+    assert manager.resync_count == 2
+    assert book.last_update_id == 112
+    assert book.bids == {100.0: 7.0, 98.0: 4.0}
+    assert book.asks == {103.0: 2.0}
+    assert not manager.resyncs and not manager.buffers[(SYMBOL, "spot")]
+
+
+def test_manager_backs_off_failed_snapshots():
+    events = [depth_event(101, 102), depth_event(103, 103)]
+    fetch = FakeSnapshots(None, None, snapshot(100))
+    manager = OrderBookManager(None, [SYMBOL], trades=("spot",), feeds={"spot": ReplayDepthFeed(events)},
+                               fetch_snapshot=fetch, resync_delay=0.01)
+
+    replay(manager)
+
+    assert fetch.calls == 3
+    assert manager.resync_count == 1
+    assert manager.get_book(SYMBOL, "spot").last_update_id == 103
+
+
+def test_manager_caps_buffered_events():
+    # No snapshot arrives while the resync backs off, so every event is buffered
+    manager = OrderBookManager(None, [SYMBOL], trades=("spot",), feeds={}, fetch_snapshot=FakeSnapshots(None),
+                               resync_delay=60, max_buffered_events=3)
+
+    async def run():
+        for update_id in range(101, 111):
+            manager.handle_event("spot", depth_event(update_id, update_id))
+        await asyncio.sleep(0)
+        assert len(manager.resyncs) == 1
+        await manager.stop()
+
+    asyncio.run(run())
+
+    assert [event["U"] for event in manager.buffers[(SYMBOL, "spot")]] == [108, 109, 110]
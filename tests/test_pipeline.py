@@ -0,0 +1,41 @@
+import asyncio
+import math
+from types import SimpleNamespace
+
+from app.metrics import COLLECTOR_ERRORS
+from app.pipeline import DataCollectorPipeline
+from app.schema import ROW_SCHEMA
+from benchmarks.fixtures import FixtureHTTP, synthetic_payloads
+
+
+def pipeline_for(payloads: dict) -> DataCollectorPipeline:
+    app = SimpleNamespace(state=SimpleNamespace(binance_http=FixtureHTTP(payloads), order_books=None,
+                                                feature_pool=None, trade_tracker=None))
+    return DataCollectorPipeline(app, ["BNBUSDT"])
+
+
+def errors(collector: str) -> float:
+    return COLLECTOR_ERRORS.values.get((collector, "future"), 0)
+
+
+def test_complete_payloads_fill_every_collected_column():
+    row = asyncio.run(pipeline_for(synthetic_payloads()).tasks("BNBUSDT"))
+
+    assert list(row) == list(ROW_SCHEMA.columns)
+    assert not any(math.isnan(row[column]) for column in ROW_SCHEMA.groups["top_accounts"])
+    assert row["topAccountsStale"] == 0
+
+
+def test_raising_collector_only_empties_its_own_columns():
+    payloads = synthetic_payloads()
+    # An empty answer makes get_traders_stat index past the end of the list
+    payloads["top_accounts"] = []
+    before = errors("top_accounts")
+
+    row = asyncio.run(pipeline_for(payloads).tasks("BNBUSDT"))
+
+    assert errors("top_accounts") == before + 1
+    assert all(math.isnan(row[column]) for column in ROW_SCHEMA.groups["top_accounts"])
+    assert row["topAccountsStale"] == 0
+    assert not any(math.isnan(row[column]) for column in ROW_SCHEMA.groups["top_positions"])
+    assert not math.isnan(row["spotClose"]) and not math.isnan(row["futureClose"])
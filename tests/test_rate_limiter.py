@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+
+from app.scripts.rate_limiter import USED_WEIGHT_HEADER, RateLimiter, WeightBucket, endpoint_weight
+
+# Short windows keep the waits in these tests to a fraction of a second
+WINDOW = 0.2
+
+
+def start_of_window():
+    # Begin right after a boundary so the window doesn't roll mid-test
+    time.sleep(WINDOW - time.time() % WINDOW + 0.01)
+
+
+def test_endpoint_weights_follow_binance_tables():
+    assert endpoint_weight("/api/v3/depth", {"limit": 1000}) == ("spot", 50)
+    assert endpoint_weight("/api/v3/depth", {"limit": 100}) == ("spot", 5)
+    assert endpoint_weight("/fapi/v1/depth", {"limit": 1000}) == ("futures", 20)
+    assert endpoint_weight("/fapi/v1/klines", {"limit": 1}) == ("futures", 1)
+    assert endpoint_weight("/futures/data/topLongShortAccountRatio") == ("futures_data", 1)
+    assert endpoint_weight("/bapi/earn/v1/public/indicator/capital-flow/info") == (None, 0)
+
+
+def test_bucket_waits_for_the_next_window_when_full():
+    bucket = WeightBucket(10, WINDOW)
+
+    async def run():
+        start_of_window()
+        await bucket.acquire(6)
+        await bucket.acquire(4)
+        window_id = bucket.window_id
+        started = time.time()
+        await bucket.acquire(1)
+        return window_id, time.time() - started
+
+    window_id, waited = asyncio.run(run())
+
+    assert 0 < waited < WINDOW
+    assert bucket.window_id == window_id + 1
+    assert bucket.used == 1
+
+
+def test_request_heavier_than_the_budget_goes_out_alone():
+    bucket = WeightBucket(10, WINDOW)
+
+    async def run():
+        start_of_window()
+        await bucket.acquire(1)
+        await bucket.acquire(50)
+
+    asyncio.run(run())
+
+    assert bucket.used == 50
+
+
+def test_used_weight_header_only_raises_the_count():
+    limiter = RateLimiter()
+    spot = limiter.buckets["spot"]
+
+    async def run():
+        await limiter.acquire("/api/v3/depth", {"limit": 1000})
+
+    asyncio.run(run())
+    limiter.observe("/api/v3/depth", 200, {USED_WEIGHT_HEADER: "500"})
+    assert spot.used == 500
+    # Our reservation stands until the server has seen it
+    limiter.observe("/api/v3/depth", 200, {USED_WEIGHT_HEADER: "20"})
+    assert spot.used == 500
+    assert limiter.buckets["futures"].used == 0
+
+
+def test_throttled_response_blocks_the_bucket_for_retry_after():
+    limiter = RateLimiter()
+
+    async def run():
+        limiter.observe("/fapi/v1/klines", 429, {"retry-after": str(WINDOW)})
+        started = time.time()
+        await limiter.acquire("/fapi/v1/klines", {"limit": 1})
+        return time.time() - started
+
+    waited = asyncio.run(run())
+
+    assert waited >= WINDOW - 0.01
+    assert limiter.throttled == 1
+    assert not limiter.usage()["spot"]["blocked"]
+
+
+def test_ban_without_retry_after_sits_out_the_window():
+    limiter = RateLimiter()
+    futures_data = limiter.buckets["futures_data"]
+
+    limiter.observe("/futures/data/topLongShortAccountRatio", 418, {})
+
+    assert limiter.usage()["futures_data"]["blocked"]
+    window_end = (time.time() // futures_data.window + 1) * futures_data.window
+    assert futures_data.blocked_until == pytest.approx(window_end, abs=0.5)
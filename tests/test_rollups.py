@@ -0,0 +1,101 @@
+import asyncio
+import calendar
+import random
+
+import pytest
+
+from app.storage.rollups import ROLLUP_GRANULARITIES, ROW_COUNT, RollupAccumulator, bucket_start
+from app.storage.sqlite import SQLiteStore
+
+# 2024-01-01 was a Monday
+START = calendar.timegm((2024, 1, 1, 0, 0, 0)) * 1000
+MINUTE = 60 * 1000
+
+
+def minute_row(minute: int) -> dict:
+    price = 100 + minute % 7 - minute % 3
+    return {"year": 2024, "month": 1, "day": 1 + minute // 1440, "hour": minute // 60 % 24, "minute": minute % 60,
+            "dayOfWeek": 0, "isWeekend": False, "partOfMonth": 1,
+            "spotOpen": price, "spotHigh": price + 2.5, "spotLow": price - 1.5, "spotClose": price + 0.5,
+            "spotVolume": 10.0 + minute, "spotNumberOfTrades": 3,
+            # Missing every fourth minute, which must not drag the mean down
+            "depthImbalance": None if minute % 4 == 0 else minute / 10}
+
+
+def rounded(rows: list) -> list:
+    return [[round(value, 9) if isinstance(value, float) else value for value in row] for row in rows]
+
+
+def test_accumulator_combines_columns_by_kind():
+    accumulator = RollupAccumulator(START)
+    for minute in range(3):
+        accumulator.add(START + minute * MINUTE, minute_row(minute))
+    result = accumulator.result()
+
+    assert result["minute"] == 0
+    assert result["spotOpen"] == minute_row(0)["spotOpen"]
+    assert result["spotHigh"] == max(minute_row(minute)["spotHigh"] for minute in range(3))
+    assert result["spotLow"] == min(minute_row(minute)["spotLow"] for minute in range(3))
+    assert result["spotClose"] == minute_row(2)["spotClose"]
+    assert result["spotVolume"] == 10 + 11 + 12
+    assert result["spotNumberOfTrades"] == 9
+    assert result["depthImbalance"] == pytest.approx((0.1 + 0.2) / 2)
+    assert result[ROW_COUNT] == 3
+
+
+def test_weekly_buckets_start_on_monday():
+    sunday_evening = START + (6 * 24 + 23) * 60 * MINUTE
+    assert bucket_start(sunday_evening, "1w") == START
+    assert bucket_start(sunday_evening + 60 * MINUTE, "1w") == START + 7 * 24 * 60 * MINUTE
+
+
+def read_rollups(store: SQLiteStore) -> dict:
+    async def read():
+        return {granularity: await store.read_month("BTCUSDT", 2024, 1, granularity)
+                for granularity in ROLLUP_GRANULARITIES}
+    return asyncio.run(read())
+
+
+def test_appended_rows_match_rebuilt_buckets(tmp_path):
+    minutes = list(range(0, 2 * 24 * 60, 7))
+    appended = SQLiteStore(str(tmp_path / "appended.db"))
+    rebuilt = SQLiteStore(str(tmp_path / "rebuilt.db"))
+
+    async def write():
+        # One row per tick folds into the open bucket's accumulator...
+        for minute in minutes:
+            await appended.write_row("BTCUSDT", minute_row(minute))
+        # ...while shuffled batches rebuild every bucket they touch from 1m rows
+        shuffled = [minute_row(minute) for minute in minutes]
+        random.Random(1).shuffle(shuffled)
+        for start in range(0, len(shuffled), 50):
+            await rebuilt.write_rows("BTCUSDT", shuffled[start:start + 50])
+
+    asyncio.run(write())
+
+    appended_rollups, rebuilt_rollups = read_rollups(appended), read_rollups(rebuilt)
+    for granularity in ROLLUP_GRANULARITIES:
+        assert appended_rollups[granularity][0] == rebuilt_rollups[granularity][0]
+        assert rounded(appended_rollups[granularity][1:]) == rounded(rebuilt_rollups[granularity][1:])
+    header, *hourly = appended_rollups["1h"]
+    assert len(hourly) == 48
+    assert sum(row[header.index(ROW_COUNT)] for row in hourly) == len(minutes)
+
+
+def test_rewritten_minute_rebuilds_its_buckets(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    rewritten = {**minute_row(2), "spotHigh": 1000.0, "spotVolume": 0.0}
+
+    async def write():
+        for minute in range(10):
+            await store.write_row("BTCUSDT", minute_row(minute))
+        await store.write_row("BTCUSDT", rewritten)
+
+    asyncio.run(write())
+
+    header, first, second = read_rollups(store)["5m"]
+    expected = RollupAccumulator.from_rows(START, [(START + minute * MINUTE, rewritten if minute == 2
+                                                    else minute_row(minute)) for minute in range(5)]).result()
+    assert first[header.index("spotHigh")] == 1000.0
+    assert rounded([first]) == rounded([[expected[column] for column in header]])
+    assert second[header.index(ROW_COUNT)] == 5
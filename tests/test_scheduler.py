@@ -0,0 +1,93 @@
+import asyncio
+from typing import List, Optional
+
+from app.backfill import job_key
+from app.pipeline import CollectionError
+from app.scheduler import TickScheduler
+
+MINUTE = 60 * 1000
+BOUNDARY = 1_700_000_040_000
+
+
+class FakeCollector:
+    interval = "1m"
+
+    def __init__(self, symbols: List[str]) -> None:
+        self.symbols = symbols
+        self.release: Optional[asyncio.Event] = None
+        self.failing: List[str] = []
+
+    async def run(self, bar_close: int):
+        if self.release is not None:
+            await self.release.wait()
+        if self.failing:
+            raise CollectionError(self.failing, len(self.symbols))
+
+
+class FakeBackfill:
+    """Refuses every symbol while ``busy``, like a backfill whose job is still running."""
+
+    def __init__(self) -> None:
+        self.busy = False
+        self.started = []
+
+    def start(self, symbols, start, end, interval="1m"):
+        keys = [job_key(symbol, interval) for symbol in symbols]
+        if self.busy:
+            return [], keys
+        self.started.append((list(symbols), start, end))
+        return keys, []
+
+
+def test_gap_left_while_backfill_is_busy_is_caught_up_later():
+    collector, backfill = FakeCollector(["AAA", "BBB"]), FakeBackfill()
+    scheduler = TickScheduler(collector, backfill, MINUTE)
+
+    async def run():
+        scheduler.tick(BOUNDARY)
+        await scheduler.current
+        collector.release = asyncio.Event()
+        scheduler.tick(BOUNDARY + MINUTE)
+        # Comes due while the previous run is still going
+        scheduler.tick(BOUNDARY + 2 * MINUTE)
+        assert scheduler.skipped == 1
+        collector.release.set()
+        await scheduler.current
+
+        # A backfill (e.g. a user's /backfill) is running when the gap is noticed
+        backfill.busy = True
+        scheduler.tick(BOUNDARY + 3 * MINUTE)
+        await scheduler.current
+        assert backfill.started == []
+        assert scheduler.status()["last_bar"] == BOUNDARY
+
+        backfill.busy = False
+        scheduler.tick(BOUNDARY + 4 * MINUTE)
+        await scheduler.current
+
+    asyncio.run(run())
+
+    # The skipped bar plus the one collected while the backfill was busy
+    assert backfill.started == [(["AAA", "BBB"], BOUNDARY + MINUTE, BOUNDARY + 3 * MINUTE)]
+    assert scheduler.last_bars == {"AAA": BOUNDARY + 3 * MINUTE, "BBB": BOUNDARY + 3 * MINUTE}
+    assert scheduler.caught_up_bars == 4
+
+
+def test_failed_symbols_alone_are_caught_up():
+    collector, backfill = FakeCollector(["AAA", "BBB"]), FakeBackfill()
+    scheduler = TickScheduler(collector, backfill, MINUTE)
+
+    async def run():
+        scheduler.tick(BOUNDARY)
+        await scheduler.current
+        collector.failing = ["BBB"]
+        scheduler.tick(BOUNDARY + MINUTE)
+        await scheduler.current
+        collector.failing = []
+        scheduler.tick(BOUNDARY + 2 * MINUTE)
+        await scheduler.current
+
+    asyncio.run(run())
+
+    assert backfill.started == [(["BBB"], BOUNDARY, BOUNDARY + MINUTE)]
+    assert scheduler.last_bars == {"AAA": BOUNDARY + MINUTE, "BBB": BOUNDARY + MINUTE}
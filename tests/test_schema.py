@@ -0,0 +1,79 @@
+import math
+
+import pytest
+
+from app.backfill import merge_klines
+from app.metrics import SCHEMA_MISMATCHES
+from app.schema import COLLECTED_GROUPS, ROW_SCHEMA, ROW_SCHEMAS, RowSchema, stale_column
+from app.scripts.data_collectors import CALENDAR_FIELDS, KLINE_FIELDS
+
+SCHEMA = RowSchema(1, [("prices", ["spotOpen", "spotClose"]), ("flow", ["largeInflow", "largeOutflow"])])
+
+
+def mismatches(group: str) -> float:
+    return SCHEMA_MISMATCHES.values.get((group,), 0)
+
+
+def test_fill_places_each_group_in_its_slots():
+    row = SCHEMA.new_row()
+    row.fill("flow", {"largeInflow": 3.0, "largeOutflow": 4.0})
+    row.fill("prices", {"spotOpen": 1.0, "spotClose": 2.0})
+
+    assert row.as_dict() == {"spotOpen": 1.0, "spotClose": 2.0, "largeInflow": 3.0, "largeOutflow": 4.0}
+
+
+def test_fill_leaves_missing_groups_and_columns_nan():
+    before = mismatches("flow")
+    row = SCHEMA.new_row()
+    row.fill("prices", None)
+    row.fill("flow", {"largeOutflow": 4.0, "largeInflow": 3.0})
+    assert mismatches("flow") == before
+    row.fill("flow", {"largeOutflow": 5.0})
+
+    values = row.as_dict()
+    assert math.isnan(values["spotOpen"]) and math.isnan(values["spotClose"])
+    assert math.isnan(values["largeInflow"]) and values["largeOutflow"] == 5.0
+    assert mismatches("flow") == before + 1
+
+
+def test_fill_drops_undeclared_keys_and_counts_them(capsys):
+    before = mismatches("prices")
+    row = SCHEMA.new_row()
+    row.fill("prices", {"spotOpen": 1.0, "spotClose": 2.0, "spotVwap": 1.5})
+    row.fill("prices", {"spotOpen": 1.0, "spotClose": 2.0, "spotVwap": 1.5})
+
+    assert list(row.as_dict()) == list(SCHEMA.columns)
+    assert mismatches("prices") == before + 2
+    # Reported once, counted every time
+    assert capsys.readouterr().out.count("spotVwap") == 1
+    assert SCHEMA.mismatch("prices", {"spotOpen": 1.0, "spotVwap": 1.5}) == ({"spotVwap"}, ["spotClose"])
+
+
+def test_schema_rejects_duplicate_columns():
+    with pytest.raises(ValueError):
+        RowSchema(9, [("a", ["x", "y"]), ("b", ["y"])])
+
+
+def test_v2_appends_a_stale_flag_per_collected_group():
+    v1, v2 = ROW_SCHEMAS[1], ROW_SCHEMAS[2]
+
+    assert v2.columns[:len(v1.columns)] == v1.columns
+    assert v2.groups["staleness"] == tuple(stale_column(group) for group in COLLECTED_GROUPS)
+    assert stale_column("spot_klines") == "spotKlinesStale"
+    assert "calendar" not in COLLECTED_GROUPS
+
+
+def kline(trade: str, minute: int, price: float) -> dict:
+    row = dict(zip(CALENDAR_FIELDS, [2024, 1, 1, 0, minute, 0, False, "Early"]))
+    row.update({f"{trade}{field}": price for field in KLINE_FIELDS})
+    return row
+
+
+def test_backfilled_rows_follow_the_row_schema():
+    rows = merge_klines([kline("spot", 0, 1.0), kline("spot", 1, 2.0)], [kline("future", 1, 3.0)])
+
+    assert [list(row) for row in rows] == [list(ROW_SCHEMA.columns)] * 2
+    first, second = rows
+    assert first["spotOpen"] == 1.0 and math.isnan(first["futureOpen"])
+    assert second["spotOpen"] == 2.0 and second["futureOpen"] == 3.0 and second["minute"] == 1
+    assert all(math.isnan(second[column]) for column in ROW_SCHEMA.groups["capital_flow"])
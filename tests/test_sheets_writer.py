@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+from app.scripts.sheets_writer import SheetsWriteBuffer
+
+
+class FakeAccessor:
+    """Records appends; the first ``failures`` calls per tab answer nothing, like a failed request."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.calls: dict = {}
+        self.appended: dict = {}
+        self.during_append = None
+
+    async def add_row_data(self, spreadsheet_id: str, sheet_name: str, rows: List[list]) -> Optional[dict]:
+        await asyncio.sleep(0)
+        if self.during_append is not None:
+            self.during_append()
+        calls = self.calls[sheet_name] = self.calls.get(sheet_name, 0) + 1
+        if calls <= self.failures:
+            return None
+        self.appended.setdefault(sheet_name, []).extend(rows)
+        return {"updates": {"updatedRows": len(rows)}}
+
+
+def test_rows_flush_in_bulk_once_enough_are_pending():
+    accessor = FakeAccessor()
+    buffer = SheetsWriteBuffer(accessor, max_rows=3, max_delay=60)
+
+    async def run():
+        buffer.add("sheet", "January", [1])
+        buffer.add("sheet", "February", [2])
+        await buffer.maybe_flush()
+        assert accessor.calls == {}
+        buffer.add("sheet", "January", [3])
+        await buffer.maybe_flush()
+
+    asyncio.run(run())
+
+    assert accessor.appended == {"January": [[1], [3]], "February": [[2]]}
+    assert accessor.calls == {"January": 1, "February": 1}
+    assert buffer.pending_rows == 0
+
+
+def test_failed_tab_backs_off_and_keeps_row_order():
+    accessor = FakeAccessor(failures=1)
+    buffer = SheetsWriteBuffer(accessor, max_rows=1, max_delay=60, retry_delay=0.05)
+
+    async def run():
+        buffer.add("sheet", "January", [1])
+        # Rows added while the failing append is in flight go after the ones put back
+        accessor.during_append = lambda: buffer.add("sheet", "January", [2])
+        await buffer.flush()
+        accessor.during_append = None
+        assert buffer.pending["sheet", "January"] == [[1], [2]]
+        assert buffer.failures == {("sheet", "January"): 1}
+
+        # Due by row count, but the tab waits out its retry delay
+        await buffer.maybe_flush()
+        assert accessor.calls["January"] == 1
+        await asyncio.sleep(0.06)
+        await buffer.maybe_flush()
+
+    asyncio.run(run())
+
+    assert accessor.calls["January"] == 2
+    assert accessor.appended["January"] == [[1], [2]]
+    assert buffer.failures == {} and buffer.retry_at == {}
+
+
+def test_retry_delay_doubles_with_each_failure():
+    buffer = SheetsWriteBuffer(FakeAccessor(failures=10), retry_delay=1)
+
+    async def run():
+        delays = []
+        for _ in range(3):
+            buffer.retry_at.clear()
+            buffer.add("sheet", "January", [1])
+            await buffer.flush()
+            delays.append(buffer.retry_at["sheet", "January"] - time.monotonic())
+        return delays
+
+    delays = asyncio.run(run())
+
+    assert [round(delay) for delay in delays] == [1, 2, 4]
+
+
+def test_persistently_failing_rows_are_set_aside(tmp_path):
+    rejected_path = tmp_path / "rejected" / "rows.jsonl"
+    accessor = FakeAccessor(failures=10)
+    buffer = SheetsWriteBuffer(accessor, max_rows=1, max_delay=60, max_attempts=3, retry_delay=0,
+                               rejected_path=str(rejected_path))
+
+    async def run():
+        buffer.add("sheet", "January", [1, float("nan")])
+        buffer.add("sheet", "January", [2, 3.5])
+        for _ in range(5):
+            await buffer.maybe_flush()
+
+    asyncio.run(run())
+
+    assert accessor.calls["January"] == 3
+    assert buffer.pending_rows == 0 and buffer.rejected_rows == 2
+    [line] = rejected_path.read_text().splitlines()
+    rejected = json.loads(line)
+    assert (rejected["spreadsheet_id"], rejected["sheet_name"]) == ("sheet", "January")
+    assert rejected["rows"] == [[1, None], [2, 3.5]]
+    assert rejected["error"]